@@ -0,0 +1,232 @@
+"""Crop content packs: crop definitions loaded from JSON and compiled into tables.
+
+A pack is a JSON object with a "crops" list (or the same in TOML, one [[crops]]
+table per crop). Each crop gives its name, shop letter, cost, the two growth
+times (seconds since planting), harvest reward, a colour per growth state
+and, per state, a list of shapes to draw:
+
+    {"name": "corn", "letter": "C", "cost": 5, "seed_to_sprout": 8,
+     "sprout_to_ready": 8, "reward": 6,
+     "colors": {"seed": [139, 69, 19], "sprout": [0, 150, 0], "ready": [255, 235, 59]},
+     "shapes": {"seed": [["rect", "seed", [-14, -6, 28, 12]], ...], ...}}
+
+Shapes are ["kind", color, *args] with the arguments of the pygame.draw
+function of that kind (minus surface and colour) and coordinates relative
+to the tile centre. A colour is [r, g, b], "black", "white", or one of the
+crop's state colours by name.
+
+The whole pack is validated up front and compiled into CropTables: dense
+lists indexed by crop ID, with crops sorted cheapest first (the auto-plant
+order), so nothing is looked up by name at runtime. This module does not
+need pygame.
+"""
+import json
+import os
+
+DEFAULT_PACK = os.path.join(os.path.dirname(os.path.abspath(__file__)), "crops.json")
+STATES = ("seed", "sprout", "ready")
+NAMED_COLORS = {"black": (0, 0, 0), "white": (255, 255, 255)}
+
+# Argument types per shape kind, as pygame.draw takes them; "width" is optional
+SHAPE_ARGS = {
+    "rect": ("rect", "width"),
+    "ellipse": ("rect", "width"),
+    "circle": ("point", "number", "width"),
+    "polygon": ("points", "width"),
+    "line": ("point", "point", "width"),
+    "arc": ("rect", "number", "number", "width"),
+}
+
+
+class PackError(ValueError):
+    """The pack is missing, malformed or inconsistent."""
+
+
+class CropTables:
+    """A compiled pack. Every per-crop list is indexed by crop ID; ID 0 is "no crop".
+
+    `colors[id]` and `shapes[id]` are indexed by state code (1 = seed,
+    2 = sprout, 3 = ready). `ready_after[id]` is the age at which a crop
+    can first be harvested.
+    """
+
+    def __init__(self, crops, path=None, mtime=None):
+        self.path = path
+        self.mtime = mtime
+        self.names = [None] + [crop["name"] for crop in crops]
+        self.labels = [None] + [crop["label"] for crop in crops]
+        self.letters = [None] + [crop["letter"] for crop in crops]
+        self.costs = [0] + [crop["cost"] for crop in crops]
+        self.seed_to_sprout = [float("inf")] + [crop["seed_to_sprout"] for crop in crops]
+        self.sprout_to_ready = [float("inf")] + [crop["sprout_to_ready"] for crop in crops]
+        self.rewards = [0] + [crop["reward"] for crop in crops]
+        # Both stage times run from planting, so a crop ripens after the longer one
+        self.ready_after = [float("inf")] + [max(crop["seed_to_sprout"], crop["sprout_to_ready"]) for crop in crops]
+        self.colors = [None] + [[None] + [crop["colors"][state] for state in STATES] for crop in crops]
+        self.shapes = [None] + [[None] + [crop["shapes"][state] for state in STATES] for crop in crops]
+
+    def __len__(self):
+        return len(self.names) - 1
+
+
+def _fail(source, where, message):
+    raise PackError(f"{source}: {where}: {message}")
+
+
+def _number(value, source, where, positive=False):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        _fail(source, where, f"expected a number, got {value!r}")
+    if positive and value <= 0:
+        _fail(source, where, f"must be positive, got {value!r}")
+    return value
+
+
+def _point(value, source, where):
+    if not isinstance(value, list) or len(value) != 2:
+        _fail(source, where, f"expected [x, y], got {value!r}")
+    return tuple(_number(v, source, where) for v in value)
+
+
+def _color(value, palette, source, where):
+    if isinstance(value, str):
+        if value in NAMED_COLORS:
+            return NAMED_COLORS[value]
+        if value in palette:
+            return palette[value]
+        _fail(source, where, f"unknown colour {value!r}")
+    if (not isinstance(value, list) or len(value) != 3
+            or not all(isinstance(c, int) and not isinstance(c, bool) and 0 <= c <= 255 for c in value)):
+        _fail(source, where, f"expected [r, g, b] with 0-255 components, got {value!r}")
+    return tuple(value)
+
+
+def _shape(value, palette, source, where):
+    if not isinstance(value, list) or len(value) < 2 or value[0] not in SHAPE_ARGS:
+        _fail(source, where, f"expected [kind, color, ...] with kind in {sorted(SHAPE_ARGS)}, got {value!r}")
+    kind, color, args = value[0], _color(value[1], palette, source, where), value[2:]
+    signature = SHAPE_ARGS[kind]
+    if not len(signature) - 1 <= len(args) <= len(signature):
+        _fail(source, where, f"{kind} takes {len(signature) - 1} or {len(signature)} arguments, got {len(args)}")
+    compiled = []
+    for arg_type, arg in zip(signature, args):
+        if arg_type == "rect":
+            if not isinstance(arg, list) or len(arg) != 4:
+                _fail(source, where, f"expected [x, y, w, h], got {arg!r}")
+            compiled.append(tuple(_number(v, source, where) for v in arg))
+        elif arg_type == "point":
+            compiled.append(_point(arg, source, where))
+        elif arg_type == "points":
+            if not isinstance(arg, list) or len(arg) < 3:
+                _fail(source, where, f"a polygon needs at least 3 points, got {arg!r}")
+            compiled.append(tuple(_point(p, source, where) for p in arg))
+        elif arg_type == "width":
+            if not isinstance(arg, int) or isinstance(arg, bool) or arg < 0:
+                _fail(source, where, f"width must be a non-negative integer, got {arg!r}")
+            compiled.append(arg)
+        else:
+            compiled.append(_number(arg, source, where))
+    return kind, color, tuple(compiled)
+
+
+def _crop(value, index, source):
+    where = f"crops[{index}]"
+    if not isinstance(value, dict):
+        _fail(source, where, "expected an object")
+    name = value.get("name")
+    if not isinstance(name, str) or not name:
+        _fail(source, where, "needs a non-empty string name")
+    where = f"crop {name!r}"
+    missing = {"letter", "cost", "seed_to_sprout", "sprout_to_ready", "reward", "colors", "shapes"} - value.keys()
+    if missing:
+        _fail(source, where, f"missing {', '.join(sorted(missing))}")
+    label = value.get("label", name.capitalize())
+    if not isinstance(label, str) or not label:
+        _fail(source, where, f"label must be a non-empty string, got {label!r}")
+    letter = value["letter"]
+    if not isinstance(letter, str) or len(letter) != 1:
+        _fail(source, where, f"letter must be one character, got {letter!r}")
+    cost, reward = value["cost"], value["reward"]
+    if not isinstance(cost, int) or isinstance(cost, bool) or cost <= 0:
+        _fail(source, where, f"cost must be a positive integer, got {cost!r}")
+    if not isinstance(reward, int) or isinstance(reward, bool) or reward < 0:
+        _fail(source, where, f"reward must be a non-negative integer, got {reward!r}")
+    colors, shapes = value["colors"], value["shapes"]
+    if not isinstance(colors, dict) or set(colors) != set(STATES):
+        _fail(source, where, f"colors must give exactly {', '.join(STATES)}")
+    if not isinstance(shapes, dict) or set(shapes) != set(STATES):
+        _fail(source, where, f"shapes must give exactly {', '.join(STATES)}")
+    palette = {}
+    for state in STATES:
+        palette[state] = _color(colors[state], palette, source, f"{where} colors.{state}")
+    compiled_shapes = {}
+    for state in STATES:
+        if not isinstance(shapes[state], list):
+            _fail(source, f"{where} shapes.{state}", "expected a list of shapes")
+        compiled_shapes[state] = tuple(_shape(shape, palette, source, f"{where} shapes.{state}[{i}]")
+                                       for i, shape in enumerate(shapes[state]))
+    return {
+        "name": name,
+        "label": label,
+        "letter": letter,
+        "cost": cost,
+        "seed_to_sprout": _number(value["seed_to_sprout"], source, f"{where} seed_to_sprout", positive=True),
+        "sprout_to_ready": _number(value["sprout_to_ready"], source, f"{where} sprout_to_ready", positive=True),
+        "reward": reward,
+        "colors": palette,
+        "shapes": compiled_shapes,
+    }
+
+
+def compile_pack(data, source="<pack>", mtime=None):
+    """Validate a decoded pack and compile it into CropTables."""
+    if not isinstance(data, dict) or not isinstance(data.get("crops"), list) or not data["crops"]:
+        raise PackError(f"{source}: expected an object with a non-empty \"crops\" list")
+    crops = [_crop(value, i, source) for i, value in enumerate(data["crops"])]
+    seen = set()
+    for crop in crops:
+        if crop["name"] in seen:
+            _fail(source, f"crop {crop['name']!r}", "defined twice")
+        seen.add(crop["name"])
+    if len(crops) > 255:
+        raise PackError(f"{source}: at most 255 crops fit the one-byte crop IDs, got {len(crops)}")
+    # Stable sort keeps the pack's order among equally priced crops
+    crops.sort(key=lambda crop: crop["cost"])
+    return CropTables(crops, source, mtime)
+
+
+def load_pack(path=DEFAULT_PACK):
+    """Read and compile a pack file (.json, or .toml on Python 3.11+); raises PackError or OSError."""
+    mtime = os.stat(path).st_mtime_ns
+    if path.endswith(".toml"):
+        try:
+            import tomllib
+        except ImportError:
+            raise PackError(f"{path}: TOML packs need Python 3.11 or newer") from None
+        with open(path, "rb") as f:
+            try:
+                data = tomllib.load(f)
+            except tomllib.TOMLDecodeError as e:
+                raise PackError(f"{path}: {e}") from None
+    else:
+        with open(path) as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError as e:
+                raise PackError(f"{path}: {e}") from None
+    return compile_pack(data, path, mtime)
+
+
+def place_shape(shape, center_x, center_y):
+    """A compiled shape's (kind, color, args) with coordinates moved to a tile centre."""
+    kind, color, args = shape
+    placed = []
+    for arg_type, arg in zip(SHAPE_ARGS[kind], args):
+        if arg_type == "rect":
+            placed.append((arg[0] + center_x, arg[1] + center_y, arg[2], arg[3]))
+        elif arg_type == "point":
+            placed.append((arg[0] + center_x, arg[1] + center_y))
+        elif arg_type == "points":
+            placed.append([(x + center_x, y + center_y) for x, y in arg])
+        else:
+            placed.append(arg)
+    return kind, color, placed
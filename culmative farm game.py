@@ -1,13 +1,34 @@
-import pygame
 import time
+# Startup clock for the time-to-first-frame report
+STARTUP_START = time.perf_counter()
+
+import argparse
+import functools
+import json
+import os
+import tempfile
+import threading
+
+import pygame
 import math
 
-pygame.init()
+import farm_sim
+from farm_sim import (make_simulation, TickClock, GRID_SIZE, CROP_COSTS, CROP_NAMES, HARVEST_REWARD, STAGE_TIMES,
+                      READY)
+from crop_pack import DEFAULT_PACK, PackError, load_pack, place_shape
+from score_store import ScoreStore
+from frame_profiler import FrameProfiler
+from frame_pacer import FramePacer
+from glyph_atlas import GlyphAtlas, PillPool
+import save_game
+from input_log import PAN_KEYS, InputRecorder, InputReplay, state_digest
+from sfx import SoundEffects
+from leaderboard_client import LeaderboardClient
+from leaderboard_server import DEFAULT_HOST, DEFAULT_PORT
 
 # Constants
 WIDTH, HEIGHT = 800, 700
 TILE_SIZE = 64
-GRID_SIZE = 7
 FARM_Y_OFFSET = 120
 SHOP_HEIGHT = 80
 COLLAPSED_HEIGHT = 30
@@ -16,6 +37,49 @@ MUSIC_VOLUMES = [0.0, 0.25, 0.5, 0.75, 1.0]  # Keep 0.0 but skip it
 music_volume_index = 1
 SCORE_FILE = "scores.txt"
 
+# Command-line options
+arg_parser = argparse.ArgumentParser(description="Planting Game - Farm & Harvest")
+arg_parser.add_argument("--dirty-rects", action="store_true", help="present only changed screen regions")
+arg_parser.add_argument("--numpy", action="store_true", help="NumPy array farm backend (large farms)")
+arg_parser.add_argument("--farm-size", type=int, default=GRID_SIZE, help="farm is N x N tiles")
+arg_parser.add_argument("--camera", action="store_true", help="scrollable, zoomable farm view")
+arg_parser.add_argument("--leaderboard", nargs="?", const=f"{DEFAULT_HOST}:{DEFAULT_PORT}", metavar="HOST:PORT",
+                        help="use the shared leaderboard daemon (spools scores while it is down)")
+arg_parser.add_argument("--profile", action="store_true", help="start with the frame profiler on (F3 toggles)")
+arg_parser.add_argument("--profile-out", metavar="PATH", help="write profiler stats to PATH (.csv or .json) on exit")
+arg_parser.add_argument("--new-game", action="store_true", help="ignore the autosaved game and start fresh")
+arg_parser.add_argument("--record", metavar="PATH",
+                        help="record inputs to PATH (the game clock then advances a fixed step per frame)")
+arg_parser.add_argument("--replay", metavar="PATH", help="replay an input log as fast as possible, then exit")
+arg_parser.add_argument("--no-render", action="store_true", help="with --replay, skip drawing entirely")
+arg_parser.add_argument("--crops", metavar="PATH", default=DEFAULT_PACK,
+                        help="crop content pack (JSON or TOML); edits to it are picked up while playing")
+OPTIONS = arg_parser.parse_known_args()[0]
+if OPTIONS.crops != DEFAULT_PACK:
+    try:
+        farm_sim.install_crops(load_pack(OPTIONS.crops))
+    except (OSError, PackError) as e:
+        arg_parser.error(f"cannot load crop pack: {e}")
+
+# A replay brings its own farm size, view and starting state
+replay = InputReplay(OPTIONS.replay) if OPTIONS.replay else None
+if replay and OPTIONS.no_render:
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+
+# The mixer is started later, off the main thread (see start_audio)
+pygame.display.init()
+pygame.font.init()
+
+FARM_SIZE = replay.snapshot["grid_size"] if replay else OPTIONS.farm_size
+# Farms that don't fit under the shop get the scrollable camera view
+if replay:
+    CAMERA_MODE = replay.camera
+else:
+    CAMERA_MODE = OPTIONS.camera or FARM_SIZE * TILE_SIZE > HEIGHT - (MENU_HEIGHT + SHOP_HEIGHT + FARM_Y_OFFSET)
+ZOOM_TILE_SIZES = [16, 24, 32, 48, 64]
+CHUNK_TILES = 16
+CAMERA_PAN_SPEED = 12
+
 # Colors / palette
 SKY_COLOR = (130, 195, 255)
 GROUND_COLOR = (90, 175, 100)
@@ -31,11 +95,59 @@ INSTRUCTIONS_BG = (250, 245, 235)
 PAUSE_COLOR = (255, 215, 0)
 
 # Fonts
-timer_font_small = pygame.font.SysFont('arial', 12, bold=True)
-timer_font_day = pygame.font.SysFont('arial', 20, bold=True)
-font = pygame.font.SysFont('arial', 14)
-small_font = pygame.font.SysFont('arial', 12)
-big_font = pygame.font.SysFont('arial', 19)
+FONT_PATH_FILE = "font_paths.json"
+
+
+def resolve_font(name, bold):
+    """SysFont's lookup without making a font: (file or None for the default font, fake bold)."""
+    return pygame.font.SysFont(name, 1, bold, constructor=lambda path, size, fake_bold, fake_italic: (path, fake_bold))
+
+
+def load_font_paths(specs):
+    """Font file per (name, bold), cached in FONT_PATH_FILE between launches.
+
+    A SysFont lookup first scans every installed font (fc-list on Linux),
+    which is the slowest part of startup; the cached files skip it.
+    """
+    try:
+        with open(FONT_PATH_FILE) as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        cached = {}
+    paths = {}
+    stale = False
+    for name, bold in specs:
+        key = f"{name}:{'bold' if bold else 'regular'}"
+        entry = cached.get(key)
+        if entry is None or (entry[0] is not None and not os.path.exists(entry[0])):
+            entry = cached[key] = list(resolve_font(name, bold))
+            stale = True
+        paths[(name, bold)] = entry
+    if stale:
+        try:
+            with open(FONT_PATH_FILE, "w") as f:
+                json.dump(cached, f, indent=2)
+        except OSError:
+            pass
+    return paths
+
+
+FONT_PATHS = load_font_paths([("arial", False), ("arial", True)])
+
+
+def load_font(name, size, bold=False):
+    path, fake_bold = FONT_PATHS[(name, bold)]
+    loaded = pygame.font.Font(path, size)
+    if fake_bold:
+        loaded.set_bold(True)
+    return loaded
+
+
+timer_font_small = load_font('arial', 12, bold=True)
+timer_font_day = load_font('arial', 20, bold=True)
+font = load_font('arial', 14)
+small_font = load_font('arial', 12)
+big_font = load_font('arial', 19)
 
 #menu
 MENU_BUTTONS = {
@@ -47,61 +159,85 @@ MENU_BUTTONS = {
     "Rank": pygame.Rect(WIDTH - 100, 5, 90, 30),
 }
 
-# Plant growth shapes and colors
-PLANT_SHAPES = {
-    "corn": {"seed": (139, 69, 19), "sprout": (0, 150, 0), "ready": (255, 235, 59)},
-    "watermelon": {"seed": (80, 40, 20), "sprout": (6, 87, 15), "ready": (200, 0, 50)},
-    "pumpkin": {"seed": (100, 60, 20), "sprout": (20, 140, 0), "ready": (255, 140, 0)},
-    "tomato": {"seed": (120, 70, 30), "sprout": (0, 130, 20), "ready": (220, 20, 60)},
-    "grape": {"seed": (60, 30, 10), "sprout": (10, 120, 10), "ready": (128, 0, 128)},
-    "super": {"seed": (100, 100, 100), "sprout": (100, 200, 255), "ready": (255, 255, 0)}
-}
+# Crop shapes come from the crop pack; these draw them
+DRAW_FUNCTIONS = {"rect": pygame.draw.rect, "ellipse": pygame.draw.ellipse, "circle": pygame.draw.circle,
+                  "polygon": pygame.draw.polygon, "line": pygame.draw.line, "arc": pygame.draw.arc}
 
-# Shop costs (Super seed cost reduced to $20)
-SHOP_COSTS = {"corn": 5, "watermelon": 7, "pumpkin": 8, "tomato": 10, "grape": 12, "super": 20}
-
-# Growth times (seconds)
-GROWTH_TIMES = {
-    "corn": {"seed_to_sprout": 8, "sprout_to_ready": 8, "harvest": 6},
-    "watermelon": {"seed_to_sprout": 11, "sprout_to_ready": 11, "harvest": 12},
-    "pumpkin": {"seed_to_sprout": 14, "sprout_to_ready": 14, "harvest": 15},
-    "tomato": {"seed_to_sprout": 12, "sprout_to_ready": 12, "harvest": 18},
-    "grape": {"seed_to_sprout": 17, "sprout_to_ready": 17, "harvest": 20},
-    "super": {"seed_to_sprout": 20, "sprout_to_ready": 20, "harvest": 50}  
-}
+# The shop shows this many seed buttons at a time; bigger packs get page arrows
+SEEDS_PER_PAGE = 6
+
+
+def build_crop_tables():
+    # Per-crop UI tables, indexed by crop ID like the simulation's
+    global CROP_IDS_ORDERED, SEED_BUTTON_LABELS, SEED_PRICE_LABELS, REWARD_LABELS, SEED_LETTERS, SHOP_PAGES
+    CROP_IDS_ORDERED = range(1, len(CROP_NAMES))
+    SEED_BUTTON_LABELS = farm_sim.crop_tables.labels
+    SEED_PRICE_LABELS = [None] + [f"${CROP_COSTS[i]}" for i in CROP_IDS_ORDERED]
+    REWARD_LABELS = [None] + [f"${HARVEST_REWARD[i]}" for i in CROP_IDS_ORDERED]
+    SEED_LETTERS = farm_sim.crop_tables.letters
+    # Crop IDs on each shop page
+    SHOP_PAGES = [CROP_IDS_ORDERED[i:i + SEEDS_PER_PAGE] for i in range(0, len(CROP_IDS_ORDERED), SEEDS_PER_PAGE)]
 
-SEED_LETTERS = ["C", "W", "P", "T", "G", "S"]
+
+build_crop_tables()
+# Timer prefix by growth state: S = until sprout, R = until ready
+STAGE_LETTERS = [None, "S", "R", None]
 
 # Initialize display
 WIN = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("Planting Game - Farm & Harvest (ALL FIXES IMPLEMENTED)")
 clock = pygame.time.Clock()
 
-# Pre-render static text
-SHOP_TITLE = big_font.render("SHOP", True, BLACK)
-TOGGLE_TEXT = big_font.render("S", True, BLACK)
-HELP_TEXT = big_font.render("?", True, BLACK)
-HELP_BIG_TEXT = big_font.render("?", True, BLACK)
-PAUSE_TEXT = big_font.render("||", True, BLACK)
-PAUSE_ON_TEXT = big_font.render("▶", True, BLACK)
-CLOSE_TEXT = font.render("X", True, WHITE)
-REPLAY_TEXT = big_font.render("REPLAY", True, WHITE)
-QUIT_TEXT = big_font.render("QUIT", True, WHITE)
-GAME_OVER_TITLE = big_font.render("GAME OVER", True, WHITE)
-YOU_WIN_TITLE = big_font.render("YOU WIN!", True, (0, 255, 0))
-INSTRUCTIONS_TITLE = big_font.render("GAME INSTRUCTIONS", True, BLACK)
-
-# Game state - Consistent 15 starting coins
-coins = 500
-corn_seeds = watermelon_seeds = pumpkin_seeds = tomato_seeds = grape_seeds = super_seeds = 0
-crops = [[None for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
-plant_time = [[0 for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
+@functools.lru_cache(maxsize=None)
+def static_text(text, text_font, color):
+    """Fixed labels, rendered the first time they are drawn."""
+    return text_font.render(text, True, color)
+
+
+@functools.lru_cache(maxsize=None)
+def glyph_atlas(text_font, color):
+    """Digits and timer characters for one font and colour, rasterised once."""
+    return GlyphAtlas(text_font, color)
+
+
+# Scores go to the leaderboard daemon if asked, else straight to SCORE_FILE;
+# replays never touch the real scoreboard
+if replay:
+    score_store = ScoreStore(os.path.join(tempfile.mkdtemp(prefix="farm-replay-"), SCORE_FILE))
+elif OPTIONS.leaderboard:
+    score_store = LeaderboardClient.from_address(OPTIONS.leaderboard, score_path=SCORE_FILE)
+else:
+    score_store = ScoreStore(SCORE_FILE)
+
+# Game state (coins, seeds, crops, days) lives in the simulation. Recording
+# and replaying run it on a game clock that moves FRAME_STEP per frame.
+FRAME_STEP = 1 / 60
+if replay:
+    game_clock = TickClock(replay.start, replay.step)
+elif OPTIONS.record:
+    game_clock = TickClock(time.time(), FRAME_STEP)
+else:
+    game_clock = None
+sim = make_simulation("numpy" if OPTIONS.numpy else "lists", clock=game_clock or time.time, grid_size=FARM_SIZE)
+frame = 0
+recorder = None
+
+# Autosave: a snapshot every AUTOSAVE_INTERVAL seconds and at each day's end,
+# written on the autosaver's thread (started in __main__)
+AUTOSAVE_INTERVAL = 5.0
+autosaver = None
+last_autosave = 0.0
+
+# Hot reload: the crop pack file is checked for changes every CROP_PACK_CHECK_INTERVAL
+# seconds. Not while recording or replaying, since a log does not capture pack edits.
+CROP_PACK_CHECK_INTERVAL = 1.0
+last_crop_pack_check = 0.0
+crop_pack_mtime = farm_sim.crop_tables.mtime
 
 # UI state
 shop_collapsed = False
+shop_page = 0
 show_instructions = False
-game_won = False
-game_over = False
 show_game_over = False
 is_paused = False
 music_volume_index = 2  # corresponds to 0.5 in MUSIC_VOLUMES
@@ -109,67 +245,95 @@ is_music_on = True
 entering_name = False
 player_name = ""
 score_saved = False
-scoreboard = []  # list of (name, score)
+scoreboard = []  # top-5 list of (name, score)
 player_rank = None
 show_scoreboard = False
+# Tiles already clicked in the current click-drag stroke (None when not painting)
+paint_stroke = None
+paint_from = None
 
-# Day system - 8 days (0-7)
-DAY_DURATION = 2
-day_start_time = time.time()
-current_day = 0
-daily_start_coins = 15
-daily_quotas = [20, 30, 50, 80, 120, 170, 230]
 
-# Cached surfaces
-coins_surface = day_surface = quota_surface = seeds_surface = None
-seed_count_surfaces = [None] * 6
-day_timer_surface = None
 
-#load background music
-pygame.mixer.init()
-pygame.mixer.music.load("background.mp3")  # your file name
-pygame.mixer.music.play(-1)  # -1 = loop forever
-pygame.mixer.music.set_volume(MUSIC_VOLUMES[music_volume_index])
+class HudText:
+    """Cached HUD text surfaces, re-rendered only when their text changes.
 
+    `renders` counts font.render calls since the last end_frame();
+    `last_frame_renders` holds the count for the previous frame.
+    """
 
-def load_scores():
-    scores = []
-    try:
-        with open(SCORE_FILE, "r") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                parts = line.split(",")
-                if len(parts) != 2:
-                    continue
-                name, score_str = parts
-                try:
-                    score = int(score_str)
-                except ValueError:
-                    continue
-                scores.append((name, score))
-    except FileNotFoundError:
-        pass
-    return scores
+    def __init__(self):
+        self.surfaces = {}
+        self.values = {}
+        self.renders = 0
+        self.last_frame_renders = 0
+        self.total_renders = 0
+
+    def text(self, key, value, text_font, color, fmt=None):
+        # With `fmt`, `value` is raw data and is only formatted when it changes
+        if self.values.get(key) != (value, color):
+            self.values[key] = (value, color)
+            self.surfaces[key] = text_font.render(fmt.format(value) if fmt else value, True, color)
+            self.renders += 1
+            self.total_renders += 1
+        return self.surfaces[key]
+
+    def end_frame(self):
+        self.last_frame_renders = self.renders
+        self.renders = 0
+
+
+# Cached surfaces
+hud = HudText()
+
+#load background music and sound effects on a thread so they never delay the first frame
+# Small mixer buffer (~12 ms at 44.1 kHz) keeps sound effects close to the click
+MIXER_BUFFER = 512
+audio_lock = threading.Lock()
+audio_ready = False
+sfx = SoundEffects()
+
+
+def start_audio():
+    def load():
+        global audio_ready
+        try:
+            pygame.mixer.init(44100, -16, 2, MIXER_BUFFER)
+        except pygame.error as e:
+            print(f"Audio unavailable: {e}")
+            return
+        sfx.buffer_seconds = MIXER_BUFFER / pygame.mixer.get_init()[0]
+        sfx.load()
+        try:
+            pygame.mixer.music.load("background.mp3")  # your file name
+        except pygame.error as e:
+            print(f"Music unavailable: {e}")
+        else:
+            with audio_lock:
+                pygame.mixer.music.play(-1)  # -1 = loop forever
+                audio_ready = True
+        apply_music_settings()
+
+    threading.Thread(target=load, name="audio-loader", daemon=True).start()
+
+
+def apply_music_settings():
+    # Music off mutes the sound effects too; Vol sets both
+    sfx.set_volume(MUSIC_VOLUMES[music_volume_index], muted=not is_music_on)
+    # Until the music has loaded, the loader applies these itself
+    with audio_lock:
+        if not audio_ready:
+            return
+        pygame.mixer.music.set_volume(MUSIC_VOLUMES[music_volume_index])
+        if is_music_on:
+            pygame.mixer.music.unpause()
+        else:
+            pygame.mixer.music.pause()
 
 
 def save_score_and_rank(name, score):
-    scores = load_scores()
-    scores.append((name, score))
-    # Sort descending by score
-    scores.sort(key=lambda s: s[1], reverse=True)
-    # Write back to file
-    with open(SCORE_FILE, "w") as f:
-        for n, sc in scores:
-            f.write(f"{n},{sc}\n")
-    # Find this player's rank
-    rank = None
-    for i, (n, sc) in enumerate(scores):
-        if n == name and sc == score:
-            rank = i + 1
-            break
-    return scores, rank
+    # Index update is immediate; the file append happens on the writer thread
+    rank = score_store.add(name, score)
+    return score_store.top(5), rank
 
 
 def prepare_win_score_prompt():
@@ -181,20 +345,10 @@ def prepare_win_score_prompt():
     """
     global entering_name, player_name, score_saved, scoreboard, player_rank
 
-    existing_scores = load_scores()
-
     # Compute potential rank if this score were added
-    marker_name = "__CURRENT__"
-    temp = existing_scores + [(marker_name, coins)]
-    temp.sort(key=lambda s: s[1], reverse=True)
-
-    potential_rank = None
-    for i, (n, sc) in enumerate(temp):
-        if n == marker_name and sc == coins:
-            potential_rank = i + 1
-            break
+    potential_rank = score_store.rank_for(sim.coins)
 
-    scoreboard = existing_scores  # show existing scores
+    scoreboard = score_store.top(5)  # show existing scores
     player_name = ""
     score_saved = False
     player_rank = potential_rank
@@ -206,8 +360,8 @@ def prepare_win_score_prompt():
         entering_name = False
 
 
-def get_shop_buttons():
-    if shop_collapsed:
+def build_shop_buttons(collapsed):
+    if collapsed:
         return {
             'toggle': pygame.Rect(10, 5 + MENU_HEIGHT, 20, 20),
             'coins': pygame.Rect(35, 2 + MENU_HEIGHT, 50, 26),
@@ -217,13 +371,18 @@ def get_shop_buttons():
             'seeds': pygame.Rect(255, 2 + MENU_HEIGHT, 45, 26)
         }
 
+    # Seed buttons are keyed by slot on the current page; with more than one
+    # page they narrow a little to make room for the page arrows
+    buttons = {}
+    paged = len(SHOP_PAGES) > 1
+    step, width = (70, 67) if paged else (75, 70)
+    for slot in range(SEEDS_PER_PAGE):
+        buttons[("seed", slot)] = pygame.Rect(10 + slot * step, 15 + MENU_HEIGHT, width, 50)
+    if paged:
+        buttons['page_up'] = pygame.Rect(432, 15 + MENU_HEIGHT, 22, 24)
+        buttons['page_down'] = pygame.Rect(432, 41 + MENU_HEIGHT, 22, 24)
     return {
-        'corn 5$': pygame.Rect(10, 15 + MENU_HEIGHT, 70, 50),
-        'watermelon 7$': pygame.Rect(85, 15 + MENU_HEIGHT, 70, 50),
-        'pumpkin 8$': pygame.Rect(160, 15 + MENU_HEIGHT, 70, 50),
-        'tomato 10$': pygame.Rect(235, 15 + MENU_HEIGHT, 70, 50),
-        'grape 12$': pygame.Rect(310, 15 + MENU_HEIGHT, 70, 50),
-        'super 20$': pygame.Rect(385, 15 + MENU_HEIGHT, 70, 50),
+        **buttons,
         'coins': pygame.Rect(460, 15 + MENU_HEIGHT, 70, 25),
         'day': pygame.Rect(535, 15 + MENU_HEIGHT, 45, 25),
         'quota': pygame.Rect(585, 15 + MENU_HEIGHT, 45, 25),
@@ -232,193 +391,300 @@ def get_shop_buttons():
     }
 
 
+# Both shop layouts only change with the crop pack, so they are built once per pack
+SHOP_BUTTONS = {collapsed: build_shop_buttons(collapsed) for collapsed in (False, True)}
+
+
+def get_shop_buttons():
+    return SHOP_BUTTONS[shop_collapsed]
+
+
+def page_crops():
+    """Crop IDs on the shop page being shown."""
+    return SHOP_PAGES[shop_page]
+
+
+def install_crop_pack(tables):
+    """Make a compiled crop pack live: registry, farm, sprites, labels and shop layout."""
+    global SHOP_BUTTONS, CROP_ATLAS, shop_page
+    sim.remap_crops(farm_sim.install_crops(tables))
+    build_crop_tables()
+    SHOP_BUTTONS = {collapsed: build_shop_buttons(collapsed) for collapsed in (False, True)}
+    shop_page = min(shop_page, len(SHOP_PAGES) - 1)
+    CROP_ATLAS = build_crop_atlas()
+    scaled_atlases.clear()
+    if dirty_renderer:
+        dirty_renderer.invalidate()
+
+
+def check_crop_pack():
+    """Reload the crop pack when its file changes; a broken edit keeps the current crops."""
+    global last_crop_pack_check, crop_pack_mtime
+    now = time.time()
+    if game_clock is not None or now - last_crop_pack_check < CROP_PACK_CHECK_INTERVAL:
+        return
+    last_crop_pack_check = now
+    path = farm_sim.crop_tables.path
+    try:
+        mtime = os.stat(path).st_mtime_ns
+        if mtime == crop_pack_mtime:
+            return
+        crop_pack_mtime = mtime
+        tables = load_pack(path)
+    except (OSError, PackError) as e:
+        print(f"Crop pack not reloaded: {e}")
+        return
+    install_crop_pack(tables)
+    print(f"Reloaded crop pack {path}: {len(tables)} crops")
+
+
 def check_daily_quota():
-    global daily_start_coins, current_day, game_over, game_won, show_game_over
-    time_elapsed = time.time() - day_start_time
-    days_passed = int(time_elapsed // DAY_DURATION)
-    max_day_index = len(daily_quotas) - 1
-
-    # Only act when we've advanced past the current_day boundary
-    if days_passed > current_day:
-        print(f"Day {current_day} ended. Checking quota...")
-        if current_day <= max_day_index:
-            required = daily_quotas[current_day]
-            # Check TOTAL coins vs quota (not earned)
-            if coins >= required:
-                print(f"✓ Day {current_day} PASSED! (Coins: {coins} >= {required})")
-                if current_day == max_day_index:
-                    # Last day passed -> WIN
-                    game_won = True
-                    show_game_over = True
-                    # Prepare win popup + potential ranking info
-                    prepare_win_score_prompt()
-                else:
-                    # Move to next day
-                    current_day += 1
-                    daily_start_coins = coins
-            else:
-                # Failed quota
-                game_over = True
+    global show_game_over, scoreboard, entering_name, player_name, score_saved, player_rank
+    day = sim.current_day
+    outcome = sim.check_daily_quota()
+    if outcome is None:
+        return False
+
+    print(f"Day {day} ended. Checking quota...")
+    if day < len(sim.daily_quotas):
+        required = sim.daily_quotas[day]
+        if outcome == "failed":
+            show_game_over = True
+            sfx.play("game_over")
+            end_saved_game()
+            print(f"✗ Day {day} FAILED! (Coins: {sim.coins} < {required})")
+            # On failure, just load existing scores; no name entry
+            scoreboard = score_store.top(5)
+            entering_name = False
+            player_name = ""
+            score_saved = False
+            player_rank = None
+        else:
+            print(f"✓ Day {day} PASSED! (Coins: {sim.coins} >= {required})")
+            sfx.play("win" if outcome == "won" else "day")
+            if outcome == "won":
+                # Last day passed -> WIN
                 show_game_over = True
-                print(f"✗ Day {current_day} FAILED! (Coins: {coins} < {required})")
-                # On failure, just load existing scores; no name entry
-                from_scores = load_scores()
-                globals()["scoreboard"] = from_scores
-                globals()["entering_name"] = False
-                globals()["player_name"] = ""
-                globals()["score_saved"] = False
-                globals()["player_rank"] = None
-        return True
-    return False
+                end_saved_game()
+                # Prepare win popup + potential ranking info
+                prepare_win_score_prompt()
+            else:
+                autosave(force=True)
+    return True
+
+
+def resume_saved_game():
+    """Restore the autosaved game, if there is one for this farm size."""
+    state = save_game.load()
+    if state is None or state["game_over"] or state["game_won"] or state["grid_size"] != sim.grid_size:
+        return False
+    try:
+        save_game.restore(sim, state)
+    except save_game.SaveError:
+        return False
+    print(f"Resumed saved game: day {sim.current_day + 1}, {sim.coins} coins")
+    return True
+
+
+def autosave(force=False):
+    global last_autosave
+    now = time.time()
+    if autosaver is None or (not force and now - last_autosave < AUTOSAVE_INTERVAL):
+        return
+    last_autosave = now
+    autosaver.submit(save_game.encode(sim))
+
+
+def end_saved_game():
+    # A finished run is not resumed; the next launch starts a new game
+    if autosaver is not None:
+        autosaver.discard()
+
+
+def next_logic_time():
+    """Game time of the next growth transition or day end; None while logic is stopped."""
+    if is_paused or show_game_over or show_instructions:
+        return None
+    day_end = sim.day_start_time + (sim.current_day + 1) * sim.day_duration
+    growth = sim.next_transition_time()
+    return day_end if growth is None else min(day_end, growth)
+
+
+def start_recording(path):
+    """Record from the current state; the game continues from the logged snapshot."""
+    snapshot = save_game.encode(sim)
+    # Restore from the same bytes a replay will start from, so both runs match bit for bit
+    save_game.restore(sim, save_game.decode(snapshot))
+    return InputRecorder(path, snapshot, game_clock(), FRAME_STEP, camera is not None)
+
+
+def frame_events():
+    if replay:
+        # The window can still be closed during a rendered replay
+        return [e for e in pygame.event.get(pygame.QUIT)] + replay.events_for(frame)
+    events = pacer.poll()
+    if recorder:
+        recorder.record(frame, events, pygame.mouse.get_pos())
+    return events
+
+
+def next_screen_change():
+    """Seconds until the screen changes without input: a day or crop timer ticking
+    over, a growth stage or the day's end. None while paused or behind a modal."""
+    due = next_logic_time()
+    if due is None:
+        return None
+    now = sim.clock()
+    # Timers show whole seconds; wake just after the next one ticks over
+    left = sim.day_time_left(now)
+    due = min(due, now + left - int(left))
+    if CAMERA_MODE:
+        # Tile timers are only drawn at full zoom, on the visible tiles
+        bounds = camera.visible_tiles() if camera.tile_size == TILE_SIZE else None
+    else:
+        bounds = (0, FARM_SIZE, 0, FARM_SIZE)
+    if bounds:
+        for row, col, (crop_id, state) in sim.crops_in(*bounds):
+            if state != READY:
+                remaining = STAGE_TIMES[state][crop_id] - (now - sim.plant_time[row][col])
+                if remaining > 0:
+                    due = min(due, now + remaining - int(remaining))
+    return max(0.0, due - now) + TIMER_SLACK
+
+
+def pressed_keys():
+    return replay.pressed() if replay else pygame.key.get_pressed()
+
+
+def pointer_pos():
+    return replay.mouse_pos if replay else pygame.mouse.get_pos()
+
+
+def day_timer_label():
+    if is_paused:
+        return "PAUSED"
+    minutes, seconds = divmod(int(sim.day_time_left()), 60)
+    return f"{minutes:02d}:{seconds:02d}"
 
 
 def update_cached_text():
-    global coins_surface, day_surface, quota_surface, seeds_surface, seed_count_surfaces, day_timer_surface
+    # Cheap to call every frame: only values that changed get re-rendered
+    hud.text("coins", sim.coins, font, BLACK, "Coins:{}")
+    hud.text("day", sim.current_day + 1, font, BLACK, "Day:{}")
     
-    coins_surface = font.render(f"Coins:{coins}", True, BLACK)
-    day_surface = font.render(f"Day:{current_day + 1}", True, BLACK)
-    
-    if current_day < len(daily_quotas):
-        quota_surface = font.render(f"Q:{daily_quotas[current_day]}", True, BLACK)
+    if sim.current_day < len(sim.daily_quotas):
+        hud.text("quota", sim.daily_quotas[sim.current_day], font, BLACK, "Q:{}")
     else:
-        quota_surface = font.render("WIN!", True, (0, 255, 0))
+        hud.text("quota", "WIN!", font, (0, 255, 0))
     
-    total_seeds = corn_seeds + watermelon_seeds + pumpkin_seeds + tomato_seeds + grape_seeds + super_seeds
-    seeds_surface = font.render(f"Seeds:{total_seeds}", True, BLACK)
+    hud.text("seeds", sim.total_seeds(), font, BLACK, "Seeds:{}")
     
-    seed_counts = [corn_seeds, watermelon_seeds, pumpkin_seeds, tomato_seeds, grape_seeds, super_seeds]
-    for i, count in enumerate(seed_counts):
-        seed_count_surfaces[i] = font.render(str(count), True, RED)
+    for slot, crop_id in enumerate(page_crops()):
+        hud.text(("seed_count", slot), sim.seeds[crop_id], font, RED, "{}")
     
     # Pause-safe timer
-    if is_paused:
-        day_timer_surface = timer_font_day.render("PAUSED", True, (255, 100, 100))
-    else:
-        time_left = max(0, DAY_DURATION - ((time.time() - day_start_time) % DAY_DURATION))
-        minutes, seconds = divmod(int(time_left), 60)
-        day_timer_surface = timer_font_day.render(f"{minutes:02d}:{seconds:02d}", True, WHITE)
-
+    label = day_timer_label()
+    hud.text("timer", label, timer_font_day, (255, 100, 100) if label == "PAUSED" else WHITE)
 
 
-def draw_growth_stage(tile_x, tile_y, crop_type, state):
+def draw_growth_stage(tile_x, tile_y, crop_id, state, surface=None):
+    # Only used to bake the crop atlas; the farm blits the baked sprites
+    surface = surface or WIN
     center_x, center_y = tile_x + TILE_SIZE // 2, tile_y + TILE_SIZE // 2
-    colors = PLANT_SHAPES[crop_type]
-    
-    if state == "seed":
-        if crop_type == "corn":
-            pygame.draw.rect(WIN, colors["seed"], (center_x-14, center_y-6, 28, 12))
-            pygame.draw.rect(WIN, BLACK, (center_x-14, center_y-6, 28, 12), 2)
-        elif crop_type == "watermelon":
-            pygame.draw.ellipse(WIN, colors["seed"], (center_x-16, center_y-6, 32, 12))
-            pygame.draw.ellipse(WIN, BLACK, (center_x-16, center_y-6, 32, 12), 2)
-        elif crop_type == "pumpkin":
-            pts = [(center_x, center_y-10), (center_x-12, center_y+10), (center_x+12, center_y+10), (center_x, center_y-5)]
-            pygame.draw.polygon(WIN, colors["seed"], pts)
-            pygame.draw.polygon(WIN, BLACK, pts, 2)
-        elif crop_type == "tomato":
-            pygame.draw.circle(WIN, colors["seed"], (center_x, center_y), 8)
-            pygame.draw.circle(WIN, colors["seed"], (center_x-12, center_y+4), 6)
-            pygame.draw.circle(WIN, BLACK, (center_x, center_y), 8, 2)
-        elif crop_type == "grape":
-            pygame.draw.circle(WIN, colors["seed"], (center_x, center_y), 6)
-            pygame.draw.circle(WIN, colors["seed"], (center_x+10, center_y-4), 5)
-            pygame.draw.circle(WIN, BLACK, (center_x, center_y), 6, 2)
-        else:  # super
-            pts = [(center_x, center_y-12), (center_x-12, center_y), (center_x, center_y+12), (center_x+12, center_y)]
-            pygame.draw.polygon(WIN, colors["seed"], pts)
-            pygame.draw.polygon(WIN, BLACK, pts, 2)
-    
-    elif state == "sprout":
-        if crop_type == "corn":
-            pygame.draw.rect(WIN, colors["sprout"], (center_x-3, center_y, 6, 25))
-            pygame.draw.ellipse(WIN, colors["sprout"], (center_x-12, center_y-8, 18, 10))
-        elif crop_type == "watermelon":
-            pygame.draw.circle(WIN, colors["sprout"], (center_x, center_y+15), 10)
-            pygame.draw.line(WIN, colors["sprout"], (center_x, center_y+5), (center_x+15, center_y-10), 6)
-        elif crop_type == "pumpkin":
-            pygame.draw.rect(WIN, colors["sprout"], (center_x-6, center_y+2, 12, 22))
-            pygame.draw.circle(WIN, (255, 200, 0), (center_x, center_y-12), 5)
-        elif crop_type == "tomato":
-            pygame.draw.line(WIN, colors["sprout"], (center_x, center_y+12), (center_x, center_y-15), 5)
-            pygame.draw.ellipse(WIN, colors["sprout"], (center_x-15, center_y-5, 16, 12))
-            pygame.draw.ellipse(WIN, colors["sprout"], (center_x+2, center_y-3, 16, 12))
-        elif crop_type == "grape":
-            pygame.draw.line(WIN, colors["sprout"], (center_x-8, center_y+10), (center_x+12, center_y-12), 4)
-            pygame.draw.line(WIN, colors["sprout"], (center_x+2, center_y+8), (center_x-10, center_y-8), 4)
-        else:
-            pygame.draw.circle(WIN, colors["sprout"], (center_x, center_y+10), 8)
-            pygame.draw.line(WIN, colors["sprout"], (center_x-12, center_y-10), (center_x+12, center_y+10), 6)
-    
-    elif state == "ready":
-        if crop_type == "corn":
-            pygame.draw.ellipse(WIN, colors["ready"], (center_x-18, center_y-15, 36, 30))
-            pygame.draw.line(WIN, (139, 69, 19), (center_x-15, center_y-20), (center_x+15, center_y+5), 3)
-        elif crop_type == "watermelon":
-            pygame.draw.ellipse(WIN, colors["ready"], (center_x-20, center_y-10, 40, 20))
-            pygame.draw.arc(WIN, BLACK, (center_x-20, center_y-10, 40, 20), 0, 3.14, 3)
-        elif crop_type == "pumpkin":
-            pygame.draw.circle(WIN, colors["ready"], (center_x, center_y), 22)
-            pygame.draw.line(WIN, (100, 60, 20), (center_x, center_y-22), (center_x+8, center_y-18), 4)
-        elif crop_type == "tomato":
-            pygame.draw.circle(WIN, colors["ready"], (center_x, center_y+2), 20)
-            pygame.draw.polygon(WIN, (0, 150, 0), [(center_x-8, center_y-18), (center_x+8, center_y-18), (center_x, center_y-28)])
-        elif crop_type == "grape":
-            pygame.draw.circle(WIN, colors["ready"], (center_x, center_y), 18)
-            pygame.draw.circle(WIN, colors["ready"], (center_x+12, center_y-6), 12)
-            pygame.draw.circle(WIN, colors["ready"], (center_x-12, center_y+6), 12)
-        else:
-            pts = [
-                (center_x, center_y-25), (center_x+8, center_y-8),
-                (center_x+25, center_y), (center_x+8, center_y+8),
-                (center_x, center_y+25), (center_x-8, center_y+8),
-                (center_x-25, center_y), (center_x-8, center_y-8)
-            ]
-            pygame.draw.polygon(WIN, colors["ready"], pts)
-            pygame.draw.polygon(WIN, WHITE, pts, 3)
-
-def draw_crop_timer(tile_x, tile_y, plant_time_val, crop_type, row, col):
+    for shape in farm_sim.crop_tables.shapes[crop_id][state]:
+        kind, color, args = place_shape(shape, center_x, center_y)
+        DRAW_FUNCTIONS[kind](surface, color, *args)
+
+
+def build_crop_atlas():
+    # Bake every crop/state shape once into a transparent tile sprite: atlas[crop ID][state]
+    atlas = [None]
+    for crop_id in CROP_IDS_ORDERED:
+        sprites = [None]
+        for state in range(1, READY + 1):
+            sprite = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
+            draw_growth_stage(0, 0, crop_id, state, sprite)
+            sprites.append(sprite.convert_alpha())
+        atlas.append(sprites)
+    return atlas
+
+
+def crop_timer_label(crop_id, state, plant_time_val):
+    # Text shown over a planted tile: "$reward" when ready, "S:5s"/"R:3s" while growing
+    global timer_labels_until
     # Don't show timers when paused
     if is_paused:
+        return None
+    if state == READY:
+        return REWARD_LABELS[crop_id]
+    now = sim.clock()
+    time_remaining = STAGE_TIMES[state][crop_id] - (now - plant_time_val)
+    if time_remaining > 0:
+        # The label changes next when its whole seconds tick down
+        timer_labels_until = min(timer_labels_until, now + time_remaining % 1)
+        return f"{STAGE_LETTERS[state]}:{int(time_remaining)}s"
+    return None
+
+
+def draw_crop_timer(tile_x, tile_y, plant_time_val, crop_id, state, blits):
+    # Queue the tile's label onto `blits`, so a whole field of timers is one WIN.blits call
+    label = crop_timer_label(crop_id, state, plant_time_val)
+    if label is None:
         return
     
-    current_time = time.time()
-    time_elapsed = current_time - plant_time_val
-    growth_data = GROWTH_TIMES[crop_type]
-    state = crops[row][col]["state"]
-    
-    if state == "ready":
-        reward = growth_data["harvest"]
-        text = timer_font_small.render(f"${reward}", True, (0, 255, 0))
-        WIN.blit(text, (tile_x + TILE_SIZE//2 - text.get_width()//2, tile_y + 5))
-        return
-    
-    if state == "seed":
-        time_remaining = growth_data["seed_to_sprout"] - time_elapsed
-        stage = "S"
-    elif state == "sprout":
-        time_remaining = growth_data["sprout_to_ready"] - time_elapsed
-        stage = "R"
-    else:
+    if state == READY:
+        # One fixed reward label per crop, rendered once
+        text = static_text(label, timer_font_small, (0, 255, 0))
+        blits.append((text, (tile_x + TILE_SIZE//2 - text.get_width()//2, tile_y + 5)))
         return
     
-    if time_remaining > 0:
-        seconds = max(0, int(time_remaining))
-        text = timer_font_small.render(f"{stage}:{seconds}s", True, WHITE)
-        bg = pygame.Surface((text.get_width() + 6, text.get_height() + 4))
-        bg.set_alpha(220)
-        bg.fill((50, 50, 50))
-        text_x = tile_x + TILE_SIZE//2 - text.get_width()//2
-        WIN.blit(bg, (text_x - 1, tile_y + 4))
-        WIN.blit(text, (text_x, tile_y + 5))
+    atlas = glyph_atlas(timer_font_small, WHITE)
+    width = atlas.width(label)
+    text_x = tile_x + TILE_SIZE//2 - width//2
+    blits.append((timer_pills.get(width + 6), (text_x - 1, tile_y + 4)))
+    atlas.layout(label, text_x, tile_y + 5, blits)
 
 
-def draw_background():
+def build_scene_layer(farm_pos):
+    # Everything that never changes for a given farm position, composited once
+    layer = pygame.Surface((WIDTH, HEIGHT)).convert()
     # Sky
-    WIN.fill(SKY_COLOR)
+    layer.fill(SKY_COLOR)
     # Ground / horizon
-    pygame.draw.rect(WIN, GROUND_COLOR, (0, HEIGHT // 2 + 40, WIDTH, HEIGHT // 2 - 40))
+    pygame.draw.rect(layer, GROUND_COLOR, (0, HEIGHT // 2 + 40, WIDTH, HEIGHT // 2 - 40))
     # Sun in top-right
-    pygame.draw.circle(WIN, SUN_COLOR, (WIDTH - 80, 80), 40)
+    pygame.draw.circle(layer, SUN_COLOR, (WIDTH - 80, 80), 40)
+    if farm_pos is None:
+        # Camera mode draws the beds chunk by chunk
+        return layer
+    # Farm tile beds
+    farm_x, farm_y = farm_pos
+    for row in range(FARM_SIZE):
+        for col in range(FARM_SIZE):
+            x, y = farm_x + col * TILE_SIZE, farm_y + row * TILE_SIZE
+            # Grass base
+            pygame.draw.rect(layer, GRASS_GREEN, (x, y, TILE_SIZE, TILE_SIZE))
+            # Soil patch for visual depth
+            pygame.draw.rect(layer, (166, 124, 82), (x + 8, y + 8, TILE_SIZE - 16, TILE_SIZE - 16))
+            pygame.draw.rect(layer, BROWN, (x, y, TILE_SIZE, TILE_SIZE), 3)
+    return layer
+
+
+# One layer per farm position (the grid moves when the shop collapses)
+scene_layers = {}
+
+
+def get_scene_layer():
+    farm_pos = None if CAMERA_MODE else get_farm_position()
+    layer = scene_layers.get(farm_pos)
+    if layer is None:
+        layer = scene_layers[farm_pos] = build_scene_layer(farm_pos)
+    return layer
+
+
+def draw_background():
+    # Sky, ground, sun and the empty farm beds in one blit
+    WIN.blit(get_scene_layer(), (0, 0))
     
 def draw_menu_bar():
     # background bar
@@ -449,7 +715,7 @@ def draw_menu_bar():
             # Shows ONLY 25%, 50%, 75%, 100% (no 0%)
             volume_percent = int(MUSIC_VOLUMES[music_volume_index] * 100)
             display = f"Vol {volume_percent}%"
-            text_surf = font.render(display, True, BLACK)
+            text_surf = hud.text("menu_vol", display, font, BLACK)
             WIN.blit(text_surf, text_surf.get_rect(center=rect.center))
         elif label == "Pause":
             # Custom icons: || when running, triangle ▶ when paused
@@ -475,7 +741,7 @@ def draw_menu_bar():
                 pygame.draw.polygon(WIN, BLACK, points)
         else:
             display = label
-            text_surf = font.render(display, True, BLACK)
+            text_surf = hud.text(("menu", label), display, font, BLACK)
             WIN.blit(text_surf, text_surf.get_rect(center=rect.center))
 
 
@@ -492,28 +758,22 @@ def draw_shop():
         btn = buttons['toggle']
         pygame.draw.rect(WIN, SHOP_HOVER if btn.collidepoint(mouse_pos) else SHOP_BG, btn)
         pygame.draw.rect(WIN, BROWN, btn, 2)
-        WIN.blit(TOGGLE_TEXT, TOGGLE_TEXT.get_rect(center=btn.center))
+        toggle_text = static_text("S", big_font, BLACK)
+        WIN.blit(toggle_text, toggle_text.get_rect(center=btn.center))
         
         for name in ['coins', 'day', 'quota', 'timer', 'seeds']:
             btn = buttons[name]
             color = SHOP_HOVER if btn.collidepoint(mouse_pos) else SHOP_BG
             pygame.draw.rect(WIN, color, btn)
             pygame.draw.rect(WIN, BROWN, btn, 2)
-            text = {
-                'coins': coins_surface,
-                'day': day_surface,
-                'quota': quota_surface,
-                'timer': day_timer_surface,
-                'seeds': seeds_surface
-            }[name]
+            text = hud.surfaces[name]
             WIN.blit(text, text.get_rect(center=btn.center))
         
-        # Seed letters with counts
-        for i, letter in enumerate(SEED_LETTERS):
-            x = 355 + i * 22
-            WIN.blit(font.render(letter, True, BLACK), (x + 2, 3 + MENU_HEIGHT))
-            if seed_count_surfaces[i]:
-                WIN.blit(seed_count_surfaces[i], (x + 2, 18 + MENU_HEIGHT))
+        # Seed letters with counts for the current shop page
+        for slot, crop_id in enumerate(page_crops()):
+            x = 355 + slot * 22
+            WIN.blit(hud.text(("letter", slot), SEED_LETTERS[crop_id], font, BLACK), (x + 2, 3 + MENU_HEIGHT))
+            WIN.blit(hud.surfaces[("seed_count", slot)], (x + 2, 18 + MENU_HEIGHT))
     
     else:
         # Stats buttons (coins, day, quota, timer, seeds)
@@ -522,37 +782,29 @@ def draw_shop():
             color = SHOP_HOVER if btn.collidepoint(mouse_pos) else SHOP_BG
             pygame.draw.rect(WIN, color, btn)
             pygame.draw.rect(WIN, BROWN, btn, 2)
-            text = {
-                'coins': coins_surface,
-                'day': day_surface,
-                'quota': quota_surface,
-                'timer': day_timer_surface,
-                'seeds': seeds_surface
-            }[name]
+            text = hud.surfaces[name]
             WIN.blit(text, text.get_rect(center=btn.center))
         
+        # Page arrows when the pack has more crops than one row of buttons
+        for name, label in (('page_up', "<"), ('page_down', ">")):
+            btn = buttons.get(name)
+            if btn:
+                pygame.draw.rect(WIN, SHOP_HOVER if btn.collidepoint(mouse_pos) else SHOP_BG, btn)
+                pygame.draw.rect(WIN, BROWN, btn, 2)
+                arrow = static_text(label, small_font, BLACK)
+                WIN.blit(arrow, arrow.get_rect(center=btn.center))
+
         # Seed buttons: clearer layout for name, price, and count
-        seeds = [
-            ("corn", 5), ("watermelon", 7), ("pumpkin", 8), 
-            ("tomato", 10), ("grape", 12), ("super", 20)
-        ]
-        
-        for i, (seed_type, cost) in enumerate(seeds):
-            btn = buttons[f"{seed_type} {cost}$"]
+        for slot, crop_id in enumerate(page_crops()):
+            btn = buttons[("seed", slot)]
             color = SHOP_HOVER if btn.collidepoint(mouse_pos) else SHOP_BG
             pygame.draw.rect(WIN, color, btn)
             pygame.draw.rect(WIN, BROWN, btn, 4)  # THICK 4px BORDER
             
             # Use slightly smaller font so text isn't squeezed
-            if seed_type == "watermelon":
-                name_label = "Watermelon"
-            else:
-                name_label = seed_type.capitalize()
-
-            name_text = small_font.render(name_label, True, BLACK)
-            price_text = small_font.render(f"${cost}", True, (0, 150, 0))
-            count = globals()[f"{seed_type}_seeds"]
-            count_text = small_font.render(f"x{count}", True, RED)
+            name_text = static_text(SEED_BUTTON_LABELS[crop_id], small_font, BLACK)
+            price_text = static_text(SEED_PRICE_LABELS[crop_id], small_font, (0, 150, 0))
+            count_text = hud.text(("seed_button_count", crop_id), sim.seeds[crop_id], small_font, RED, "x{}")
             
             # Comfortable vertical spacing inside each 50px-tall button
             name_y = btn.y + 4  # Top label
@@ -565,394 +817,913 @@ def draw_shop():
 
 
 
-def draw_end_screen():
-    global scoreboard, player_rank, score_saved
-    if not show_game_over:
-        return
-    
+# Modal screens: each panel is drawn once per content into its own surface,
+# and while a modal is up the scene behind it is frozen into one snapshot
+END_PANEL = pygame.Rect(150, 200, 500, 350)
+NAME_BOX = pygame.Rect(200, 220, 400, 160)
+SCOREBOARD_PANEL = pygame.Rect(140, 120, 520, 440)
+INSTRUCTIONS_PANEL = pygame.Rect(100, 150, 600, 450)
+modal_panels = {}
+scene_snapshot = None
+scene_snapshot_key = None
+# Earliest time a crop timer label drawn into the snapshot changes
+timer_labels_until = math.inf
+modal_frame = None
+modal_frame_key = None
+
+
+@functools.lru_cache(maxsize=None)
+def dim_overlay(color, alpha):
     overlay = pygame.Surface((WIDTH, HEIGHT))
-    overlay.set_alpha(180)
-    overlay.fill((0, 150, 0) if game_won else (100, 0, 0))
-    WIN.blit(overlay, (0, 0))
-    
-    panel = pygame.Rect(150, 200, 500, 350)
-    color = (50, 200, 50) if game_won else (200, 50, 50)
-    pygame.draw.rect(WIN, color, panel)
-    pygame.draw.rect(WIN, BLACK if game_won else RED, panel, 5)
+    overlay.set_alpha(alpha)
+    overlay.fill(color)
+    return overlay
+
+
+def modal_panel(name, rect, key, draw):
+    """Surface for a modal panel; `draw(surface, rect)` only runs when `key` changes."""
+    cached = modal_panels.get(name)
+    if cached is None or cached[0] != key:
+        surface = pygame.Surface(rect.size).convert()
+        draw(surface, surface.get_rect())
+        cached = modal_panels[name] = (key, surface)
+    return cached[1]
+
+
+def draw_end_panel(surface, panel):
+    color = (50, 200, 50) if sim.game_won else (200, 50, 50)
+    pygame.draw.rect(surface, color, panel)
+    pygame.draw.rect(surface, BLACK if sim.game_won else RED, panel, 5)
     
-    title = YOU_WIN_TITLE if game_won else GAME_OVER_TITLE
-    WIN.blit(title, (panel.centerx - title.get_width()//2, panel.y + 20))
+    title = static_text("YOU WIN!", big_font, (0, 255, 0)) if sim.game_won else static_text("GAME OVER", big_font, WHITE)
+    surface.blit(title, (panel.centerx - title.get_width()//2, panel.y + 20))
     
-    if game_won:
-        WIN.blit(big_font.render(f"FINAL SCORE: {coins} coins!", True, WHITE), (panel.x + 30, panel.y + 80))
-        WIN.blit(font.render("All 7 days completed!", True, WHITE), (panel.x + 30, panel.y + 120))
+    if sim.game_won:
+        surface.blit(big_font.render(f"FINAL SCORE: {sim.coins} coins!", True, WHITE), (panel.x + 30, panel.y + 80))
+        surface.blit(font.render(f"All {len(sim.daily_quotas)} days completed!", True, WHITE), (panel.x + 30, panel.y + 120))
     else:
-        req = daily_quotas[current_day]
-        WIN.blit(big_font.render(f"DAY {current_day + 1} FAILED", True, WHITE), (panel.x + 30, panel.y + 80))
-        WIN.blit(font.render(f"Needed: {req} coins", True, WHITE), (panel.x + 30, panel.y + 120))
-        WIN.blit(font.render(f"Have: {coins} coins", True, WHITE), (panel.x + 30, panel.y + 150))  
+        req = sim.daily_quotas[sim.current_day]
+        surface.blit(big_font.render(f"DAY {sim.current_day + 1} FAILED", True, WHITE), (panel.x + 30, panel.y + 80))
+        surface.blit(font.render(f"Needed: {req} coins", True, WHITE), (panel.x + 30, panel.y + 120))
+        surface.blit(font.render(f"Have: {sim.coins} coins", True, WHITE), (panel.x + 30, panel.y + 150))  
 
     # Show rank if saved
     if score_saved and player_rank is not None:
         rank_text = font.render(f"Your rank: #{player_rank}", True, WHITE)
-        WIN.blit(rank_text, (panel.x + 30, panel.y + 180))
+        surface.blit(rank_text, (panel.x + 30, panel.y + 180))
 
     # High score table (top 5)
     if scoreboard:
         hs_title = font.render("High Scores:", True, WHITE)
-        WIN.blit(hs_title, (panel.x + 260, panel.y + 80))
+        surface.blit(hs_title, (panel.x + 260, panel.y + 80))
         for i, (name, sc) in enumerate(scoreboard[:5]):
             entry = font.render(f"{i+1}. {name} - {sc}", True, WHITE)
-            WIN.blit(entry, (panel.x + 260, panel.y + 110 + i * 20))
+            surface.blit(entry, (panel.x + 260, panel.y + 110 + i * 20))
 
     
     replay_rect = pygame.Rect(panel.x + 50, panel.y + 220, 190, 60)
-    pygame.draw.rect(WIN, (50, 200, 50), replay_rect)
-    pygame.draw.rect(WIN, BLACK, replay_rect, 3)
-    WIN.blit(REPLAY_TEXT, (replay_rect.centerx - REPLAY_TEXT.get_width()//2, replay_rect.centery - 10))
+    pygame.draw.rect(surface, (50, 200, 50), replay_rect)
+    pygame.draw.rect(surface, BLACK, replay_rect, 3)
+    replay_text = static_text("REPLAY", big_font, WHITE)
+    surface.blit(replay_text, (replay_rect.centerx - replay_text.get_width()//2, replay_rect.centery - 10))
     
     quit_rect = pygame.Rect(panel.x + 260, panel.y + 220, 190, 60)
-    pygame.draw.rect(WIN, RED, quit_rect)
-    pygame.draw.rect(WIN, BLACK, quit_rect, 3)
-    WIN.blit(QUIT_TEXT, (quit_rect.centerx - QUIT_TEXT.get_width()//2, quit_rect.centery - 10))
+    pygame.draw.rect(surface, RED, quit_rect)
+    pygame.draw.rect(surface, BLACK, quit_rect, 3)
+    quit_text = static_text("QUIT", big_font, WHITE)
+    surface.blit(quit_text, (quit_rect.centerx - quit_text.get_width()//2, quit_rect.centery - 10))
 
 
-def draw_name_input():
-    if not entering_name or score_saved:
-        return
-    box = pygame.Rect(200, 220, 400, 160)
-    pygame.draw.rect(WIN, WHITE, box)
-    pygame.draw.rect(WIN, BLACK, box, 3)
-    title = big_font.render("Enter your name:", True, BLACK)
-    WIN.blit(title, (box.centerx - title.get_width()//2, box.y + 20))
+def end_screen_layers():
+    if not show_game_over:
+        return []
+    # The panel changes with the outcome and when a score is saved
+    key = (sim.game_won, sim.current_day, sim.coins, score_saved, player_rank, tuple(scoreboard[:5]))
+    return [
+        (dim_overlay((0, 150, 0) if sim.game_won else (100, 0, 0), 180), (0, 0)),
+        (modal_panel("end_screen", END_PANEL, key, draw_end_panel), END_PANEL.topleft),
+    ]
+
+
+def draw_name_box(surface, box):
+    pygame.draw.rect(surface, WHITE, box)
+    pygame.draw.rect(surface, BLACK, box, 3)
+    title = static_text("Enter your name:", big_font, BLACK)
+    surface.blit(title, (box.centerx - title.get_width()//2, box.y + 20))
     display_name = player_name if player_name else "_"
     name_surf = big_font.render(display_name, True, BLACK)
-    WIN.blit(name_surf, (box.centerx - name_surf.get_width()//2, box.y + 70))
-    hint = font.render("Press Enter to save score", True, BLACK)
-    WIN.blit(hint, (box.centerx - hint.get_width()//2, box.y + 120))
+    surface.blit(name_surf, (box.centerx - name_surf.get_width()//2, box.y + 70))
+    hint = static_text("Press Enter to save score", font, BLACK)
+    surface.blit(hint, (box.centerx - hint.get_width()//2, box.y + 120))
 
 
-def draw_scoreboard_popup():
-    if not show_scoreboard:
-        return
-    # Semi-transparent overlay
-    overlay = pygame.Surface((WIDTH, HEIGHT))
-    overlay.set_alpha(160)
-    overlay.fill(INSTRUCTIONS_BG)
-    WIN.blit(overlay, (0, 0))
+def name_input_layers():
+    # Name entry only takes keys on the end screen
+    if not (show_game_over and entering_name) or score_saved:
+        return []
+    return [(modal_panel("name_input", NAME_BOX, player_name, draw_name_box), NAME_BOX.topleft)]
 
-    panel = pygame.Rect(140, 120, 520, 440)
-    pygame.draw.rect(WIN, WHITE, panel)
-    pygame.draw.rect(WIN, BROWN, panel, 4)
 
-    title = big_font.render("Ranking Board", True, BLACK)
-    WIN.blit(title, (panel.centerx - title.get_width()//2, panel.y + 20))
+def draw_scoreboard_panel(surface, panel):
+    pygame.draw.rect(surface, WHITE, panel)
+    pygame.draw.rect(surface, BROWN, panel, 4)
 
-    # Load latest scores if empty
-    global scoreboard
-    if not scoreboard:
-        scoreboard = load_scores()
+    title = static_text("Ranking Board", big_font, BLACK)
+    surface.blit(title, (panel.centerx - title.get_width()//2, panel.y + 20))
 
     # Show top 5
-    header = font.render("Top 5 Players (by coins):", True, BLACK)
-    WIN.blit(header, (panel.x + 20, panel.y + 70))
+    header = static_text("Top 5 Players (by coins):", font, BLACK)
+    surface.blit(header, (panel.x + 20, panel.y + 70))
 
     if not scoreboard:
-        empty = font.render("No scores yet.", True, BLACK)
-        WIN.blit(empty, (panel.x + 20, panel.y + 100))
+        empty = static_text("No scores yet.", font, BLACK)
+        surface.blit(empty, (panel.x + 20, panel.y + 100))
     else:
         for i, (name, sc) in enumerate(scoreboard[:5]):
             entry = font.render(f"{i+1}. {name} - {sc}", True, BLACK)
-            WIN.blit(entry, (panel.x + 40, panel.y + 100 + i * 24))
+            surface.blit(entry, (panel.x + 40, panel.y + 100 + i * 24))
 
     # Close button
     close_rect = pygame.Rect(panel.right - 35, panel.y + 15, 20, 20)
-    pygame.draw.rect(WIN, RED, close_rect)
-    pygame.draw.rect(WIN, BLACK, close_rect, 2)
-    WIN.blit(CLOSE_TEXT, CLOSE_TEXT.get_rect(center=close_rect.center))
+    pygame.draw.rect(surface, RED, close_rect)
+    pygame.draw.rect(surface, BLACK, close_rect, 2)
+    close_text = static_text("X", font, WHITE)
+    surface.blit(close_text, close_text.get_rect(center=close_rect.center))
+
+
+def scoreboard_popup_layers():
+    global scoreboard
+    if not show_scoreboard:
+        return []
+    # Load latest scores if empty
+    if not scoreboard:
+        scoreboard = score_store.top(5)
+    return [
+        (dim_overlay(INSTRUCTIONS_BG, 160), (0, 0)),
+        (modal_panel("scoreboard", SCOREBOARD_PANEL, tuple(scoreboard[:5]), draw_scoreboard_panel),
+         SCOREBOARD_PANEL.topleft),
+    ]
+
+
+def crop_info_lines(per_line=3):
+    """Growth time, harvest reward and seed cost of every crop in the installed pack."""
+    tables = farm_sim.crop_tables
+    crops = [f"{tables.labels[crop_id]}:{tables.ready_after[crop_id]:g}s=${tables.rewards[crop_id]} "
+             f"(${tables.costs[crop_id]})" for crop_id in range(1, len(tables) + 1)]
+    return [" | ".join(crops[i:i + per_line]) for i in range(0, len(crops), per_line)]
+
+
+def draw_instructions_panel(surface, panel):
+    pygame.draw.rect(surface, WHITE, panel)
+    pygame.draw.rect(surface, BROWN, panel, 5)
+    surface.blit(static_text("GAME INSTRUCTIONS", big_font, BLACK), (panel.x + 20, panel.y + 20))
+    instructions = [
+        "1. Buy seeds from SHOP buttons",
+        "2. Click (or drag across) empty farm tiles to plant",
+        "3. Watch plants grow!",
+        "4. Click READY crops ($ shown) to harvest",
+        "5. MEET DAILY QUOTA or GAME OVER!",
+        "6. S = toggle shop, H = help, ESC = quit",
+        "7. ||/▶ = PAUSE (top menu!)",
+        "8. A = harvest all ready, F = plant all empty",
+        "",
+        *crop_info_lines(),
+        "",
+        f"Day {sim.current_day+1} quota: {sim.daily_quotas[sim.current_day]}"
+    ]
+    for i, text in enumerate(instructions):
+        surface.blit(font.render(text, True, BLACK), (panel.x + 20, panel.y + 70 + i * 18))
+
+    close_rect = pygame.Rect(panel.right - 35, panel.y + 10, 25, 25)
+    pygame.draw.rect(surface, RED, close_rect)
+    pygame.draw.rect(surface, BLACK, close_rect, 2)
+    close_text = static_text("X", font, WHITE)
+    surface.blit(close_text, close_text.get_rect(center=close_rect.center))
+
+
+def instructions_layers():
+    if not show_instructions:
+        return []
+    # Only the quota line changes, with the day, and the crop lines with the pack
+    key = (sim.current_day, farm_sim.crop_tables.mtime)
+    return [
+        (dim_overlay(INSTRUCTIONS_BG, 128), (0, 0)),
+        (modal_panel("instructions", INSTRUCTIONS_PANEL, key, draw_instructions_panel),
+         INSTRUCTIONS_PANEL.topleft),
+    ]
+
+
+def modal_layers():
+    """(surface, position) blits for every modal that is up, bottom to top."""
+    return end_screen_layers() + name_input_layers() + scoreboard_popup_layers() + instructions_layers()
+
+
+def frozen_scene_key():
+    # What the scene behind a modal can still show changing: the scoreboard
+    # popup doesn't stop the game, so crops grow and the day clock runs under
+    # it. The next growth transition moves whenever a crop changes stage;
+    # crop timer labels are covered by timer_labels_until instead.
+    return (
+        farm_sim.crop_tables, show_game_over, shop_collapsed, shop_page, is_paused, is_music_on,
+        music_volume_index, sim.coins, sim.current_day, sim.total_seeds(), day_timer_label(),
+        sim.next_transition_time(), camera.key() if camera else None,
+    )
 
 def get_farm_position():
     return (
-        (WIDTH - GRID_SIZE * TILE_SIZE) // 2,
+        (WIDTH - FARM_SIZE * TILE_SIZE) // 2,
         MENU_HEIGHT + (COLLAPSED_HEIGHT if shop_collapsed else SHOP_HEIGHT) + FARM_Y_OFFSET
     )
 
 def draw_farm():
+    if CAMERA_MODE:
+        draw_farm_viewport()
+        return
     farm_x, farm_y = get_farm_position()
-    for row in range(GRID_SIZE):
-        for col in range(GRID_SIZE):
-            x, y = farm_x + col * TILE_SIZE, farm_y + row * TILE_SIZE
-            # Grass base
-            pygame.draw.rect(WIN, GRASS_GREEN, (x, y, TILE_SIZE, TILE_SIZE))
-            # Soil patch for visual depth
-            pygame.draw.rect(WIN, (166, 124, 82), (x + 8, y + 8, TILE_SIZE - 16, TILE_SIZE - 16))
-            if crops[row][col]:
-                draw_growth_stage(x, y, crops[row][col]["type"], crops[row][col]["state"])
-                draw_crop_timer(x, y, plant_time[row][col], crops[row][col]["type"], row, col)
-            pygame.draw.rect(WIN, BROWN, (x, y, TILE_SIZE, TILE_SIZE), 3)
-
-def update_crops():
-    current_time = time.time()
-    for row in range(GRID_SIZE):
-        for col in range(GRID_SIZE):
-            if crops[row][col]:
-                crop = crops[row][col]
-                elapsed = current_time - plant_time[row][col]
-                growth = GROWTH_TIMES[crop["type"]]
-                if crop["state"] == "seed" and elapsed > growth["seed_to_sprout"]:
-                    crop["state"] = "sprout"
-                elif crop["state"] == "sprout" and elapsed > growth["sprout_to_ready"]:
-                    crop["state"] = "ready"
-def update_paused_text():
-    global coins_surface, day_surface, quota_surface, seeds_surface, seed_count_surfaces, day_timer_surface, earned_today_surface
-    
-    coins_surface = font.render(f"Coins:{coins}", True, BLACK)
-    day_surface = font.render(f"Day:{current_day + 1}", True, BLACK)
-    
-    if current_day < len(daily_quotas):
-        quota_surface = font.render(f"Q:{daily_quotas[current_day]}", True, BLACK)
-    else:
-        quota_surface = font.render("WIN!", True, (0, 255, 0))
-    
-    earned_today = coins - daily_start_coins
-    color = (0, 255, 0) if earned_today >= daily_quotas[min(current_day, len(daily_quotas)-1)] else RED
-    earned_today_surface = font.render(f"E:{earned_today}", True, color)
-    
-    total_seeds = corn_seeds + watermelon_seeds + pumpkin_seeds + tomato_seeds + grape_seeds + super_seeds
-    seeds_surface = font.render(f"Seeds:{total_seeds}", True, BLACK)
-    
-    seed_counts = [corn_seeds, watermelon_seeds, pumpkin_seeds, tomato_seeds, grape_seeds, super_seeds]
-    for i, count in enumerate(seed_counts):
-        seed_count_surfaces[i] = font.render(str(count), True, RED)
-    
-    #Freeze day timer when paused
-    if is_paused:
-        day_timer_surface = timer_font_day.render("PAUSED", True, (255, 100, 100))
-    else:
-        time_left = max(0, DAY_DURATION - ((time.time() - day_start_time) % DAY_DURATION))
-        minutes, seconds = divmod(int(time_left), 60)
-        day_timer_surface = timer_font_day.render(f"{minutes:02d}:{seconds:02d}", True, WHITE)
-
-# MAIN LOOP 
-run = True
-while run:
-    # Handle events FIRST
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            run = False
-        elif event.type == pygame.KEYDOWN:
-            # Handle name entry first when game is over
-            if entering_name and show_game_over:
-                if event.key == pygame.K_RETURN:
-                    if player_name.strip():
-                        scoreboard, player_rank = save_score_and_rank(player_name.strip(), coins)
-                        score_saved = True
-                        entering_name = False
-                elif event.key == pygame.K_BACKSPACE:
-                    player_name = player_name[:-1]
+    sprites = []
+    planted = []
+    # Tile beds are part of the background layer; only crops are drawn here
+    for row, col, (crop_id, state) in sim.crops_in(0, FARM_SIZE, 0, FARM_SIZE):
+        x, y = farm_x + col * TILE_SIZE, farm_y + row * TILE_SIZE
+        sprites.append((CROP_ATLAS[crop_id][state], (x, y)))
+        planted.append((x, y, crop_id, state, row, col))
+    # Whole field of crops in one call, then every timer label in another
+    WIN.blits(sprites, False)
+    labels = []
+    for x, y, crop_id, state, row, col in planted:
+        draw_crop_timer(x, y, sim.plant_time[row][col], crop_id, state, labels)
+    WIN.blits(labels, False)
+
+def screen_to_farm_tile(pos):
+    """(row, col) of the farm tile under a screen position, or None."""
+    if pos[1] < MENU_HEIGHT + (COLLAPSED_HEIGHT if shop_collapsed else SHOP_HEIGHT):
+        return None
+    if camera:
+        return camera.screen_to_tile(pos)
+    farm_x, farm_y = get_farm_position()
+    if farm_x <= pos[0] < farm_x + FARM_SIZE * TILE_SIZE and farm_y <= pos[1] < farm_y + FARM_SIZE * TILE_SIZE:
+        return (pos[1] - farm_y) // TILE_SIZE, (pos[0] - farm_x) // TILE_SIZE
+    return None
+
+
+def tiles_along(start, end):
+    """Farm tiles under the segment start -> end, in order, so a fast drag skips none."""
+    steps = max(abs(end[0] - start[0]), abs(end[1] - start[1])) // 4 + 1
+    tiles = []
+    for i in range(1, steps + 1):
+        tile = screen_to_farm_tile((start[0] + (end[0] - start[0]) * i // steps,
+                                    start[1] + (end[1] - start[1]) * i // steps))
+        if tile and (not tiles or tiles[-1] != tile):
+            tiles.append(tile)
+    return tiles
+
+
+def paint_tiles(tiles):
+    """Apply the farm click rule once per tile per stroke; returns the actions taken."""
+    actions = set()
+    for tile in tiles:
+        if tile in paint_stroke:
+            continue
+        paint_stroke.add(tile)
+        action = sim.click_tile(*tile, can_plant=not is_paused)
+        if action:
+            actions.add(action)
+    return actions
+
+
+def finish_batch(actions, input_time=None):
+    # One sound and one HUD refresh per batch, however many tiles changed
+    if actions:
+        sfx.play("harvest" if "harvest" in actions else "plant", input_time)
+        update_cached_text()
+
+
+def get_tile_rect(row, col):
+    farm_x, farm_y = get_farm_position()
+    return pygame.Rect(farm_x + col * TILE_SIZE, farm_y + row * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+
+def draw_farm_tile(row, col):
+    # Single-tile version of draw_farm for the dirty-rect renderer
+    rect = get_tile_rect(row, col)
+    x, y = rect.topleft
+    WIN.blit(get_scene_layer(), rect, rect)
+    crop = sim.crop_at(row, col)
+    if crop:
+        WIN.blit(CROP_ATLAS[crop[0]][crop[1]], rect)
+        labels = []
+        draw_crop_timer(x, y, sim.plant_time[row][col], *crop, labels)
+        WIN.blits(labels, False)
+
+class Camera:
+    """Scrollable, zoomable view onto a farm too big for the window.
+
+    x/y are the world pixel coordinates (at the current zoom) shown at the
+    viewport's top-left corner. Only tiles inside the viewport are ever
+    drawn or hit-tested, so cost does not grow with the farm.
+    """
+
+    def __init__(self, farm_size):
+        self.farm_size = farm_size
+        self.zoom_index = len(ZOOM_TILE_SIZES) - 1
+        self.x = self.y = 0
+        self.dragging = False
+        self.clamp()
+
+    @property
+    def tile_size(self):
+        return ZOOM_TILE_SIZES[self.zoom_index]
+
+    def viewport(self):
+        top = MENU_HEIGHT + (COLLAPSED_HEIGHT if shop_collapsed else SHOP_HEIGHT)
+        return pygame.Rect(0, top, WIDTH, HEIGHT - top)
+
+    def key(self):
+        return (self.x, self.y, self.zoom_index, self.viewport().top)
+
+    def clamp(self):
+        view = self.viewport()
+        world = self.farm_size * self.tile_size
+        # Small farms are centred; large ones can't scroll past their edges
+        if world <= view.width:
+            self.x = (world - view.width) // 2
+        else:
+            self.x = max(0, min(self.x, world - view.width))
+        if world <= view.height:
+            self.y = (world - view.height) // 2
+        else:
+            self.y = max(0, min(self.y, world - view.height))
+
+    def pan(self, dx, dy):
+        self.x += dx
+        self.y += dy
+        self.clamp()
+
+    def pan_with_keys(self, pressed):
+        dx = (pressed[pygame.K_RIGHT] - pressed[pygame.K_LEFT]) * CAMERA_PAN_SPEED
+        dy = (pressed[pygame.K_DOWN] - pressed[pygame.K_UP]) * CAMERA_PAN_SPEED
+        if dx or dy:
+            self.pan(dx, dy)
+
+    def zoom(self, steps, anchor):
+        # Keep the world point under the cursor fixed while zooming
+        new_index = max(0, min(len(ZOOM_TILE_SIZES) - 1, self.zoom_index + steps))
+        if new_index == self.zoom_index:
+            return
+        view = self.viewport()
+        ax, ay = anchor[0] - view.x, anchor[1] - view.y
+        scale = ZOOM_TILE_SIZES[new_index] / self.tile_size
+        self.zoom_index = new_index
+        self.x = int((self.x + ax) * scale) - ax
+        self.y = int((self.y + ay) * scale) - ay
+        self.clamp()
+
+    def tile_origin(self, row, col):
+        view = self.viewport()
+        return view.x + col * self.tile_size - self.x, view.y + row * self.tile_size - self.y
+
+    def screen_to_tile(self, pos):
+        view = self.viewport()
+        if not view.collidepoint(pos):
+            return None
+        col = (pos[0] - view.x + self.x) // self.tile_size
+        row = (pos[1] - view.y + self.y) // self.tile_size
+        if 0 <= row < self.farm_size and 0 <= col < self.farm_size:
+            return row, col
+        return None
+
+    def visible_tiles(self):
+        """(first_row, end_row, first_col, end_col) of tiles inside the viewport."""
+        view = self.viewport()
+        ts = self.tile_size
+        first_col = max(0, self.x // ts)
+        first_row = max(0, self.y // ts)
+        end_col = min(self.farm_size, (self.x + view.width + ts - 1) // ts)
+        end_row = min(self.farm_size, (self.y + view.height + ts - 1) // ts)
+        return first_row, end_row, first_col, end_col
+
+    def visible_chunks(self):
+        first_row, end_row, first_col, end_col = self.visible_tiles()
+        for chunk_row in range(first_row // CHUNK_TILES, (end_row - 1) // CHUNK_TILES + 1):
+            for chunk_col in range(first_col // CHUNK_TILES, (end_col - 1) // CHUNK_TILES + 1):
+                yield chunk_row, chunk_col
+
+
+# Per-zoom caches: one bed image serves every chunk, one scaled atlas per tile size
+chunk_beds = {}
+scaled_atlases = {}
+
+
+def get_chunk_bed(tile_size):
+    bed = chunk_beds.get(tile_size)
+    if bed is None:
+        size = CHUNK_TILES * tile_size
+        bed = pygame.Surface((size, size)).convert()
+        margin = tile_size // 8
+        border = max(1, 3 * tile_size // TILE_SIZE)
+        for row in range(CHUNK_TILES):
+            for col in range(CHUNK_TILES):
+                x, y = col * tile_size, row * tile_size
+                pygame.draw.rect(bed, GRASS_GREEN, (x, y, tile_size, tile_size))
+                pygame.draw.rect(bed, (166, 124, 82), (x + margin, y + margin, tile_size - 2 * margin, tile_size - 2 * margin))
+                pygame.draw.rect(bed, BROWN, (x, y, tile_size, tile_size), border)
+        chunk_beds[tile_size] = bed
+    return bed
+
+
+def get_crop_atlas(tile_size):
+    if tile_size == TILE_SIZE:
+        return CROP_ATLAS
+    atlas = scaled_atlases.get(tile_size)
+    if atlas is None:
+        atlas = scaled_atlases[tile_size] = [None] + [
+            [None] + [pygame.transform.smoothscale(sprite, (tile_size, tile_size)) for sprite in sprites[1:]]
+            for sprites in CROP_ATLAS[1:]
+        ]
+    return atlas
+
+
+def draw_farm_viewport():
+    view = camera.viewport()
+    ts = camera.tile_size
+    bed = get_chunk_bed(ts)
+    atlas = get_crop_atlas(ts)
+    WIN.set_clip(view)
+    # Beds: one blit per visible chunk, trimmed at the farm's far edges
+    for chunk_row, chunk_col in camera.visible_chunks():
+        row, col = chunk_row * CHUNK_TILES, chunk_col * CHUNK_TILES
+        rows = min(CHUNK_TILES, FARM_SIZE - row)
+        cols = min(CHUNK_TILES, FARM_SIZE - col)
+        WIN.blit(bed, camera.tile_origin(row, col), (0, 0, cols * ts, rows * ts))
+    # Crops: only tiles inside the viewport
+    first_row, end_row, first_col, end_col = camera.visible_tiles()
+    sprites = []
+    planted = []
+    origin_x, origin_y = camera.tile_origin(0, 0)
+    for row, col, (crop_id, state) in sim.crops_in(first_row, end_row, first_col, end_col):
+        pos = (origin_x + col * ts, origin_y + row * ts)
+        sprites.append((atlas[crop_id][state], pos))
+        planted.append((pos, crop_id, state, row, col))
+    WIN.blits(sprites, False)
+    # Timer labels only fit at full zoom
+    if ts == TILE_SIZE:
+        labels = []
+        for (x, y), crop_id, state, row, col in planted:
+            draw_crop_timer(x, y, sim.plant_time[row][col], crop_id, state, labels)
+        WIN.blits(labels, False)
+    WIN.set_clip(None)
+
+
+def visible_tile_keys():
+    first_row, end_row, first_col, end_col = camera.visible_tiles()
+    return tuple(
+        (row, col) + crop + (crop_timer_label(*crop, sim.plant_time[row][col]),)
+        for row, col, crop in sim.crops_in(first_row, end_row, first_col, end_col)
+    )
+
+
+def draw_game_scene():
+    draw_background()
+    profiler.lap("draw_background")
+    draw_menu_bar()
+    profiler.lap("draw_menu_bar")
+    if not show_game_over:
+        draw_shop()
+        profiler.lap("draw_shop")
+    draw_farm()
+    profiler.lap("draw_farm")
+
+
+def draw_frozen_scene():
+    """A modal screen: its cached panels over one snapshot of the scene.
+
+    The scene is only redrawn when frozen_scene_key() changes or a crop
+    timer label drawn into it is due to change, and the composed frame only
+    when the scene or a panel does; otherwise a frame is a single blit.
+    """
+    global scene_snapshot, scene_snapshot_key, modal_frame, modal_frame_key, timer_labels_until
+    scene_key = frozen_scene_key()
+    if scene_snapshot is None or scene_key != scene_snapshot_key or sim.clock() >= timer_labels_until:
+        timer_labels_until = math.inf
+        draw_game_scene()
+        scene_snapshot = WIN.copy()
+        scene_snapshot_key = scene_key
+        modal_frame = None
+    layers = tuple(modal_layers())
+    frame_key = (scene_key, layers)
+    if modal_frame is None or frame_key != modal_frame_key:
+        modal_frame = scene_snapshot.copy()
+        modal_frame.blits(layers, False)
+        modal_frame_key = frame_key
+    WIN.blit(modal_frame, (0, 0))
+    profiler.lap("draw_overlays")
+
+
+def draw_scene():
+    global scene_snapshot, modal_frame
+    if show_game_over or show_scoreboard or show_instructions:
+        draw_frozen_scene()
+        return
+    # Back in the game: let the snapshots go, the next modal starts fresh
+    scene_snapshot = modal_frame = None
+    draw_game_scene()
+
+
+def draw_profiler_overlay():
+    """Per-phase p50/p95/p99 panel; the text is re-rendered twice a second."""
+    global profiler_panel
+    if profiler_panel is None or profiler.frames % 30 == 0:
+        rows = [("phase", "p50", "p95", "p99 ms")]
+        for phase, stats in profiler.stats().items():
+            rows.append((phase, *(f"{stats[k]:.2f}" for k in ("p50_ms", "p95_ms", "p99_ms"))))
+        # Achieved rate and CPU time per second, from the frame pacer
+        rows.append(("fps, cpu ms/s", f"{pacer.fps:.1f}", f"{pacer.cpu_ms:.0f}", ""))
+        profiler_panel = pygame.Surface((260, 6 + 15 * len(rows)), pygame.SRCALPHA)
+        profiler_panel.fill((0, 0, 0, 170))
+        for i, row in enumerate(rows):
+            for x, text in zip((6, 126, 170, 214), row):
+                profiler_panel.blit(small_font.render(text, True, WHITE), (x, 3 + 15 * i))
+    rect = profiler_panel.get_rect(bottomright=(WIDTH - 10, HEIGHT - 10))
+    WIN.blit(profiler_panel, rect)
+    return rect
+
+
+def hovered_menu_button(mouse_pos):
+    for label, rect in MENU_BUTTONS.items():
+        if rect.collidepoint(mouse_pos):
+            return label
+    return None
+
+
+def hovered_shop_button(mouse_pos):
+    for name, rect in get_shop_buttons().items():
+        if rect.collidepoint(mouse_pos):
+            return name
+    return None
+
+
+class DirtyRectRenderer:
+    """Redraws and presents only the screen regions whose contents changed.
+
+    Each region (menu bar, shop/HUD bar, every farm tile) gets a key built
+    from the values it displays; a region is redrawn and passed to
+    pygame.display.update only when its key differs from last frame. Modal
+    screens and layout changes fall back to a full redraw + flip.
+    """
+
+    def __init__(self):
+        self.keys = {}
+        self.layout = None
+        self.full_frames = 0
+        self.partial_frames = 0
+        self.rects_presented = 0
+
+    def invalidate(self):
+        self.layout = None
+
+    def region_keys(self):
+        mouse_pos = pygame.mouse.get_pos()
+        keys = {
+            "menu": (hovered_menu_button(mouse_pos), is_paused, is_music_on, music_volume_index),
+            "shop": (
+                hovered_shop_button(mouse_pos), sim.coins, sim.current_day, shop_page,
+                tuple(sim.seeds[crop_id] for crop_id in page_crops()), day_timer_label(),
+            ),
+        }
+        if CAMERA_MODE:
+            # The whole viewport is one region
+            keys["farm"] = (camera.key(), visible_tile_keys())
+            return keys
+        for row in range(FARM_SIZE):
+            for col in range(FARM_SIZE):
+                crop = sim.crop_at(row, col)
+                if crop:
+                    keys[(row, col)] = crop + (crop_timer_label(*crop, sim.plant_time[row][col]),)
                 else:
-                    if len(player_name) < 12 and event.unicode.isprintable():
-                        player_name += event.unicode
-                continue
-            if event.key == pygame.K_ESCAPE:
+                    keys[(row, col)] = None
+        return keys
+
+    def region_rect(self, region):
+        if region == "menu":
+            return pygame.Rect(0, 0, WIDTH, MENU_HEIGHT)
+        if region == "shop":
+            return pygame.Rect(0, MENU_HEIGHT, WIDTH, COLLAPSED_HEIGHT if shop_collapsed else SHOP_HEIGHT)
+        if region == "farm":
+            return camera.viewport()
+        return get_tile_rect(*region)
+
+    def draw_region(self, region):
+        if region == "menu":
+            draw_menu_bar()
+        elif region == "shop":
+            draw_shop()
+        elif region == "farm":
+            view = camera.viewport()
+            WIN.blit(get_scene_layer(), view, view)
+            draw_farm_viewport()
+        else:
+            draw_farm_tile(*region)
+
+    def present(self):
+        layout = (shop_collapsed, show_game_over, show_instructions, show_scoreboard)
+        modal = show_game_over or show_instructions or show_scoreboard
+        keys = self.region_keys()
+        if modal or layout != self.layout:
+            draw_scene()
+            pygame.display.flip()
+            profiler.lap("flip")
+            self.layout = None if modal else layout
+            self.keys = keys
+            self.full_frames += 1
+            return
+
+        rects = []
+        for region, key in keys.items():
+            if self.keys.get(region, key) != key:
+                self.draw_region(region)
+                rects.append(self.region_rect(region))
+        self.keys = keys
+        profiler.lap("draw_regions")
+        if rects:
+            pygame.display.update(rects)
+            self.rects_presented += len(rects)
+        profiler.lap("update_rects")
+        self.partial_frames += 1
+
+
+# Crop sprites are baked once the display exists (convert_alpha needs it)
+CROP_ATLAS = build_crop_atlas()
+# Backgrounds behind growing-crop timers, pre-sized for one- and two-digit labels
+timer_pills = PillPool(timer_font_small.get_height() + 4, (50, 50, 50), 220,
+                       {glyph_atlas(timer_font_small, WHITE).width(f"{letter}:{n}s") + 6
+                        for letter in STAGE_LETTERS[1:3] for n in (0, 10)})
+
+# Optional dirty-rect presentation (full redraw + flip is the default)
+dirty_renderer = DirtyRectRenderer() if OPTIONS.dirty_rects else None
+
+camera = Camera(FARM_SIZE) if CAMERA_MODE else None
+
+# Adaptive pacing: full rate while there is input, blocking waits when idle
+pacer = FramePacer()
+# Seconds to wake after a timer's scheduled tick, so its label has changed
+TIMER_SLACK = 0.002
+
+# Frame profiler: hooks are no-ops until enabled (--profile or F3)
+profiler = FrameProfiler(enabled=OPTIONS.profile)
+profiler_panel = None
+
+if __name__ == "__main__":
+    if replay:
+        save_game.restore(sim, replay.snapshot)
+        replay_started = time.perf_counter()
+    else:
+        start_audio()
+        if not OPTIONS.new_game:
+            resume_saved_game()
+        autosaver = save_game.Autosaver()
+        last_autosave = time.time()
+        if OPTIONS.record:
+            recorder = start_recording(OPTIONS.record)
+    clock_origin = game_clock() if game_clock else None
+    render = not (replay and OPTIONS.no_render)
+    time_to_first_frame = None
+
+    # MAIN LOOP 
+    run = True
+    while run:
+        profiler.begin_frame()
+        if game_clock:
+            # Computed from the frame number, never accumulated, so replays land on the same floats
+            game_clock.now = clock_origin + frame * game_clock.step
+        # Handle events FIRST
+        input_time = time.perf_counter()
+        for event in frame_events():
+            if event.type == pygame.QUIT:
                 run = False
-            elif event.key == pygame.K_s and not (show_game_over or show_instructions):
-                shop_collapsed = not shop_collapsed
-            elif event.key == pygame.K_h:
-                show_instructions = not show_instructions
-            elif show_game_over:
-                if event.key == pygame.K_r:
-                    # Reset game
-                    coins = 15
-                    daily_start_coins = 15
-                    corn_seeds = watermelon_seeds = pumpkin_seeds = tomato_seeds = grape_seeds = super_seeds = 0
-                    crops = [[None for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
-                    plant_time = [[0 for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
-                    current_day = 0
-                    day_start_time = time.time()
-                    game_over = game_won = show_game_over = False
-                    entering_name = False
-                    score_saved = False
-                    player_name = ""
-                    player_rank = None
-                elif event.key == pygame.K_q:
-                    run = False
-        elif event.type == pygame.MOUSEBUTTONDOWN:
-            mx, my = event.pos
-            
-            if show_game_over:
-                panel = pygame.Rect(150, 200, 500, 350)
-                if pygame.Rect(panel.x + 50, panel.y + 220, 190, 60).collidepoint(mx, my):
-                    # Replay
-                    coins = 15
-                    daily_start_coins = 15
-                    corn_seeds = watermelon_seeds = pumpkin_seeds = tomato_seeds = grape_seeds = super_seeds = 0
-                    crops = [[None for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
-                    plant_time = [[0 for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
-                    current_day = 0
-                    day_start_time = time.time()
-                    game_over = game_won = show_game_over = False
-                    entering_name = False
-                    score_saved = False
-                    player_name = ""
-                    player_rank = None
-                elif pygame.Rect(panel.x + 260, panel.y + 220, 190, 60).collidepoint(mx, my):
+            elif event.type == pygame.KEYDOWN:
+                # Handle name entry first when game is over
+                if entering_name and show_game_over:
+                    if event.key == pygame.K_RETURN:
+                        if player_name.strip():
+                            scoreboard, player_rank = save_score_and_rank(player_name.strip(), sim.coins)
+                            score_saved = True
+                            entering_name = False
+                    elif event.key == pygame.K_BACKSPACE:
+                        player_name = player_name[:-1]
+                    else:
+                        if len(player_name) < 12 and event.unicode.isprintable():
+                            player_name += event.unicode
+                    continue
+                if event.key == pygame.K_ESCAPE:
                     run = False
-                continue
+                elif event.key == pygame.K_s and not (show_game_over or show_instructions):
+                    shop_collapsed = not shop_collapsed
+                elif event.key == pygame.K_h:
+                    show_instructions = not show_instructions
+                elif event.key == pygame.K_a and not (show_game_over or show_instructions or show_scoreboard):
+                    finish_batch({"harvest"} if sim.harvest_all() else (), input_time)
+                elif (event.key == pygame.K_f and not is_paused
+                      and not (show_game_over or show_instructions or show_scoreboard)):
+                    finish_batch({"plant"} if sim.fill_empty() else (), input_time)
+                elif event.key == pygame.K_F3:
+                    profiler.toggle()
+                    profiler_panel = None
+                    if dirty_renderer:
+                        # Repaint whatever the panel covered
+                        dirty_renderer.layout = None
+                elif show_game_over:
+                    if event.key == pygame.K_r:
+                        # Reset game
+                        sim.reset()
+                        show_game_over = False
+                        entering_name = False
+                        score_saved = False
+                        player_name = ""
+                        player_rank = None
+                    elif event.key == pygame.K_q:
+                        run = False
+            elif event.type == pygame.MOUSEWHEEL and camera:
+                if not (show_game_over or show_instructions or show_scoreboard):
+                    camera.zoom(event.y, pointer_pos())
+            elif event.type == pygame.MOUSEMOTION and camera and camera.dragging:
+                camera.pan(-event.rel[0], -event.rel[1])
+            elif event.type == pygame.MOUSEMOTION and paint_stroke is not None:
+                if not (event.buttons[0] or event.buttons[1]):
+                    # Released outside the window
+                    paint_stroke = None
+                elif not (show_game_over or show_instructions or show_scoreboard):
+                    finish_batch(paint_tiles(tiles_along(paint_from, event.pos)), input_time)
+                    paint_from = event.pos
+            elif event.type == pygame.MOUSEBUTTONUP and camera and event.button == 3:
+                camera.dragging = False
+            elif event.type == pygame.MOUSEBUTTONUP and event.button in (1, 2):
+                paint_stroke = None
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                mx, my = event.pos
             
-            if show_instructions:
-                close_rect = pygame.Rect(665, 160, 25, 25)
-                if close_rect.collidepoint(mx, my):
-                    show_instructions = False
+                if show_game_over:
+                    panel = END_PANEL
+                    if pygame.Rect(panel.x + 50, panel.y + 220, 190, 60).collidepoint(mx, my):
+                        # Replay
+                        sim.reset()
+                        show_game_over = False
+                        entering_name = False
+                        score_saved = False
+                        player_name = ""
+                        player_rank = None
+                    elif pygame.Rect(panel.x + 260, panel.y + 220, 190, 60).collidepoint(mx, my):
+                        run = False
                     continue
-
-            # SCOREBOARD POPUP HANDLING
-            if show_scoreboard:
-                panel = pygame.Rect(140, 120, 520, 440)
-                close_rect = pygame.Rect(panel.right - 35, panel.y + 15, 20, 20)
-                if close_rect.collidepoint(mx, my):
-                    show_scoreboard = False
-                # Ignore other clicks when scoreboard is open
-                continue
             
-            # TOP MENU BAR HANDLING (Pause, Help, Quit, Music, Vol, Rank)
-            if my < MENU_HEIGHT and not show_game_over and not show_instructions:
-                if MENU_BUTTONS["Pause"].collidepoint(mx, my):
-                    is_paused = not is_paused
-                elif MENU_BUTTONS["Help"].collidepoint(mx, my):
-                    show_instructions = True
-                    show_scoreboard = False
-                elif MENU_BUTTONS["Music"].collidepoint(mx, my):
-                    if is_music_on:
-                        pygame.mixer.music.pause()
-                        is_music_on = False
-                    else:
-                        pygame.mixer.music.unpause()
-                        is_music_on = True
-                elif MENU_BUTTONS["Vol"].collidepoint(mx, my):
-                    # FIXED: 25%→50%→75%→100%
-                    music_volume_index = (music_volume_index + 1) % 4
-                    pygame.mixer.music.set_volume(MUSIC_VOLUMES[music_volume_index])
-                elif MENU_BUTTONS["Rank"].collidepoint(mx, my):
-                    # Toggle ranking popup; hide instructions when showing it
-                    show_scoreboard = not show_scoreboard
-                    if show_scoreboard:
+                if show_instructions:
+                    close_rect = pygame.Rect(665, 160, 25, 25)
+                    if close_rect.collidepoint(mx, my):
                         show_instructions = False
-                        scoreboard = load_scores()
-                elif MENU_BUTTONS["Quit"].collidepoint(mx, my):
-                    run = False
-                continue
+                        continue
+
+                # SCOREBOARD POPUP HANDLING
+                if show_scoreboard:
+                    panel = SCOREBOARD_PANEL
+                    close_rect = pygame.Rect(panel.right - 35, panel.y + 15, 20, 20)
+                    if close_rect.collidepoint(mx, my):
+                        show_scoreboard = False
+                    # Ignore other clicks when scoreboard is open
+                    continue
             
-            # SHOP BUTTONS (NO pause/help - moved to menu bar)
-            if not show_instructions:
-                shop_height = MENU_HEIGHT + (COLLAPSED_HEIGHT if shop_collapsed else SHOP_HEIGHT)
-                if my < shop_height:
-                    buttons = get_shop_buttons()
-                    if shop_collapsed:
-                        if buttons['toggle'].collidepoint(mx, my):
-                            shop_collapsed = not shop_collapsed
-                        # NO pause/help buttons here anymore
-                    else:
-                        # Seed buying (BLOCKED when paused)
-                        if is_paused:
-                            continue
-                        seed_buttons = {
-                            'corn': (buttons['corn 5$'], SHOP_COSTS["corn"]),
-                            'watermelon': (buttons['watermelon 7$'], SHOP_COSTS["watermelon"]),
-                            'pumpkin': (buttons['pumpkin 8$'], SHOP_COSTS["pumpkin"]),
-                            'tomato': (buttons['tomato 10$'], SHOP_COSTS["tomato"]),
-                            'grape': (buttons['grape 12$'], SHOP_COSTS["grape"]),
-                            'super': (buttons['super 20$'], SHOP_COSTS["super"]),
-                        }
-                        for seed_name, (btn, cost) in seed_buttons.items():
-                            if btn.collidepoint(mx, my) and coins >= cost:
-                                globals()[f"{seed_name}_seeds"] += 1
-                                coins -= cost
-                                update_cached_text()
-                                break
-                        # NO pause/help buttons here anymore
-                else:
-                    # FARM PLANTING/HARVESTING
-                    farm_x, farm_y = get_farm_position()
-                    if (farm_x <= mx < farm_x + GRID_SIZE * TILE_SIZE and 
-                        farm_y <= my < farm_y + GRID_SIZE * TILE_SIZE):
-                        grid_x = (mx - farm_x) // TILE_SIZE
-                        grid_y = (my - farm_y) // TILE_SIZE
-                        if 0 <= grid_x < GRID_SIZE and 0 <= grid_y < GRID_SIZE:
-                            row, col = grid_y, grid_x
-                            if crops[row][col] and crops[row][col]["state"] == "ready":
-                                seed_type = crops[row][col]["type"]
-                                coins += GROWTH_TIMES[seed_type]["harvest"]
-                                crops[row][col] = None
-                                update_cached_text()
-                            elif crops[row][col] is None and not is_paused:
-                                # Auto-plant cheapest seeds first
-                                for seed_type, var_name in [
-                                    ("corn", "corn_seeds"),
-                                    ("watermelon", "watermelon_seeds"),
-                                    ("pumpkin", "pumpkin_seeds"),
-                                    ("tomato", "tomato_seeds"),
-                                    ("grape", "grape_seeds"),
-                                    ("super", "super_seeds"),
-                                ]:
-                                    if globals()[var_name] > 0:
-                                        globals()[var_name] -= 1
-                                        crops[row][col] = {"type": seed_type, "state": "seed"}
-                                        plant_time[row][col] = time.time()
-                                        update_cached_text()
-                                        break
-    
-    # GAME LOGIC (PAUSED = STOPPED)
-    if not is_paused and not show_game_over and not show_instructions:
-        check_daily_quota()
-        update_crops()
-        update_cached_text()
-    else:
-        update_paused_text()
-    
-    # DRAW EVERYTHING
-    draw_background()
-    draw_menu_bar()
-    if not show_game_over:
-        draw_shop()
-    draw_farm()
-    draw_end_screen()
-    draw_name_input()
-    draw_scoreboard_popup()
+                # TOP MENU BAR HANDLING (Pause, Help, Quit, Music, Vol, Rank)
+                if my < MENU_HEIGHT and not show_game_over and not show_instructions:
+                    if MENU_BUTTONS["Pause"].collidepoint(mx, my):
+                        is_paused = not is_paused
+                    elif MENU_BUTTONS["Help"].collidepoint(mx, my):
+                        show_instructions = True
+                        show_scoreboard = False
+                    elif MENU_BUTTONS["Music"].collidepoint(mx, my):
+                        is_music_on = not is_music_on
+                        apply_music_settings()
+                    elif MENU_BUTTONS["Vol"].collidepoint(mx, my):
+                        # FIXED: 25%→50%→75%→100%
+                        music_volume_index = (music_volume_index + 1) % 4
+                        apply_music_settings()
+                    elif MENU_BUTTONS["Rank"].collidepoint(mx, my):
+                        # Toggle ranking popup; hide instructions when showing it
+                        show_scoreboard = not show_scoreboard
+                        if show_scoreboard:
+                            show_instructions = False
+                            scoreboard = score_store.top(5)
+                    elif MENU_BUTTONS["Quit"].collidepoint(mx, my):
+                        run = False
+                    continue
+            
+                # SHOP BUTTONS (NO pause/help - moved to menu bar)
+                if not show_instructions:
+                    shop_height = MENU_HEIGHT + (COLLAPSED_HEIGHT if shop_collapsed else SHOP_HEIGHT)
+                    if my < shop_height:
+                        buttons = get_shop_buttons()
+                        if shop_collapsed:
+                            if buttons['toggle'].collidepoint(mx, my):
+                                shop_collapsed = not shop_collapsed
+                            # NO pause/help buttons here anymore
+                        elif 'page_up' in buttons and buttons['page_up'].collidepoint(mx, my):
+                            shop_page = (shop_page - 1) % len(SHOP_PAGES)
+                        elif 'page_down' in buttons and buttons['page_down'].collidepoint(mx, my):
+                            shop_page = (shop_page + 1) % len(SHOP_PAGES)
+                        else:
+                            # Seed buying (BLOCKED when paused)
+                            if is_paused:
+                                continue
+                            for slot, crop_id in enumerate(page_crops()):
+                                if buttons[("seed", slot)].collidepoint(mx, my) and sim.buy_seed(crop_id):
+                                    sfx.play("buy", input_time)
+                                    update_cached_text()
+                                    break
+                            # NO pause/help buttons here anymore
+                    elif camera and event.button == 3:
+                        # Right-drag pans; the wheel (buttons 4/5) zooms via MOUSEWHEEL
+                        camera.dragging = True
+                    elif not camera or event.button not in (4, 5):
+                        # FARM PLANTING/HARVESTING: harvest if ready, else auto-plant
+                        # cheapest seeds first; dragging paints every tile crossed
+                        paint_stroke = set()
+                        paint_from = (mx, my)
+                        finish_batch(paint_tiles(tiles_along(paint_from, paint_from)), input_time)
     
-    # Instructions overlay
-    if show_instructions:
-        overlay = pygame.Surface((WIDTH, HEIGHT))
-        overlay.set_alpha(128)
-        overlay.fill(INSTRUCTIONS_BG)
-        WIN.blit(overlay, (0, 0))
-        panel = pygame.Rect(100, 150, 600, 450)
-        pygame.draw.rect(WIN, WHITE, panel)
-        pygame.draw.rect(WIN, BROWN, panel, 5)
-        WIN.blit(INSTRUCTIONS_TITLE, (panel.x + 20, panel.y + 20))
-        instructions = [
-            "1. Buy seeds from SHOP buttons",
-            "2. Click empty farm tiles to plant", 
-            "3. Watch plants grow!",
-            "4. Click READY crops ($ shown) to harvest",
-            "5. MEET DAILY QUOTA or GAME OVER!",
-            "6. S = toggle shop, H = help, ESC = quit",
-            "7. ||/▶ = PAUSE (top menu!)",
-            "",
-            "Corn:8s=$6 | Watermelon:11s=$12 | Pumpkin:14s=$15",
-            "Tomato:12s=$18 | Grape:17s=$20 | Super:20s=$50 ($20)",
-            "",
-            f"Day {current_day+1} quota: {daily_quotas[current_day]}"
-        ]
-        for i, text in enumerate(instructions):
-            WIN.blit(font.render(text, True, BLACK), (panel.x + 20, panel.y + 70 + i * 18))
-        
-        close_rect = pygame.Rect(665, 160, 25, 25)
-        pygame.draw.rect(WIN, RED, close_rect)
-        pygame.draw.rect(WIN, BLACK, close_rect, 2)
-        WIN.blit(CLOSE_TEXT, CLOSE_TEXT.get_rect(center=close_rect.center))
+        # Arrow keys pan; clamping also follows the viewport when the shop toggles
+        if camera:
+            camera.clamp()
+            if not (show_game_over or show_instructions or show_scoreboard):
+                camera.pan_with_keys(pressed_keys())
+        profiler.lap("events")
     
-    pygame.display.flip()
-    clock.tick(60)
-
-pygame.quit()
+        # GAME LOGIC (PAUSED = STOPPED)
+        if not is_paused and not show_game_over and not show_instructions:
+            check_daily_quota()
+            sim.update_crops()
+            autosave()
+        check_crop_pack()
+        profiler.lap("logic")
+        if render:
+            update_cached_text()
+            profiler.lap("update_cached_text")
+
+            # DRAW EVERYTHING
+            if dirty_renderer:
+                dirty_renderer.present()
+                if profiler.enabled:
+                    pygame.display.update(draw_profiler_overlay())
+                    profiler.lap("profiler_overlay")
+            else:
+                draw_scene()
+                if profiler.enabled:
+                    draw_profiler_overlay()
+                    profiler.lap("profiler_overlay")
+                pygame.display.flip()
+                profiler.lap("flip")
+            if time_to_first_frame is None:
+                time_to_first_frame = time.perf_counter() - STARTUP_START
+                print(f"Time to first frame: {time_to_first_frame * 1000:.0f} ms")
+            hud.end_frame()
+        if replay:
+            if replay.finished(frame):
+                run = False
+            # No frame pacing; headless replays jump to the next frame where anything can change
+            last_frame = frame
+            frame = replay.next_frame(frame, next_logic_time()) if not render else frame + 1
+        else:
+            if recorder:
+                # Recorded game time advances one fixed step per frame
+                clock.tick(60)
+            else:
+                # Idle (paused, a popup open, nothing growing): block until input or the next change
+                panning = camera is not None and (camera.dragging or any(pressed_keys()[key] for key in PAN_KEYS))
+                pacer.wait(next_screen_change, busy=panning)
+            last_frame = frame
+            frame += 1
+        profiler.lap("tick")
+
+    if recorder:
+        recorder.close(last_frame, state_digest(sim))
+        print(f"Recorded {recorder.events} inputs over {last_frame} frames to {recorder.path}")
+    if replay:
+        wall = time.perf_counter() - replay_started
+        game_seconds = last_frame * replay.step
+        if replay.digest is None:
+            verdict = "the recording has no final state to compare"
+        elif replay.digest == state_digest(sim):
+            verdict = "final state matches the recording"
+        else:
+            verdict = "final state DIFFERS from the recording"
+        print(f"Replayed {replay.events} inputs, {game_seconds:.1f} s of game time in {wall:.3f} s "
+              f"({game_seconds / max(wall, 1e-9):,.0f}x real time): day {sim.current_day + 1}, "
+              f"{sim.coins} coins; {verdict}")
+    # Quitting mid-game keeps the run for next time
+    if autosaver:
+        if not sim.finished:
+            autosaver.submit(save_game.encode(sim))
+        autosaver.close()
+    score_store.close()
+    if sfx.latency_report():
+        print(sfx.latency_report())
+    if pacer.report():
+        print(pacer.report())
+    if OPTIONS.profile_out and profiler.samples:
+        profiler.dump(OPTIONS.profile_out)
+    pygame.quit()
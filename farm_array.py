@@ -0,0 +1,166 @@
+"""Optional NumPy struct-of-arrays farm backend for very large grids.
+
+Each tile costs 10 bytes (uint8 crop code, uint8 state code, float64 plant
+time) instead of a Crop object, and growth, ready counts and bulk harvest are single
+vectorised expressions over the whole field. Needs numpy; the default
+list-based FarmSimulation does not.
+"""
+from array import array
+
+import numpy as np
+
+import farm_sim
+from farm_sim import CROP_NAMES, EMPTY, READY, SEED, SPROUT, FarmSimulation
+
+# The registry's per-crop tables as arrays indexed by crop code (= crop ID; 0 means empty)
+SEED_TO_SPROUT = SPROUT_TO_READY = HARVEST_REWARD = None
+
+
+def _compile_tables(new_ids=None):
+    global SEED_TO_SPROUT, SPROUT_TO_READY, HARVEST_REWARD
+    SEED_TO_SPROUT = np.array(farm_sim.SEED_TO_SPROUT)
+    SPROUT_TO_READY = np.array(farm_sim.SPROUT_TO_READY)
+    HARVEST_REWARD = np.array(farm_sim.HARVEST_REWARD, dtype=np.int64)
+
+
+_compile_tables()
+farm_sim.crop_listeners.append(_compile_tables)
+
+
+class ArrayFarmSimulation(FarmSimulation):
+    """FarmSimulation with the grid held in three NumPy arrays.
+
+    Shop, days and quotas are inherited; only crop storage and growth differ.
+    """
+
+    backend = "numpy"
+
+    def reset_grid(self):
+        shape = (self.grid_size, self.grid_size)
+        self.crop_codes = np.zeros(shape, dtype=np.uint8)
+        self.crop_states = np.zeros(shape, dtype=np.uint8)
+        self.plant_time = np.zeros(shape, dtype=np.float64)
+        # No list grid or growth heap in this backend; see next_transition_time
+        self.crops = None
+        self.growth_queue = None
+        self._next_due = np.inf
+
+    def reindex(self):
+        # Ready and empty tiles are masks over the state arrays; only the
+        # earliest growth deadline needs recomputing
+        self._next_due = self._earliest_due()
+
+    def remap_crops(self, new_ids):
+        lookup = np.array(new_ids, dtype=np.uint8)
+        self.crop_codes = lookup[self.crop_codes]
+        self.crop_states[self.crop_codes == EMPTY] = EMPTY
+        seeds = np.bincount(lookup[1:], weights=self.seeds[1:], minlength=len(CROP_NAMES)).astype(int)
+        seeds[0] = 0
+        self.seeds = array("l", seeds.tolist())
+        self.reindex()
+
+    def plant(self, row, col, now=None):
+        if self.crop_codes[row, col]:
+            return None
+        seeds = self.seeds
+        for crop_id in range(1, len(seeds)):
+            if seeds[crop_id] > 0:
+                seeds[crop_id] -= 1
+                self.crop_codes[row, col] = crop_id
+                self.crop_states[row, col] = SEED
+                self.plant_time[row, col] = planted = self.clock() if now is None else now
+                self._next_due = min(self._next_due, planted + SEED_TO_SPROUT[crop_id])
+                return crop_id
+        return None
+
+    def harvest(self, row, col):
+        if self.crop_states[row, col] != READY:
+            return 0
+        reward = int(HARVEST_REWARD[self.crop_codes[row, col]])
+        self.coins += reward
+        self.crop_codes[row, col] = EMPTY
+        self.crop_states[row, col] = EMPTY
+        return reward
+
+    def ready_mask(self):
+        return self.crop_states == READY
+
+    def count_empty(self):
+        return int(np.count_nonzero(self.crop_codes == EMPTY))
+
+    def count_ready(self):
+        return int(np.count_nonzero(self.ready_mask()))
+
+    def ready_revenue(self):
+        """Coins a bulk harvest would earn right now."""
+        return int(HARVEST_REWARD[self.crop_codes[self.ready_mask()]].sum())
+
+    def harvest_all(self):
+        ready = self.ready_mask()
+        earned = int(HARVEST_REWARD[self.crop_codes[ready]].sum())
+        self.coins += earned
+        self.crop_codes[ready] = EMPTY
+        self.crop_states[ready] = EMPTY
+        return earned
+
+    def fill_empty(self, now=None):
+        empty = np.flatnonzero(self.crop_codes == EMPTY)[:self.total_seeds()]
+        if not empty.size:
+            return 0
+        # Cheapest seeds first, in row-major tile order, as repeated plant() calls would
+        codes = np.repeat(np.arange(len(CROP_NAMES), dtype=np.uint8), self.seeds)[:empty.size]
+        if now is None:
+            now = self.clock()
+        self.crop_codes.flat[empty] = codes
+        self.crop_states.flat[empty] = SEED
+        self.plant_time.flat[empty] = now
+        self._next_due = min(self._next_due, now + SEED_TO_SPROUT[codes].min())
+        for crop_id, used in enumerate(np.bincount(codes, minlength=len(CROP_NAMES)).tolist()):
+            self.seeds[crop_id] -= used
+        return int(empty.size)
+
+    def crop_at(self, row, col):
+        code = int(self.crop_codes[row, col])
+        if not code:
+            return None
+        return code, int(self.crop_states[row, col])
+
+    def crops_in(self, first_row, end_row, first_col, end_col):
+        codes = self.crop_codes[first_row:end_row, first_col:end_col]
+        states = self.crop_states[first_row:end_row, first_col:end_col]
+        rows, cols = np.nonzero(codes)
+        for row, col, code, state in zip(rows.tolist(), cols.tolist(), codes[rows, cols].tolist(),
+                                         states[rows, cols].tolist()):
+            yield first_row + row, first_col + col, (code, state)
+
+    def click_tile(self, row, col, can_plant=True):
+        if self.crop_states[row, col] == READY:
+            self.harvest(row, col)
+            return "harvest"
+        if not self.crop_codes[row, col] and can_plant and self.plant(row, col):
+            return "plant"
+        return None
+
+    def _earliest_due(self):
+        due = np.where(self.crop_states == SEED, self.plant_time + SEED_TO_SPROUT[self.crop_codes], np.inf)
+        due = np.where(self.crop_states == SPROUT, self.plant_time + SPROUT_TO_READY[self.crop_codes], due)
+        return float(due.min()) if due.size else np.inf
+
+    def next_transition_time(self):
+        # Kept current by plant, fill and growth; harvests only remove ready
+        # crops, which have nothing pending
+        return None if self._next_due == np.inf else float(self._next_due)
+
+    def update_crops(self, now=None):
+        if now is None:
+            now = self.clock()
+        # Most ticks have nothing due; only scan the grid when something is
+        if now + farm_sim.DEADLINE_SLACK < self._next_due:
+            return
+        elapsed = now - self.plant_time
+        # Both masks come from the old states, so a crop moves one stage per update
+        sprouting = (self.crop_states == SEED) & (elapsed > SEED_TO_SPROUT[self.crop_codes])
+        ripening = (self.crop_states == SPROUT) & (elapsed > SPROUT_TO_READY[self.crop_codes])
+        self.crop_states[sprouting] = SPROUT
+        self.crop_states[ripening] = READY
+        self._next_due = self._earliest_due()
@@ -0,0 +1,244 @@
+"""Headless benchmarks for the game's rendering, simulation and score paths.
+
+Runs on SDL's dummy video/audio drivers, so it works on build machines and
+cabinets without a display. Results are written as JSON; with --baseline the
+run is compared against an earlier results file and the exit status is 1 if
+anything got slower than the threshold.
+
+    python farm_bench.py --out bench.json
+    python farm_bench.py --baseline bench.json --threshold 0.15
+    python farm_bench.py --filter draw_farm --max-lines 10000
+
+Game flags (--numpy, --farm-size, --camera, ...) are passed through to the
+game module.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame  # noqa: E402
+
+from farm_sim import CROP_IDS, SEED_TYPES, STATE_NAMES  # noqa: E402
+from score_store import ScoreStore, load_scores  # noqa: E402
+
+GAME_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "culmative farm game.py")
+MIN_TIME = 0.2
+REPEATS = 5
+STATES = ["seed", "sprout", "ready"]
+
+
+def load_game(game_args):
+    """Import the game script as a module; its main loop and music only start as __main__."""
+    argv = sys.argv
+    sys.argv = [GAME_SCRIPT] + game_args
+    try:
+        spec = importlib.util.spec_from_file_location("farm_game", GAME_SCRIPT)
+        game = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(game)
+    finally:
+        sys.argv = argv
+    return game
+
+
+def measure(fn, min_time=MIN_TIME, repeats=REPEATS):
+    """Median and best seconds per call over `repeats` timed batches."""
+    fn()
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / repeats or number >= 1 << 20:
+            break
+        number *= 2
+    runs = [elapsed / number]
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        runs.append((time.perf_counter() - start) / number)
+    return statistics.median(runs), min(runs)
+
+
+def set_grid(game, fraction, state, crop_type=None):
+    """Plant `fraction` of the farm (cycling crop types) and force every crop to `state`."""
+    sim = game.sim
+    sim.reset_grid()
+    tiles = [(r, c) for r in range(sim.grid_size) for c in range(sim.grid_size)]
+    for i, (row, col) in enumerate(tiles[:round(len(tiles) * fraction)]):
+        seed_type = crop_type or SEED_TYPES[i % len(SEED_TYPES)]
+        sim.seeds[CROP_IDS[seed_type]] += 1
+        sim.plant(row, col)
+        if sim.backend == "numpy":
+            sim.crop_states[row, col] = STATE_NAMES.index(state)
+        else:
+            sim.crops[row][col].state = STATE_NAMES.index(state)
+    sim.reindex()
+
+
+class Suite:
+    def __init__(self, name_filter=None, min_time=MIN_TIME):
+        self.name_filter = name_filter
+        self.min_time = min_time
+        self.results = {}
+
+    def run(self, name, fn, unit="op"):
+        if self.name_filter and self.name_filter not in name:
+            return
+        median, best = measure(fn, self.min_time)
+        self.results[name] = {"us_per_op": median * 1e6, "best_us": best * 1e6,
+                              "per_sec": 1 / median if median else float("inf"), "unit": unit}
+        print(f"{name:<44}{median * 1e6:12.1f} us{1 / median:14,.1f} {unit}/s", flush=True)
+
+
+def bench_rendering(suite, game):
+    game.update_cached_text()
+    game.draw_background()
+    for fraction, label in [(0, "empty"), (0.5, "half"), (1, "full")]:
+        for state in (STATES if fraction else ["-"]):
+            if fraction:
+                set_grid(game, fraction, state)
+            else:
+                game.sim.reset_grid()
+            suite.run(f"draw_farm/{label}/{state}" if fraction else "draw_farm/empty", game.draw_farm, "frame")
+    scratch = pygame.Surface((game.TILE_SIZE, game.TILE_SIZE))
+    for crop_type in SEED_TYPES:
+        def draw_all_states(crop_id=CROP_IDS[crop_type]):
+            for state in STATES:
+                game.draw_growth_stage(0, 0, crop_id, STATE_NAMES.index(state), scratch)
+        suite.run(f"draw_growth_stage/{crop_type}", draw_all_states, "3 states")
+    for collapsed in (False, True):
+        game.shop_collapsed = collapsed
+        suite.run(f"draw_shop/{'collapsed' if collapsed else 'expanded'}", game.draw_shop, "frame")
+    game.shop_collapsed = False
+    set_grid(game, 1, "sprout")
+    suite.run("draw_scene/full sprout grid", game.draw_scene, "frame")
+    # Modal screens over the same grid
+    for modal in ("show_instructions", "show_scoreboard", "show_game_over"):
+        setattr(game, modal, True)
+        suite.run(f"draw_scene/{modal[len('show_'):]}", game.draw_scene, "frame")
+        setattr(game, modal, False)
+
+
+def bench_simulation(suite, game):
+    sim = game.sim
+    set_grid(game, 1, "sprout")
+    suite.run("update_crops/full grid, nothing due", sim.update_crops)
+
+    def grow_cycle():
+        # Plant the whole farm, then sprout, ripen and harvest it on a fake clock
+        set_grid(game, 1, "seed", "corn")
+        later = sim.clock() + 100
+        sim.update_crops(later)
+        sim.update_crops(later)
+        sim.harvest_all()
+    suite.run("update_crops/plant-grow-harvest cycle", grow_cycle, "cycle")
+
+    suite.run("update_cached_text/unchanged", game.update_cached_text)
+
+    def changing_text():
+        sim.coins += 1
+        game.update_cached_text()
+    suite.run("update_cached_text/coins changing", changing_text)
+
+
+def write_score_file(path, lines):
+    with open(path, "w") as f:
+        f.writelines(f"player{i},{(i * 7919) % 100000}\n" for i in range(lines))
+
+
+def bench_scores(suite, game, max_lines):
+    lines = 100
+    with tempfile.TemporaryDirectory() as tmp:
+        while lines <= max_lines:
+            path = os.path.join(tmp, f"scores_{lines}.txt")
+            write_score_file(path, lines)
+            suite.run(f"load_scores/{lines} lines", lambda: load_scores(path), "load")
+
+            def open_store():
+                ScoreStore(path).close()
+            suite.run(f"ScoreStore load/{lines} lines", open_store, "load")
+
+            store = game.score_store = ScoreStore(path)
+            store.wait_loaded()
+
+            def save_and_flush():
+                # flush() waits for the log append (and any compaction it
+                # triggers), so this times the write, not just the insert
+                game.save_score_and_rank("bench", 5000)
+                store.flush()
+            suite.run(f"save_score_and_rank/{lines} lines", save_and_flush, "save")
+            store.close()
+            lines *= 10
+
+
+def compare(results, baseline, threshold):
+    """Print per-benchmark ratios against a baseline; returns the regressed names."""
+    regressions = []
+    print(f"\n{'benchmark':<44}{'baseline':>12}{'now':>12}{'change':>9}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before, now = baseline[name]["us_per_op"], result["us_per_op"]
+        change = now / before - 1 if before else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<44}{before:10.1f}us{now:10.1f}us{change:+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless farm game benchmarks")
+    parser.add_argument("--out", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against a results JSON file")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown before failing")
+    parser.add_argument("--filter", help="only run benchmarks whose name contains this")
+    parser.add_argument("--max-lines", type=int, default=10 ** 6, help="largest score file to benchmark")
+    parser.add_argument("--min-time", type=float, default=MIN_TIME, help="seconds per benchmark")
+    args, game_args = parser.parse_known_args()
+
+    game = load_game(game_args)
+    real_store = game.score_store
+    suite = Suite(args.filter, args.min_time)
+    try:
+        bench_rendering(suite, game)
+        bench_simulation(suite, game)
+        bench_scores(suite, game, args.max_lines)
+    finally:
+        real_store.close()
+        pygame.quit()
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "game_args": game_args,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": suite.results,
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        if compare(suite.results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
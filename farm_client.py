@@ -0,0 +1,103 @@
+"""Blocking client for the farm session server, for bots and front-ends.
+
+    client = FarmClient()
+    session = client.open(coins=500)
+    client.buy(session, "corn")
+    client.click(session, 0, 0)
+    print(client.state(session)["coins"])
+
+Each FarmClient holds one connection. With `direct=True` a session's
+requests go straight to the shard that hosts it instead of through the
+front process.
+"""
+import json
+import socket
+
+from farm_server import DEFAULT_HOST, DEFAULT_PORT
+
+REQUEST_TIMEOUT = 2.0
+
+
+class FarmServerError(Exception):
+    """The server answered a request with an error."""
+
+
+class FarmClient:
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=REQUEST_TIMEOUT, direct=False):
+        self.timeout = timeout
+        self.direct = direct
+        self._front = self._connect((host, port))
+        # Shard address -> connection, and session -> shard address, for direct mode
+        self._shards = {}
+        self._routes = {}
+
+    def _connect(self, address):
+        sock = socket.create_connection(address, timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock, sock.makefile("rb")
+
+    def _connection(self, session):
+        address = self._routes.get(session)
+        if address is None:
+            return self._front
+        conn = self._shards.get(address)
+        if conn is None:
+            host, _, port = address.rpartition(":")
+            conn = self._shards[address] = self._connect((host, int(port)))
+        return conn
+
+    def request(self, payload):
+        sock, reader = self._connection(payload.get("session"))
+        sock.sendall(json.dumps(payload).encode() + b"\n")
+        line = reader.readline()
+        if not line:
+            raise ConnectionError("farm server closed the connection")
+        response = json.loads(line)
+        if "error" in response:
+            raise FarmServerError(response["error"])
+        return response
+
+    def call(self, session, op, **args):
+        return self.request({"op": op, "session": session, **args})
+
+    # Sessions
+
+    def open(self, **settings):
+        """Start a game (coins, grid_size, quotas, day_duration, backend); returns its session ID."""
+        response = self.request({"op": "open", **settings})
+        if self.direct:
+            self._routes[response["session"]] = response["shard"]
+        return response["session"]
+
+    def state(self, session):
+        return self.call(session, "state")
+
+    def buy(self, session, crop):
+        return self.call(session, "buy", crop=crop)["bought"]
+
+    def click(self, session, row, col):
+        return self.call(session, "click", row=row, col=col)["result"]
+
+    def harvest_all(self, session):
+        return self.call(session, "harvest_all")["earned"]
+
+    def fill(self, session):
+        return self.call(session, "fill")["planted"]
+
+    def autoplay(self, session):
+        return self.call(session, "autoplay")
+
+    def reset(self, session):
+        self.call(session, "reset")
+
+    def close_session(self, session):
+        self.call(session, "close")
+        self._routes.pop(session, None)
+
+    def stats(self, reset=False):
+        return self.request({"op": "stats", "reset": reset})
+
+    def close(self):
+        for sock, _ in [self._front, *self._shards.values()]:
+            sock.close()
+        self._shards.clear()
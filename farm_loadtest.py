@@ -0,0 +1,134 @@
+"""Load generator for the farm session server: many bot-played games at once.
+
+Opens --sessions games and drives each with a bot that, every --think
+seconds (jittered), runs the autoplay step (harvest all, buy the cheapest
+seeds, fill the farm) and starts over when its game ends. Bots share
+--connections pipelined connections. Reports request round trips and the
+server's own numbers: ticks per second, CPU cores busy, sessions per core
+and tick lateness (how long after its deadline a session was ticked).
+
+    python farm_loadtest.py --spawn --shards 4 --sessions 2000 --duration 20
+    python farm_loadtest.py --port 47475 --direct    # bypass the front process
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+from farm_server import DEFAULT_HOST, DEFAULT_PORT, ShardLink
+from frame_profiler import percentile
+from leaderboard_loadtest import wait_for_daemon
+
+
+async def request(link, payload):
+    response = json.loads(await link.request(json.dumps(payload).encode() + b"\n"))
+    if "error" in response:
+        raise RuntimeError(response["error"])
+    return response
+
+
+async def run_bot(link, session, deadline, think, rng, latencies):
+    games = 1
+    while True:
+        await asyncio.sleep(think * rng.uniform(0.5, 1.5))
+        if time.perf_counter() >= deadline:
+            return games
+        start = time.perf_counter()
+        state = await request(link, {"op": "autoplay", "session": session})
+        latencies.append(time.perf_counter() - start)
+        if state["finished"]:
+            await request(link, {"op": "reset", "session": session})
+            games += 1
+
+
+async def run_load(host, port, sessions, connections, duration, think, direct, settings, seed):
+    front = ShardLink(f"{host}:{port}")
+    await front.connect()
+    links = {}
+
+    async def link_for(address, i):
+        key = (address, i % connections)
+        if key not in links:
+            links[key] = ShardLink(address)
+            await links[key].connect()
+        return links[key]
+
+    opened = []
+    for i in range(sessions):
+        reply = await request(front, {"op": "open", **settings})
+        link = await link_for(reply["shard"] if direct else f"{host}:{port}", i)
+        opened.append((link, reply["session"]))
+    # Measure the steady state only, not the session setup
+    await request(front, {"op": "stats", "reset": True})
+
+    rng = random.Random(seed)
+    latencies = []
+    start = time.perf_counter()
+    games = await asyncio.gather(*(
+        run_bot(link, session, start + duration, think, random.Random(rng.random()), latencies)
+        for link, session in opened
+    ))
+    elapsed = time.perf_counter() - start
+    stats = await request(front, {"op": "stats"})
+    for link, session in opened:
+        await request(link, {"op": "close", "session": session})
+    return elapsed, sum(games), latencies, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Farm session server load test")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--connections", type=int, default=8,
+                        help="connections the bots share (per shard with --direct)")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds of load")
+    parser.add_argument("--think", type=float, default=0.5, help="mean seconds between a bot's moves")
+    parser.add_argument("--day-duration", type=float, default=2.0)
+    parser.add_argument("--grid-size", type=int, default=7)
+    parser.add_argument("--direct", action="store_true", help="send session requests straight to their shard")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--spawn", action="store_true", help="run a throwaway server first")
+    parser.add_argument("--shards", type=int, default=os.cpu_count(), help="shards for --spawn")
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn:
+        server = subprocess.Popen([
+            sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "farm_server.py"),
+            "--host", args.host, "--port", str(args.port), "--shards", str(args.shards),
+        ], stdout=subprocess.DEVNULL)
+    settings = {"day_duration": args.day_duration, "grid_size": args.grid_size}
+    try:
+        wait_for_daemon(args.host, args.port)
+        elapsed, games, latencies, stats = asyncio.run(run_load(
+            args.host, args.port, args.sessions, args.connections, args.duration, args.think, args.direct,
+            settings, args.seed,
+        ))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    latencies.sort()
+    lateness, tick = stats["tick_lateness_ms"], stats["tick_ms"]
+    per_core = stats["sessions_per_core"]
+    print(f"{args.sessions} sessions on {stats['shards']} shards for {elapsed:.1f}s: {games} games, "
+          f"{len(latencies) / elapsed:,.0f} moves/s")
+    print(f"moves: p50 {percentile(latencies, 50) * 1000:.2f} ms, p99 {percentile(latencies, 99) * 1000:.2f} ms "
+          f"round trip")
+    print(f"ticks: {stats['ticks_per_sec']:,.0f}/s, {tick['p50']:.3f} ms p50, {tick['p99']:.3f} ms p99 each; "
+          f"lateness p50 {lateness['p50']:.2f} ms, p99 {lateness['p99']:.2f} ms, max {lateness['max']:.2f} ms")
+    print(f"CPU: {stats['cores_busy']:.2f} cores busy, "
+          f"{'-' if per_core is None else f'{per_core:,.0f}'} sessions per core at this load")
+    for shard in stats["per_shard"]:
+        print(f"  shard {shard['shard']} (pid {shard['pid']}): {shard['sessions']} sessions, {shard['ticks']} ticks, "
+              f"{shard['requests']} requests, {shard['cpu_share']:.0%} of a core")
+
+
+if __name__ == "__main__":
+    main()
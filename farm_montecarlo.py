@@ -0,0 +1,214 @@
+"""Monte Carlo evaluator for buying/planting strategies.
+
+Plays many full headless games of FarmSimulation on a TickClock, with the
+player's visits to the farm at random times and with a random number of
+clicks each visit, and reports win rate, final-coin distribution and games
+per second per core. Games are spread over a process pool.
+
+A strategy is a function `strategy(sim, clicks, rng, max_gap)` that may
+spend up to `clicks` clicks (shop purchases and tile clicks) on the
+simulation; `max_gap` is the longest the player may wait before the next
+visit. Built-in strategies are listed in STRATEGIES; any other one can be
+given as "module:function".
+
+    python farm_montecarlo.py --games 5000 --strategy greedy
+"""
+import argparse
+import importlib
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from farm_sim import (CROP_COSTS, CROP_NAMES, DAILY_QUOTAS, DAY_DURATION, HARVEST_REWARD, READY, SEED_TO_SPROUT,
+                      SPROUT_TO_READY, START_COINS, FarmSimulation, TickClock)
+
+FRAME_DT = 1 / 60
+# Random player timing: seconds between visits, clicks per visit
+MIN_GAP = 0.2
+MAX_GAP = 1.0
+MAX_CLICKS = 8
+CHUNK_GAMES = 64
+
+
+def _click_tiles(sim, clicks, buy):
+    """Click tiles in reading order, like a player sweeping the field.
+
+    `buy()` is called whenever an empty tile is reached with no seeds in
+    stock; it returns False to stop buying. Returns the clicks left over.
+    """
+    for row in range(sim.grid_size):
+        for col in range(sim.grid_size):
+            if clicks <= 0:
+                return 0
+            crop = sim.crop_at(row, col)
+            if crop is None:
+                if sim.total_seeds() == 0:
+                    if clicks < 2 or not buy():
+                        continue
+                    clicks -= 1
+                sim.click_tile(row, col)
+                clicks -= 1
+            elif crop[1] == READY:
+                sim.click_tile(row, col)
+                clicks -= 1
+    return clicks
+
+
+def cheapest_first(sim, clicks, rng, max_gap):
+    """The farm click rule as players use it: buy the cheapest seed, plant, harvest."""
+    # Crop IDs run cheapest first
+    _click_tiles(sim, clicks, lambda: sim.buy_seed(1))
+
+
+def _harvests(sim, now):
+    """(ripe time, reward) for every crop in the field; ready ones count as ripe now."""
+    harvests = []
+    for row in range(sim.grid_size):
+        for col in range(sim.grid_size):
+            crop = sim.crop_at(row, col)
+            if crop is None:
+                continue
+            crop_id = crop[0]
+            ripe = sim.plant_time[row][col] + max(SEED_TO_SPROUT[crop_id], SPROUT_TO_READY[crop_id])
+            harvests.append((now if crop[1] == READY else ripe, HARVEST_REWARD[crop_id]))
+    return harvests
+
+
+def greedy_profit(sim, clicks, rng, max_gap):
+    """Buy the affordable seed with the best profit per second that can still ripen.
+
+    Only buys when every quota still to come is met by the coins left plus
+    the harvests due before it. When a quota is out of reach that way, it
+    still buys seeds that ripen in time for it, since each one brings the
+    quota closer.
+    """
+    now = sim.clock()
+    game_end = sim.day_start_time + sim.day_duration * len(sim.daily_quotas)
+    # (profit per second, crop ID, ripe time), best first
+    crops = []
+    for crop_id in range(1, len(CROP_NAMES)):
+        ripe_after = max(SEED_TO_SPROUT[crop_id], SPROUT_TO_READY[crop_id])
+        profit = HARVEST_REWARD[crop_id] - CROP_COSTS[crop_id]
+        if now + ripe_after >= game_end or profit <= 0:
+            continue
+        crops.append((profit / ripe_after, crop_id, now + ripe_after))
+    crops.sort(reverse=True)
+    # (deadline, quota) per day left; a harvest counts only if there is time to come back for it
+    day_end = now + sim.day_time_left(now)
+    checks = [(day_end + day * sim.day_duration - max_gap, quota)
+              for day, quota in enumerate(sim.daily_quotas[sim.current_day:])]
+    # Coins held at each deadline if nothing more is bought; harvesting
+    # during the sweep doesn't change them
+    harvests = _harvests(sim, now)
+    expected = [sim.coins + sum(reward for ripe, reward in harvests if ripe < deadline) for deadline, _ in checks]
+
+    def buy():
+        for _, crop_id, ripe in crops:
+            cost, reward = CROP_COSTS[crop_id], HARVEST_REWARD[crop_id]
+            after = [coins - cost + (reward if ripe < deadline else 0) for coins, (deadline, _) in zip(expected, checks)]
+            if all(left >= quota or (coins < quota and ripe < deadline)
+                   for left, coins, (deadline, quota) in zip(after, expected, checks)) and sim.buy_seed(crop_id):
+                expected[:] = after
+                return True
+        return False
+
+    _click_tiles(sim, clicks, buy)
+
+
+STRATEGIES = {
+    "cheapest": cheapest_first,
+    "greedy": greedy_profit,
+}
+
+
+def resolve_strategy(name):
+    if name in STRATEGIES:
+        return STRATEGIES[name]
+    module_name, _, attr = name.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def play_game(strategy, seed, coins=START_COINS, daily_quotas=DAILY_QUOTAS, day_duration=DAY_DURATION,
+              dt=FRAME_DT, min_gap=MIN_GAP, max_gap=MAX_GAP, max_clicks=MAX_CLICKS):
+    """One full game; returns (won, final coins, days completed)."""
+    rng = random.Random(seed)
+    clock = TickClock(step=dt)
+    sim = FarmSimulation(clock=clock, coins=coins, daily_quotas=daily_quotas, day_duration=day_duration)
+    next_visit = rng.uniform(0, max_gap)
+    while not sim.finished:
+        now = clock.advance()
+        # Same order as the game loop: input first, then the logic step
+        if now >= next_visit:
+            strategy(sim, rng.randint(1, max_clicks), rng, max_gap)
+            next_visit = now + rng.uniform(min_gap, max_gap)
+        sim.tick(now)
+    return sim.game_won, sim.coins, sim.current_day + sim.game_won
+
+
+def play_chunk(strategy_name, seeds, settings):
+    strategy = resolve_strategy(strategy_name)
+    start = time.perf_counter()
+    results = [play_game(strategy, seed, **settings) for seed in seeds]
+    return results, time.perf_counter() - start
+
+
+def evaluate(strategy_name, games, seed=0, workers=None, **settings):
+    """Play `games` games over a process pool; returns (results, wall secs, busy secs)."""
+    seeds = list(range(seed, seed + games))
+    chunks = [seeds[i:i + CHUNK_GAMES] for i in range(0, games, CHUNK_GAMES)]
+    results = []
+    busy = 0.0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(play_chunk, strategy_name, chunk, settings) for chunk in chunks]
+        for future in futures:
+            chunk_results, chunk_secs = future.result()
+            results.extend(chunk_results)
+            busy += chunk_secs
+    return results, time.perf_counter() - start, busy
+
+
+def summarize(results, wall, busy):
+    coins = sorted(c for _, c, _ in results)
+    wins = sum(1 for won, _, _ in results if won)
+    days = [0] * (max(d for _, _, d in results) + 1)
+    for _, _, d in results:
+        days[d] += 1
+    deciles = statistics.quantiles(coins, n=10) if len(coins) > 1 else coins * 9
+    lines = [
+        f"games: {len(results)}, win rate: {wins / len(results):.1%}",
+        f"final coins: min {coins[0]}, p10 {deciles[0]:.0f}, p50 {deciles[4]:.0f}, "
+        f"p90 {deciles[8]:.0f}, max {coins[-1]}, mean {statistics.fmean(coins):.1f}",
+        "days completed: " + ", ".join(f"{d}: {n}" for d, n in enumerate(days) if n),
+        f"{len(results) / wall:,.0f} games/sec wall, {len(results) / busy:,.0f} games/sec per core",
+    ]
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte Carlo farm strategy evaluator")
+    parser.add_argument("--strategy", default="cheapest", help=f"{', '.join(STRATEGIES)} or module:function")
+    parser.add_argument("--games", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--coins", type=int, default=START_COINS, help="starting coins")
+    parser.add_argument("--quotas", default=",".join(map(str, DAILY_QUOTAS)), help="comma-separated daily quotas")
+    parser.add_argument("--day-duration", type=float, default=DAY_DURATION)
+    parser.add_argument("--min-gap", type=float, default=MIN_GAP)
+    parser.add_argument("--max-gap", type=float, default=MAX_GAP)
+    parser.add_argument("--max-clicks", type=int, default=MAX_CLICKS)
+    args = parser.parse_args()
+
+    resolve_strategy(args.strategy)
+    settings = {
+        "coins": args.coins,
+        "daily_quotas": [int(q) for q in args.quotas.split(",")],
+        "day_duration": args.day_duration,
+        "min_gap": args.min_gap,
+        "max_gap": args.max_gap,
+        "max_clicks": args.max_clicks,
+    }
+    print(f"strategy: {args.strategy}")
+    print(summarize(*evaluate(args.strategy, args.games, args.seed, args.workers, **settings)))
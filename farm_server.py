@@ -0,0 +1,510 @@
+"""Session host: many independent farm games per process, sharded across cores.
+
+Every session is its own FarmSimulation on the wall clock, with its own
+coins, seeds, grid, plant times, day clock and quota progress. Sessions are
+spread over shard processes. Each shard runs an asyncio loop that serves
+requests for its sessions and ticks them. A session is only ticked when its
+next growth transition or day end is due, from one heap per shard, so idle
+farms cost nothing between deadlines.
+
+The front process listens on one local socket and routes each request to
+the session's shard. "open" places a new session on the least-loaded shard.
+It also returns that shard's own address, and a client may talk to the
+shard directly to skip the front hop.
+
+Protocol: one JSON object per line each way, answered in order.
+
+    {"op": "open", "coins": 500, "grid_size": 7, "quotas": [...], "day_duration": 2,
+     "backend": "lists"}                           -> {"session": "2.17", "shard": "127.0.0.1:40123"}
+    {"op": "state", "session": id}                 -> {"coins", "seeds", "day", "quota", "time_left",
+                                                       "crops": [[row, col, crop ID, state, age], ...],
+                                                       "game_over", "game_won"}
+    {"op": "buy", "session": id, "crop": "corn"}   -> {"bought": true, "coins": 495}
+    {"op": "click", "session": id, "row": 0, "col": 3} -> {"result": "plant" | "harvest" | null}
+    {"op": "harvest_all", "session": id}           -> {"earned": 36}
+    {"op": "fill", "session": id}                  -> {"planted": 12}
+    {"op": "autoplay", "session": id}              -> {"coins", "day", "finished"}  (farm_sim.autoplay_step)
+    {"op": "reset", "session": id}                 -> {"ok": true}
+    {"op": "close", "session": id}                 -> {"ok": true}
+    {"op": "stats", "reset": false}                -> {"sessions", "sessions_per_core", "tick_lateness_ms", ...}
+    {"op": "ping"}                                 -> {"ok": true}
+
+Run: python farm_server.py [--host 127.0.0.1] [--port 47475] [--shards N]
+"""
+import argparse
+import asyncio
+import heapq
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import time
+from collections import deque
+
+from farm_sim import (CROP_IDS, CROP_NAMES, DAILY_QUOTAS, DAY_DURATION, GRID_SIZE, START_COINS, autoplay_step,
+                      make_simulation)
+from frame_profiler import percentile
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 47475
+MAX_GRID_SIZE = 64
+# A crop only moves on once its growth time has strictly passed, so a session
+# due again at once is ticked this much later, like the game's next frame
+MIN_TICK_DELAY = 0.001
+# Sessions ticked per loop callback before requests get a turn
+TICK_BATCH = 256
+# Recent ticks kept per shard for the latency percentiles
+LATENCY_SAMPLES = 4096
+# Raw shard stats carry those samples, so shard links read longer lines than asyncio's 64 KiB default
+LINK_LINE_LIMIT = 1 << 20
+
+
+class Session:
+    __slots__ = ("sim", "due")
+
+    def __init__(self, sim):
+        self.sim = sim
+        self.due = None
+
+
+def _number(request, key, default=None):
+    """A finite number from the request; JSON also carries 1e999 (inf) and NaN."""
+    value = request.get(key, default)
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f"{key} must be a finite number, got {value!r}")
+    return value
+
+
+def _int(request, key, default=None):
+    value = _number(request, key, default)
+    if value != int(value):
+        raise ValueError(f"{key} must be a whole number, got {value!r}")
+    return int(value)
+
+
+def next_due(sim):
+    """Wall time the session next needs a tick: a growth transition or its day end."""
+    if sim.finished:
+        return None
+    day_end = sim.day_start_time + (sim.current_day + 1) * sim.day_duration
+    growth = sim.next_transition_time()
+    return day_end if growth is None else min(day_end, growth)
+
+
+class Shard:
+    """One process's sessions, their tick scheduler and its metrics."""
+
+    def __init__(self, index):
+        self.index = index
+        self.address = None
+        self.sessions = {}
+        self._ids = itertools.count(1)
+        self._heap = []
+        self._seq = itertools.count()
+        self._timer = None
+        self._timer_due = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.ticks = 0
+        self.requests = 0
+        self.lateness = deque(maxlen=LATENCY_SAMPLES)   # microseconds past due when ticked
+        self.tick_time = deque(maxlen=LATENCY_SAMPLES)  # microseconds spent in sim.tick
+        self._stats_wall = time.perf_counter()
+        self._stats_cpu = time.process_time()
+
+    # Tick scheduler
+
+    def schedule(self, session, now=None):
+        """(Re)queue a session at its next deadline; call after anything that changes it."""
+        if now is None:
+            now = time.time()
+        due = next_due(session.sim)
+        if due is not None and due <= now:
+            due = now + MIN_TICK_DELAY
+        if due == session.due:
+            return
+        # Superseded heap entries are dropped when they surface
+        session.due = due
+        if due is None:
+            return
+        heapq.heappush(self._heap, (due, next(self._seq), session))
+        if self._timer_due is None or due < self._timer_due:
+            self._arm(due, now)
+
+    def _arm(self, due, now):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer_due = due
+        self._timer = asyncio.get_running_loop().call_later(max(0.0, due - now), self._run_due)
+
+    def _run_due(self):
+        self._timer = self._timer_due = None
+        heap = self._heap
+        now = time.time()
+        for _ in range(TICK_BATCH):
+            if not heap or heap[0][0] > now:
+                break
+            due, _, session = heapq.heappop(heap)
+            if session.due != due:
+                continue
+            session.due = None
+            start = time.perf_counter()
+            session.sim.tick(now)
+            self.tick_time.append(round((time.perf_counter() - start) * 1e6))
+            self.lateness.append(round((now - due) * 1e6))
+            self.ticks += 1
+            self.schedule(session, now)
+        while heap and heap[0][2].due != heap[0][0]:
+            heapq.heappop(heap)
+        # Sessions rescheduled above may have armed the timer past what is left in the heap
+        if heap and (self._timer_due is None or heap[0][0] < self._timer_due):
+            self._arm(heap[0][0], now)
+
+    # Requests
+
+    def open(self, request):
+        grid_size = _int(request, "grid_size", GRID_SIZE)
+        if not 1 <= grid_size <= MAX_GRID_SIZE:
+            raise ValueError(f"grid_size must be 1-{MAX_GRID_SIZE}")
+        quotas = request.get("quotas", DAILY_QUOTAS)
+        if not isinstance(quotas, list) or not quotas:
+            raise ValueError("quotas must be a non-empty list")
+        quotas = [_int({"quota": q}, "quota") for q in quotas]
+        day_duration = float(_number(request, "day_duration", DAY_DURATION))
+        if day_duration <= 0:
+            raise ValueError("day_duration must be positive")
+        coins = _int(request, "coins", START_COINS)
+        backend = request.get("backend", "lists")
+        if backend not in ("lists", "numpy"):
+            raise ValueError(f"unknown backend {backend!r}")
+        sim = make_simulation(backend, clock=time.time, coins=coins,
+                              grid_size=grid_size, daily_quotas=quotas, day_duration=day_duration)
+        session_id = f"{self.index}.{next(self._ids)}"
+        session = self.sessions[session_id] = Session(sim)
+        self.schedule(session)
+        return {"session": session_id, "shard": self.address}
+
+    def session(self, request):
+        session = self.sessions.get(request.get("session"))
+        if session is None:
+            raise ValueError(f"no session {request.get('session')!r}")
+        return session
+
+    def dispatch(self, request):
+        op = request.get("op")
+        if op == "open":
+            return self.open(request)
+        if op == "stats":
+            stats = self.stats()
+            if request.get("reset"):
+                self.reset_stats()
+            return stats if request.get("raw") else summarize([stats])
+        if op == "ping":
+            return {"ok": True}
+        session = self.session(request)
+        sim = session.sim
+        if op == "state":
+            response = session_state(sim)
+        elif op == "buy":
+            crop = request.get("crop")
+            crop_id = CROP_IDS.get(crop, 0) if isinstance(crop, str) else _int(request, "crop")
+            if not 1 <= crop_id < len(CROP_NAMES):
+                raise ValueError(f"no crop {crop!r}")
+            response = {"bought": sim.buy_seed(crop_id), "coins": sim.coins}
+        elif op == "click":
+            row, col = _int(request, "row"), _int(request, "col")
+            if not (0 <= row < sim.grid_size and 0 <= col < sim.grid_size):
+                raise ValueError(f"tile ({row}, {col}) is off the farm")
+            response = {"result": sim.click_tile(row, col)}
+        elif op == "harvest_all":
+            response = {"earned": sim.harvest_all()}
+        elif op == "fill":
+            response = {"planted": sim.fill_empty()}
+        elif op == "autoplay":
+            autoplay_step(sim)
+            response = {"coins": sim.coins, "day": sim.current_day, "finished": sim.finished}
+        elif op == "reset":
+            sim.reset()
+            response = {"ok": True}
+        elif op == "close":
+            del self.sessions[request["session"]]
+            # Its heap entry no longer matches and is skipped
+            session.due = None
+            return {"ok": True}
+        else:
+            return {"error": f"unknown op {op!r}"}
+        self.schedule(session)
+        return response
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self.requests += 1
+                try:
+                    reply = json.dumps(self.dispatch(json.loads(line))).encode()
+                except Exception as e:
+                    # A bad request gets an error; it must never take the shard's sessions down with it
+                    reply = json.dumps({"error": str(e) or type(e).__name__}).encode()
+                writer.write(reply + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def stats(self):
+        wall = time.perf_counter() - self._stats_wall
+        return {
+            "shard": self.index,
+            "pid": os.getpid(),
+            "sessions": len(self.sessions),
+            "ticking": sum(1 for session in self.sessions.values() if session.due is not None),
+            "ticks": self.ticks,
+            "requests": self.requests,
+            "wall": wall,
+            "cpu": time.process_time() - self._stats_cpu,
+            "lateness": list(self.lateness),
+            "tick_time": list(self.tick_time),
+        }
+
+    async def serve(self, host, started):
+        server = await asyncio.start_server(self.handle, host, 0, limit=LINK_LINE_LIMIT)
+        self.address = "{}:{}".format(*server.sockets[0].getsockname()[:2])
+        started.send(self.address)
+        started.close()
+        async with server:
+            await server.serve_forever()
+
+
+def session_state(sim):
+    now = sim.clock()
+    return {
+        "coins": sim.coins,
+        "seeds": list(sim.seeds),
+        "day": sim.current_day,
+        "quota": sim.current_quota(),
+        "time_left": sim.day_time_left(now),
+        "crops": [[row, col, crop_id, state, now - sim.plant_time[row][col]]
+                  for row, col, (crop_id, state) in sim.crops_in(0, sim.grid_size, 0, sim.grid_size)],
+        "game_over": sim.game_over,
+        "game_won": sim.game_won,
+    }
+
+
+def summarize(shard_stats):
+    """Combine raw per-shard stats into the "stats" reply.
+
+    `sessions_per_core` is how many sessions one fully busy core would carry
+    at the current per-session load: sessions over the CPU cores in use,
+    counting the front process when it is included.
+    """
+    lateness = sorted(t for stats in shard_stats for t in stats["lateness"])
+    tick_time = sorted(t for stats in shard_stats for t in stats["tick_time"])
+    sessions = sum(stats["sessions"] for stats in shard_stats)
+    cores_busy = sum(stats["cpu"] / stats["wall"] for stats in shard_stats if stats["wall"] > 0)
+    wall = max((stats["wall"] for stats in shard_stats), default=0.0)
+    ticks = sum(stats["ticks"] for stats in shard_stats)
+    return {
+        "shards": sum(1 for stats in shard_stats if stats["shard"] != "front"),
+        "sessions": sessions,
+        "ticking": sum(stats["ticking"] for stats in shard_stats),
+        "ticks_per_sec": ticks / wall if wall else 0.0,
+        "cores_busy": cores_busy,
+        "sessions_per_core": sessions / cores_busy if cores_busy else None,
+        "tick_lateness_ms": {f"p{pct}": percentile(lateness, pct) / 1000 for pct in (50, 99)}
+                            | {"max": lateness[-1] / 1000 if lateness else 0.0},
+        "tick_ms": {f"p{pct}": percentile(tick_time, pct) / 1000 for pct in (50, 99)},
+        "per_shard": [{key: stats[key] for key in ("shard", "pid", "sessions", "ticks", "requests")}
+                      | {"cpu_share": stats["cpu"] / stats["wall"] if stats["wall"] else 0.0}
+                      for stats in shard_stats],
+    }
+
+
+def run_shard(index, host, started):
+    """Shard process entry point."""
+    try:
+        asyncio.run(Shard(index).serve(host, started))
+    except KeyboardInterrupt:
+        pass
+
+
+class ShardLink:
+    """The front's connection to one shard; requests are answered in order.
+
+    If the connection drops, waiting requests fail with ConnectionError and
+    the next request reconnects; while the shard can't be reached, requests
+    fail at once with ConnectionError.
+    """
+
+    def __init__(self, address):
+        self.address = address
+        self.sessions = 0
+        self._pending = deque()
+        self._writer = None
+
+    @property
+    def connected(self):
+        return self._writer is not None
+
+    async def connect(self):
+        host, _, port = self.address.rpartition(":")
+        reader, writer = await asyncio.open_connection(host, int(port), limit=LINK_LINE_LIMIT)
+        self._writer = writer
+        asyncio.get_running_loop().create_task(self._read_replies(reader, writer))
+
+    async def _read_replies(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self._pending.popleft().set_result(line)
+        except (OSError, ValueError):
+            # Reset, or a reply over the line limit: the stream can't be trusted any more
+            pass
+        finally:
+            writer.close()
+            if self._writer is writer:
+                self._writer = None
+            while self._pending:
+                self._pending.popleft().set_exception(ConnectionError(f"shard {self.address} went away"))
+
+    async def request(self, line):
+        if self._writer is None:
+            try:
+                await self.connect()
+            except OSError as e:
+                raise ConnectionError(f"shard {self.address} is down: {e}") from e
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(future)
+        self._writer.write(line)
+        await self._writer.drain()
+        return await future
+
+
+class FarmServer:
+    """Front door: places sessions on shards and forwards their requests."""
+
+    def __init__(self, shard_addresses):
+        self.links = [ShardLink(address) for address in shard_addresses]
+        self.requests = 0
+        self._stats_wall = time.perf_counter()
+        self._stats_cpu = time.process_time()
+
+    def stats(self):
+        """The front's own load, as a shard-like row with no sessions or ticks."""
+        return {"shard": "front", "pid": os.getpid(), "sessions": 0, "ticking": 0, "ticks": 0,
+                "requests": self.requests, "wall": time.perf_counter() - self._stats_wall,
+                "cpu": time.process_time() - self._stats_cpu, "lateness": [], "tick_time": []}
+
+    async def route(self, line):
+        request = json.loads(line)
+        op = request.get("op")
+        if op == "ping":
+            return {"ok": True}
+        if op == "stats":
+            replies = await asyncio.gather(*(
+                link.request(json.dumps({"op": "stats", "raw": True, "reset": bool(request.get("reset"))}).encode()
+                             + b"\n")
+                for link in self.links
+            ), return_exceptions=True)
+            front = self.stats()
+            if request.get("reset"):
+                self.requests = 0
+                self._stats_wall, self._stats_cpu = time.perf_counter(), time.process_time()
+            shard_stats = [json.loads(reply) for reply in replies if isinstance(reply, bytes)]
+            summary = summarize(shard_stats + [front])
+            summary["shards_down"] = len(replies) - len(shard_stats)
+            return summary
+        if op == "open":
+            # Least-loaded shard first; one that is down is skipped
+            for link in sorted(self.links, key=lambda link: link.sessions):
+                try:
+                    reply = await link.request(line)
+                except ConnectionError:
+                    continue
+                if "session" in json.loads(reply):
+                    link.sessions += 1
+                return reply
+            return {"error": "no shard is up"}
+        shard, _, _ = str(request.get("session", "")).partition(".")
+        if not shard.isdigit() or int(shard) >= len(self.links):
+            return {"error": f"no session {request.get('session')!r}"}
+        link = self.links[int(shard)]
+        reply = await link.request(line)
+        if op == "close" and json.loads(reply).get("ok"):
+            link.sessions -= 1
+        return reply
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self.requests += 1
+                try:
+                    response = await self.route(line)
+                except Exception as e:
+                    # Including ConnectionError from a shard that went away; the client connection stays up
+                    response = {"error": str(e) or type(e).__name__}
+                # Shard replies are passed through as they came
+                writer.write(response if isinstance(response, bytes) else json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT, started=None):
+        for link in self.links:
+            await link.connect()
+        server = await asyncio.start_server(self.handle, host, port)
+        if started is not None:
+            started.set()
+        async with server:
+            await server.serve_forever()
+
+
+def start_shards(count, host=DEFAULT_HOST):
+    """Start `count` shard processes; returns (processes, their addresses)."""
+    processes, addresses = [], []
+    for index in range(count):
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(target=run_shard, args=(index, host, sender),
+                                          name=f"farm-shard-{index}", daemon=True)
+        process.start()
+        sender.close()
+        processes.append((process, receiver))
+    for process, receiver in processes:
+        addresses.append(receiver.recv())
+        receiver.close()
+    return [process for process, _ in processes], addresses
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-session farm game server")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--shards", type=int, default=os.cpu_count(), help="shard processes (default: one per core)")
+    args = parser.parse_args()
+
+    processes, addresses = start_shards(args.shards, args.host)
+    print(f"Farm server on {args.host}:{args.port}, {args.shards} shards ({', '.join(addresses)})")
+    try:
+        asyncio.run(FarmServer(addresses).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            process.terminate()
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
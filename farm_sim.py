@@ -0,0 +1,435 @@
+"""Headless farm rules: coins, seeds, crops, days and quotas.
+
+Nothing in here touches pygame, so the game can be stepped on a fake clock
+for soak tests and throughput numbers. The pygame script only renders this
+state and turns clicks/keys into calls on it.
+"""
+import heapq
+import itertools
+import time
+from array import array
+
+from crop_pack import load_pack
+
+GRID_SIZE = 7
+
+# Day system - 8 days (0-7)
+DAY_DURATION = 2
+DAILY_QUOTAS = [20, 30, 50, 80, 120, 170, 230]
+
+# Crop registry, filled from the crop pack by install_crops(). Every per-crop
+# table is a list indexed by integer crop ID, cheapest first from 1; ID 0
+# means "no crop". The containers are updated in place, so modules that
+# imported them keep seeing the current pack.
+SEED_TYPES = []         # auto-plant order: cheapest seeds first
+SHOP_COSTS = {}         # name -> cost
+GROWTH_TIMES = {}       # name -> {"seed_to_sprout", "sprout_to_ready", "harvest"}
+CROP_NAMES = [None]
+CROP_IDS = {}
+CROP_COSTS = [0]
+SEED_TO_SPROUT = [float("inf")]
+SPROUT_TO_READY = [float("inf")]
+HARVEST_REWARD = [0]
+crop_tables = None      # the installed crop_pack.CropTables
+# Called with the old-to-new crop ID map after every install
+crop_listeners = []
+
+# Tile states; a crop in state S moves on once STAGE_TIMES[S][crop ID] seconds have passed since planting
+EMPTY, SEED, SPROUT, READY = range(4)
+STATE_NAMES = [None, "seed", "sprout", "ready"]
+STAGE_TIMES = [None, SEED_TO_SPROUT, SPROUT_TO_READY, None]
+
+
+def install_crops(tables):
+    """Make a compiled crop pack the live registry.
+
+    Returns a list mapping each previously installed crop ID to its ID in
+    the new pack (0 if the crop was removed), for FarmSimulation.remap_crops.
+    """
+    global crop_tables
+    old_names = CROP_NAMES[:]
+    SEED_TYPES[:] = tables.names[1:]
+    CROP_NAMES[:] = tables.names
+    CROP_IDS.clear()
+    CROP_IDS.update((name, crop_id) for crop_id, name in enumerate(tables.names) if name)
+    CROP_COSTS[:] = tables.costs
+    SEED_TO_SPROUT[:] = tables.seed_to_sprout
+    SPROUT_TO_READY[:] = tables.sprout_to_ready
+    HARVEST_REWARD[:] = tables.rewards
+    SHOP_COSTS.clear()
+    GROWTH_TIMES.clear()
+    for crop_id, name in enumerate(SEED_TYPES, 1):
+        SHOP_COSTS[name] = CROP_COSTS[crop_id]
+        GROWTH_TIMES[name] = {"seed_to_sprout": SEED_TO_SPROUT[crop_id],
+                              "sprout_to_ready": SPROUT_TO_READY[crop_id], "harvest": HARVEST_REWARD[crop_id]}
+    crop_tables = tables
+    new_ids = [0] + [CROP_IDS.get(name, 0) for name in old_names[1:]]
+    for listener in crop_listeners:
+        listener(new_ids)
+    return new_ids
+
+
+install_crops(load_pack())
+
+# Float tolerance when comparing growth deadlines against the clock
+DEADLINE_SLACK = 1e-9
+
+
+class Crop:
+    """A planted tile: crop ID and state code, in two slots instead of a dict."""
+
+    __slots__ = ("crop_id", "state")
+
+    def __init__(self, crop_id, state=SEED):
+        self.crop_id = crop_id
+        self.state = state
+
+
+START_COINS = 500
+# Coins after the Replay button restarts a game
+RESTART_COINS = 15
+
+
+class TickClock:
+    """Fake clock for headless runs: time only moves when advanced."""
+
+    def __init__(self, start=0.0, step=1 / 60):
+        self.now = start
+        self.step = step
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, dt=None):
+        self.now += self.step if dt is None else dt
+        return self.now
+
+
+class FarmSimulation:
+    """All game rules and state, advanced on an injected clock.
+
+    `clock` is any zero-argument callable returning seconds; the real game
+    passes `time.time`, headless runs pass a `TickClock`.
+    """
+
+    # How the grid is stored, as named to make_simulation()
+    backend = "lists"
+
+    def __init__(self, clock=time.time, coins=START_COINS, grid_size=GRID_SIZE,
+                 daily_quotas=DAILY_QUOTAS, day_duration=DAY_DURATION):
+        self.clock = clock
+        self.grid_size = grid_size
+        self.daily_quotas = list(daily_quotas)
+        self.day_duration = day_duration
+        self.reset(coins)
+        # First run starts with the same day baseline as a restart
+        self.daily_start_coins = RESTART_COINS
+
+    def reset(self, coins=RESTART_COINS):
+        self.coins = coins
+        self.daily_start_coins = coins
+        # Seeds in stock, indexed by crop ID (slot 0 unused)
+        self.seeds = array("l", [0] * len(CROP_NAMES))
+        self.reset_grid()
+        self.current_day = 0
+        self.day_start_time = self.clock()
+        self.game_over = False
+        self.game_won = False
+
+    def reset_grid(self):
+        self.crops = [[None for _ in range(self.grid_size)] for _ in range(self.grid_size)]
+        self.plant_time = [[0 for _ in range(self.grid_size)] for _ in range(self.grid_size)]
+        # Pending growth transitions: (due time, seq, row, col, crop)
+        self.growth_queue = []
+        self._queue_seq = itertools.count()
+        # Same as reindex() on an empty grid, without visiting every tile
+        self.ready_tiles = set()
+        self.empty_tiles = set(itertools.product(range(self.grid_size), repeat=2))
+        self.tile_codes = bytearray(self.grid_size * self.grid_size)
+        self.tile_states = bytearray(self.grid_size * self.grid_size)
+
+    def reindex(self):
+        """Rebuild the ready/empty tile sets and the flat tile bytes from the grid.
+
+        Bulk harvest and fill only touch the tiles in these sets, and save
+        snapshots copy crop IDs and states from `tile_codes`/`tile_states`
+        (row-major, 0 = empty); plant, harvest and growth keep them all
+        current, so this is only needed after the grid is edited directly.
+        """
+        self.ready_tiles = set()
+        self.empty_tiles = set()
+        self.tile_codes = bytearray(crop.crop_id if crop else 0 for line in self.crops for crop in line)
+        self.tile_states = bytearray(crop.state if crop else 0 for line in self.crops for crop in line)
+        for row, line in enumerate(self.crops):
+            for col, crop in enumerate(line):
+                if crop is None:
+                    self.empty_tiles.add((row, col))
+                elif crop.state == READY:
+                    self.ready_tiles.add((row, col))
+
+    def remap_crops(self, new_ids):
+        """Re-key stock and planted crops after install_crops() swapped the pack.
+
+        `new_ids[old ID]` is the crop's new ID; seeds and plants of removed
+        crops (new ID 0) are dropped. Growing crops are re-queued, so
+        changed growth times apply from their original plant time.
+        """
+        seeds = array("l", [0] * len(CROP_NAMES))
+        for old_id, count in enumerate(self.seeds):
+            if old_id and new_ids[old_id]:
+                seeds[new_ids[old_id]] += count
+        self.seeds = seeds
+        self.growth_queue = []
+        for row, line in enumerate(self.crops):
+            for col, crop in enumerate(line):
+                if crop is None:
+                    continue
+                crop.crop_id = new_ids[crop.crop_id]
+                if not crop.crop_id:
+                    line[col] = None
+                elif crop.state in (SEED, SPROUT):
+                    self._schedule(row, col, crop)
+        self.reindex()
+
+    def total_seeds(self):
+        return sum(self.seeds)
+
+    def current_quota(self):
+        return self.daily_quotas[min(self.current_day, len(self.daily_quotas) - 1)]
+
+    def day_time_left(self, now=None):
+        if now is None:
+            now = self.clock()
+        return max(0, self.day_duration - ((now - self.day_start_time) % self.day_duration))
+
+    def buy_seed(self, crop):
+        """Buy one seed of a crop ID (or crop name); False if it is unaffordable."""
+        crop_id = CROP_IDS.get(crop, crop)
+        cost = CROP_COSTS[crop_id]
+        if self.coins < cost:
+            return False
+        self.seeds[crop_id] += 1
+        self.coins -= cost
+        return True
+
+    def plant(self, row, col, now=None):
+        """Plant the cheapest seed in stock on an empty tile; returns its crop ID."""
+        if self.crops[row][col] is not None:
+            return None
+        seeds = self.seeds
+        for crop_id in range(1, len(seeds)):
+            if seeds[crop_id] > 0:
+                seeds[crop_id] -= 1
+                crop = self.crops[row][col] = Crop(crop_id)
+                self.plant_time[row][col] = self.clock() if now is None else now
+                self.empty_tiles.discard((row, col))
+                self.tile_codes[row * self.grid_size + col] = crop_id
+                self.tile_states[row * self.grid_size + col] = SEED
+                self._schedule(row, col, crop)
+                return crop_id
+        return None
+
+    def harvest(self, row, col):
+        """Harvest a ready crop; returns the coins earned (0 if not ready)."""
+        crop = self.crops[row][col]
+        if not crop or crop.state != READY:
+            return 0
+        reward = HARVEST_REWARD[crop.crop_id]
+        self.coins += reward
+        # Any queued transition for this crop is dropped when it surfaces
+        self.crops[row][col] = None
+        self.ready_tiles.discard((row, col))
+        self.empty_tiles.add((row, col))
+        self.tile_codes[row * self.grid_size + col] = EMPTY
+        self.tile_states[row * self.grid_size + col] = EMPTY
+        return reward
+
+    def harvest_all(self):
+        """Harvest every ready crop; returns the total coins earned."""
+        earned = 0
+        for row, col in list(self.ready_tiles):
+            earned += self.harvest(row, col)
+        return earned
+
+    def fill_empty(self, now=None):
+        """Plant seeds in stock on empty tiles, top-left first; returns how many were planted."""
+        if now is None:
+            now = self.clock()
+        wanted = min(self.total_seeds(), len(self.empty_tiles))
+        tiles = []
+        # Rows top-down, stopping once there are enough tiles; full rows are skipped in C
+        for row, line in enumerate(self.crops):
+            if len(tiles) >= wanted:
+                break
+            if None in line:
+                tiles.extend((row, col) for col, crop in enumerate(line) if crop is None)
+        for row, col in tiles[:wanted]:
+            self.plant(row, col, now)
+        return wanted
+
+    def crop_at(self, row, col):
+        """(crop ID, state code) on a tile, or None if it is empty."""
+        crop = self.crops[row][col]
+        return (crop.crop_id, crop.state) if crop else None
+
+    def crops_in(self, first_row, end_row, first_col, end_col):
+        """Yield (row, col, (crop ID, state code)) for planted tiles in a block."""
+        for row in range(first_row, end_row):
+            line = self.crops[row]
+            for col in range(first_col, end_col):
+                crop = line[col]
+                if crop:
+                    yield row, col, (crop.crop_id, crop.state)
+
+    def count_empty(self):
+        return len(self.empty_tiles)
+
+    def count_ready(self):
+        return len(self.ready_tiles)
+
+    def click_tile(self, row, col, can_plant=True):
+        """Farm click rule: harvest if ready, else plant if empty.
+
+        Returns "harvest", "plant" or None when nothing happened.
+        """
+        crop = self.crops[row][col]
+        if crop and crop.state == READY:
+            self.harvest(row, col)
+            return "harvest"
+        if crop is None and can_plant and self.plant(row, col):
+            return "plant"
+        return None
+
+    def check_daily_quota(self, now=None):
+        """Close the current day if its time is up.
+
+        Returns None while the day is running, otherwise "passed", "won"
+        or "failed".
+        """
+        if now is None:
+            now = self.clock()
+        days_passed = int((now - self.day_start_time) // self.day_duration)
+        max_day_index = len(self.daily_quotas) - 1
+
+        # Only act when we've advanced past the current_day boundary
+        if days_passed <= self.current_day:
+            return None
+        if self.current_day > max_day_index:
+            return "passed"
+        # Check TOTAL coins vs quota (not earned)
+        if self.coins < self.daily_quotas[self.current_day]:
+            self.game_over = True
+            return "failed"
+        if self.current_day == max_day_index:
+            # Last day passed -> WIN
+            self.game_won = True
+            return "won"
+        self.current_day += 1
+        self.daily_start_coins = self.coins
+        return "passed"
+
+    def _schedule(self, row, col, crop):
+        """Queue the crop's next growth transition."""
+        due = self.plant_time[row][col] + STAGE_TIMES[crop.state][crop.crop_id]
+        heapq.heappush(self.growth_queue, (due, next(self._queue_seq), row, col, crop))
+
+    def next_transition_time(self):
+        """Earliest pending growth transition, or None if nothing is growing."""
+        queue = self.growth_queue
+        while queue and self.crops[queue[0][2]][queue[0][3]] is not queue[0][4]:
+            heapq.heappop(queue)
+        return queue[0][0] if queue else None
+
+    def update_crops(self, now=None):
+        """Apply every growth transition that is due; cost is O(transitions)."""
+        if now is None:
+            now = self.clock()
+        queue = self.growth_queue
+        sprouted = []
+        # The heap key is only a float approximation of the deadline, so the
+        # head is re-checked with the exact `elapsed > growth time` test
+        while queue and queue[0][0] <= now + DEADLINE_SLACK:
+            _, _, row, col, crop = queue[0]
+            if self.crops[row][col] is not crop:
+                # Harvested or replaced since it was queued
+                heapq.heappop(queue)
+                continue
+            if now - self.plant_time[row][col] <= STAGE_TIMES[crop.state][crop.crop_id]:
+                break
+            heapq.heappop(queue)
+            if crop.state == SEED:
+                crop.state = SPROUT
+                sprouted.append((row, col, crop))
+            elif crop.state == SPROUT:
+                crop.state = READY
+                self.ready_tiles.add((row, col))
+            self.tile_states[row * self.grid_size + col] = crop.state
+        # Like the old per-frame scan, a crop moves at most one stage per update
+        for row, col, crop in sprouted:
+            self._schedule(row, col, crop)
+
+    def tick(self, now=None):
+        """One logic step: close the day if due, then grow crops."""
+        if now is None:
+            now = self.clock()
+        outcome = self.check_daily_quota(now)
+        self.update_crops(now)
+        return outcome
+
+    @property
+    def finished(self):
+        return self.game_over or self.game_won
+
+
+def autoplay_step(sim):
+    """Simple bot: harvest everything ready, buy cheapest seeds, fill empty tiles.
+
+    Plants seeds in stock first, then as many of the cheapest as the coins
+    buy, on the same tiles a row-by-row sweep would; both passes are bulk.
+    """
+    sim.harvest_all()
+    empty = sim.count_empty() - sim.fill_empty()
+    bought = 0
+    while bought < empty and sim.buy_seed(SEED_TYPES[0]):
+        bought += 1
+    if bought:
+        sim.fill_empty()
+
+
+def make_simulation(backend="lists", **kwargs):
+    """FarmSimulation on nested lists, or the NumPy struct-of-arrays grid."""
+    if backend == "numpy":
+        from farm_array import ArrayFarmSimulation
+        return ArrayFarmSimulation(**kwargs)
+    return FarmSimulation(**kwargs)
+
+
+def run_soak(ticks, dt=1 / 60, act_every=30, backend="lists", grid_size=GRID_SIZE):
+    """Run `ticks` logic steps with the autoplay bot; returns ticks/sec."""
+    clock = TickClock(step=dt)
+    sim = make_simulation(backend, clock=clock, grid_size=grid_size)
+    games = 1
+    start = time.perf_counter()
+    for i in range(ticks):
+        clock.advance()
+        if i % act_every == 0:
+            autoplay_step(sim)
+        sim.tick()
+        if sim.finished:
+            sim.reset()
+            games += 1
+    elapsed = time.perf_counter() - start
+    return ticks / elapsed if elapsed else float("inf"), games
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Headless farm soak test")
+    parser.add_argument("--ticks", type=int, default=100000)
+    parser.add_argument("--dt", type=float, default=1 / 60)
+    parser.add_argument("--grid-size", type=int, default=GRID_SIZE)
+    parser.add_argument("--backend", choices=["lists", "numpy"], default="lists")
+    args = parser.parse_args()
+    rate, games = run_soak(args.ticks, args.dt, backend=args.backend, grid_size=args.grid_size)
+    print(f"{args.ticks} ticks, {games} games, {rate:,.0f} ticks/sec")
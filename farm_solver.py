@@ -0,0 +1,438 @@
+"""Exact optimal-play solver for the seed/quota economy.
+
+Treats a game as a scheduling problem: every planting costs SHOP_COSTS now,
+holds one plot for its growth time and pays its harvest reward when ripe,
+and the day boundaries check total coins against the quotas. A memoised
+dynamic program gives the most coins a perfect player can hold at the end
+of each day, whether each quota can be met at all, and a buy/plant
+schedule that reaches the final-day maximum.
+
+The model matches the game rules in farm_sim:
+- time is in whole `resolution` steps (1 s by default);
+- a crop planted at step t is harvested at t + max(growth times);
+- a day boundary checks the coins held before anything is harvested at
+  that step, as check_daily_quota runs before update_crops;
+- clicks are free and instant, so seeds are bought as they are planted.
+
+Long days can't always be searched exhaustively; past --budget search
+nodes the solver reports the best schedule it found together with an
+upper bound instead of an exact maximum.
+
+    python farm_solver.py --coins 15 --day-duration 8 --quotas 10,15,20,30,40,60,80
+    python farm_solver.py --day-duration 20 --budget 500000
+"""
+import argparse
+import collections
+import math
+
+from farm_sim import DAILY_QUOTAS, DAY_DURATION, GRID_SIZE, GROWTH_TIMES, SEED_TYPES, SHOP_COSTS, START_COINS
+
+CACHE_SIZE = 1 << 18
+NODE_BUDGET = 50_000
+INFEASIBLE = -1
+
+
+class BudgetExhausted(Exception):
+    """The search visited its node budget without finishing."""
+
+
+def crop_table(resolution=1):
+    """(name, cost, growth steps, reward) per seed type, dominated crops removed.
+
+    Crop A dominates B when it costs no more, ripens no later and earns at
+    least as much profit: swapping every B for an A never leaves the player
+    with fewer coins or fewer free plots.
+    """
+    crops = []
+    for name in SEED_TYPES:
+        growth = GROWTH_TIMES[name]
+        steps = math.ceil(max(growth["seed_to_sprout"], growth["sprout_to_ready"]) / resolution - 1e-9)
+        crops.append((name, SHOP_COSTS[name], steps, growth["harvest"]))
+
+    def dominates(a, b):
+        return a[1] <= b[1] and a[2] <= b[2] and a[3] - a[1] >= b[3] - b[1]
+
+    kept = []
+    for crop in crops:
+        if any(dominates(other, crop) for other in kept):
+            continue
+        kept = [other for other in kept if not dominates(crop, other)]
+        kept.append(crop)
+    # Most profitable first, so the search finds good schedules early
+    kept.sort(key=lambda c: c[3] - c[1], reverse=True)
+    return kept
+
+
+def add_pending(pending, ready, plots, reward):
+    """Add plantings to a pending-harvest histogram of (ready step, plots, reward)."""
+    entries = dict((r, (n, c)) for r, n, c in pending)
+    n, c = entries.get(ready, (0, 0))
+    entries[ready] = (n + plots, c + reward)
+    return tuple(sorted((r, n, c) for r, (n, c) in entries.items()))
+
+
+class EconomySolver:
+    """Memoised DP over compressed game states.
+
+    A state is (step, coins, free plots, pending harvests), where pending
+    harvests are a histogram keyed by ready step rather than a per-tile
+    layout. Decisions are only taken at steps where something changes
+    (harvests and day boundaries): planting earlier is never worse when
+    nothing happens in between.
+
+    Sub-results go in a bounded LRU table, and branches are cut when an
+    upper bound (free plots or compounding capital, ignoring quotas) shows
+    they can't beat the best schedule found so far. States that differ only
+    in coins are also compared against each other: more coins with the same
+    plots and pending harvests is never worse, so a state is cut when one
+    holding at least as many coins has already been bounded below alpha.
+
+    Each day's search stops after `budget` nodes (None for no limit). The
+    day's result is then the best schedule seen so far, and bounds[day]
+    holds an upper bound on the true maximum.
+    """
+
+    def __init__(self, coins=START_COINS, grid_size=GRID_SIZE, daily_quotas=DAILY_QUOTAS,
+                 day_duration=DAY_DURATION, resolution=1, cache_size=CACHE_SIZE, budget=NODE_BUDGET):
+        self.start_coins = coins
+        self.plots = grid_size * grid_size
+        self.quotas = list(daily_quotas)
+        self.resolution = resolution
+        self.boundaries = [round((day + 1) * day_duration / resolution) for day in range(len(self.quotas))]
+        self.crops = crop_table(resolution)
+        self._bound_tables = {}
+        # Bounded LRU table of (value, exact) per state; see _best
+        self.cache_size = cache_size
+        self._cache = collections.OrderedDict()
+        # (end, step, index, free, pending) -> [(coins, upper bound)], same size limit
+        self._frontier = collections.OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.dominated = 0
+        self.budget = budget
+        self._limit = budget
+        self._nodes = 0
+        # Best schedule reached during the current search: (coins, {(step, index): plots})
+        self._path = []
+        self._incumbent = (INFEASIBLE, {})
+        self._schedules = {}
+        self.bounds = {}
+
+    # Upper bounds used for pruning
+
+    def _tables(self, end):
+        """Per-step bound tables for a game scored at step `end`.
+
+        plot_profit[t]: most profit one plot can still make from step t.
+        growth[t]: most one coin held at step t can grow to, ignoring plots.
+        """
+        tables = self._bound_tables.get(end)
+        if tables is None:
+            plot_profit = [0] * (end + 1)
+            growth = [1.0] * (end + 1)
+            for t in range(end - 1, -1, -1):
+                plot_profit[t] = plot_profit[t + 1]
+                growth[t] = growth[t + 1]
+                for _, cost, steps, reward in self.crops:
+                    if t + steps < end:
+                        plot_profit[t] = max(plot_profit[t], reward - cost + plot_profit[t + steps])
+                        growth[t] = max(growth[t], reward / cost * growth[t + steps])
+            tables = self._bound_tables[end] = (plot_profit, growth)
+        return tables
+
+    def _bound_terms(self, end, step, coins, free, pending):
+        """upper_bound's two estimates before taking the smaller: (by plots, by capital)."""
+        plot_profit, growth = self._tables(end)
+        by_plots = coins + free * plot_profit[step]
+        by_capital = coins * growth[step]
+        for ready, plots, reward in pending:
+            if ready < end:
+                by_plots += reward + plots * plot_profit[ready]
+                by_capital += reward * growth[ready]
+        return by_plots, by_capital
+
+    def _planting_terms(self, end, step, crop):
+        """How planting one more plot of `crop` at `step` changes _bound_terms."""
+        plot_profit, growth = self._tables(end)
+        _, cost, steps, reward = crop
+        by_plots, by_capital = -cost - plot_profit[step], -cost * growth[step]
+        if step + steps < end:
+            by_plots += reward + plot_profit[step + steps]
+            by_capital += reward * growth[step + steps]
+        return by_plots, by_capital
+
+    def upper_bound(self, end, step, coins, free, pending):
+        """Coins at `end` can't exceed this, whatever is planted from now on."""
+        by_plots, by_capital = self._bound_terms(end, step, coins, free, pending)
+        return min(by_plots, math.floor(by_capital + 1e-6))
+
+    def _planting_bounds(self, end, step, index, coins, free, pending):
+        """(quota, bound at 0 plots, change per plot) for `end` and each quota before it.
+
+        Both bounds are linear in the number of plots planted, so the
+        children of a node are bounded without building their states.
+        """
+        crop = self._viable(end, step)[index]
+        checks = [(None, end)] + [(quota, boundary) for boundary, quota in zip(self.boundaries, self.quotas)
+                                  if step < boundary < end]
+        return [(quota, self._bound_terms(boundary, step, coins, free, pending),
+                 self._planting_terms(boundary, step, crop)) for quota, boundary in checks]
+
+    def _plot_range(self, checks, floor, most):
+        """Range of plot counts, widened by one for rounding, that might beat `floor` and every quota."""
+        low, high = 0, most
+        for quota, terms, changes in checks:
+            target = floor + 1 if quota is None else quota
+            for base, change in zip(terms, changes):
+                if change > 0:
+                    low = max(low, math.ceil((target - base) / change) - 1)
+                elif change < 0:
+                    high = min(high, math.floor((base - target) / -change) + 1)
+                elif base + 1e-6 < target:
+                    return 0, -1
+        return low, high
+
+    # The DP
+
+    def _viable(self, end, step):
+        return [crop for crop in self.crops if step + crop[2] < end]
+
+    def _children(self, end, step, index, coins, free, pending):
+        """Plantings of the index-th viable crop at this step, most first."""
+        _, cost, steps, reward = self._viable(end, step)[index]
+        for n in range(min(free, coins // cost), -1, -1):
+            child_pending = add_pending(pending, step + steps, n, n * reward) if n else pending
+            yield n, coins - n * cost, free - n, child_pending
+
+    def _best(self, end, step, index, coins, free, pending, alpha=INFEASIBLE - 1):
+        """Most coins at step `end` from here, or INFEASIBLE if a quota must fail.
+
+        Branch and bound: a result that can't beat `alpha` comes back as an
+        upper bound no greater than alpha instead of the exact value.
+        """
+        key = (end, step, index, coins, free, pending)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            value, exact = cached
+            if exact or value <= alpha:
+                self.cache_hits += 1
+                return value
+        self.cache_misses += 1
+        if self._is_dominated(end, step, index, coins, free, pending, alpha):
+            self.dominated += 1
+            return alpha
+        self._nodes += 1
+        if self._limit is not None and self._nodes > self._limit:
+            raise BudgetExhausted
+        if index == len(self._viable(end, step)):
+            value = self._advance(end, step, coins, free, pending, alpha)
+            exact = value > alpha
+        else:
+            best = INFEASIBLE
+            checks = self._planting_bounds(end, step, index, coins, free, pending)
+            _, cost, steps, reward = self._viable(end, step)[index]
+            most = min(free, coins // cost)
+            low, high = self._plot_range(checks, alpha, most)
+            for n in range(high, low - 1, -1):
+                if n < low:
+                    break
+                floor = max(alpha, best)
+                bounds = [min(p + n * dp, math.floor(c + n * dc + 1e-6)) for _, (p, c), (dp, dc) in checks]
+                if bounds[0] <= floor or any(bound < quota for bound, (quota, _, _) in zip(bounds[1:], checks[1:])):
+                    continue
+                child_coins, child_free = coins - n * cost, free - n
+                child_pending = add_pending(pending, step + steps, n, n * reward) if n else pending
+                self._path.append((step, index, n))
+                best = max(best, self._best(end, step, index + 1, child_coins, child_free, child_pending, floor))
+                self._path.pop()
+                low = max(low, self._plot_range(checks, max(alpha, best), most)[0])
+            # Every skipped child was bounded by max(alpha, best)
+            exact = best > alpha
+            value = best if exact else alpha
+        self._cache[key] = (value, exact)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        self._record_bound(end, step, index, coins, free, pending, value)
+        return value
+
+    def _is_dominated(self, end, step, index, coins, free, pending, alpha):
+        """True when a state with at least `coins` here is already known to end at or below alpha."""
+        entries = self._frontier.get((end, step, index, free, pending))
+        return entries is not None and any(c >= coins and v <= alpha for c, v in entries)
+
+    def _record_bound(self, end, step, index, coins, free, pending, value):
+        """Remember that `coins` at this state ends with at most `value`."""
+        shape = (end, step, index, free, pending)
+        entries = self._frontier.get(shape, [])
+        # Keep only entries not made redundant by this one
+        entries = [(c, v) for c, v in entries if c > coins or v < value]
+        entries.append((coins, value))
+        self._frontier[shape] = entries
+        self._frontier.move_to_end(shape)
+        if len(self._frontier) > self.cache_size:
+            self._frontier.popitem(last=False)
+
+    def _next_event(self, end, step, pending):
+        boundary = min(b for b in self.boundaries if step < b <= end)
+        ready = min((r for r, _, _ in pending if step < r < end), default=boundary)
+        return min(boundary, ready)
+
+    def _harvest(self, step, coins, free, pending):
+        """Collect everything ripe at `step`; returns (coins, free, pending, plots harvested)."""
+        harvested = 0
+        for ready, plots, reward in pending:
+            if ready == step:
+                coins += reward
+                harvested += plots
+        return coins, free + harvested, tuple(p for p in pending if p[0] != step), harvested
+
+    def _advance(self, end, step, coins, free, pending, alpha):
+        step = self._next_event(end, step, pending)
+        if step in self.boundaries and coins < self.quotas[self.boundaries.index(step)] and step < end:
+            return INFEASIBLE
+        if step == end:
+            if coins > self._incumbent[0]:
+                self._incumbent = (coins, {(s, i): n for s, i, n in self._path})
+            return coins
+        coins, free, pending, _ = self._harvest(step, coins, free, pending)
+        return self._best(end, step, 0, coins, free, pending, alpha)
+
+    def greedy_coins(self, end):
+        """Coins at `end` for a greedy player who keeps quota reserves.
+
+        Plants the most profitable crops it can afford without dropping
+        below a quota before the harvest comes in. Any result it reaches is
+        achievable, so it seeds the search with a good lower bound.
+        """
+        return self._greedy(end)[0]
+
+    def _greedy(self, end):
+        """greedy_coins(end) and its plantings as {(step, crop index): plots}."""
+        step, coins, free, pending = 0, self.start_coins, self.plots, ()
+        plantings = {}
+        while True:
+            for index, (_, cost, steps, reward) in enumerate(self._viable(end, step)):
+                spendable = coins
+                for boundary, quota in zip(self.boundaries, self.quotas):
+                    if step < boundary <= step + steps and boundary < end:
+                        incoming = sum(r for ready, _, r in pending if ready < boundary)
+                        spendable = min(spendable, coins + incoming - quota)
+                n = min(free, max(0, spendable) // cost)
+                if n:
+                    plantings[step, index] = n
+                    coins, free = coins - n * cost, free - n
+                    pending = add_pending(pending, step + steps, n, n * reward)
+            step = self._next_event(end, step, pending)
+            if step in self.boundaries and coins < self.quotas[self.boundaries.index(step)] and step < end:
+                return INFEASIBLE, {}
+            if step == end:
+                return coins, plantings
+            coins, free, pending, _ = self._harvest(step, coins, free, pending)
+
+    # Public API
+
+    def max_coins(self, day):
+        """Most coins at the end of `day` (0-based) with every earlier quota met.
+
+        If the node budget runs out this is the best result found instead,
+        and bounds[day] holds an upper bound on the maximum.
+        """
+        if day in self._schedules:
+            return self._schedules[day][0]
+        end = self.boundaries[day]
+        # The optimum is at least the greedy result, so the search returns it exactly
+        self._incumbent = self._greedy(end)
+        self._nodes, self._path, self._limit = 0, [], self.budget
+        try:
+            coins = self._best(end, 0, 0, self.start_coins, self.plots, (), max(self._incumbent[0] - 1, INFEASIBLE - 1))
+            self._schedules[day] = (coins, None)
+        except BudgetExhausted:
+            self.bounds[day] = self.upper_bound(end, 0, self.start_coins, self.plots, ())
+            self._schedules[day] = self._incumbent
+        return self._schedules[day][0]
+
+    def solve(self):
+        """Per-day (max coins, quota met) pairs; None once an earlier quota has failed.
+
+        Days in `bounds` ran out of budget: their coins are reachable but may
+        not be the maximum, and "quota met" False only means no schedule met it.
+        """
+        results = []
+        for day, quota in enumerate(self.quotas):
+            if results and not (results[-1] and results[-1][1]):
+                results.append(None)
+                continue
+            coins = self.max_coins(day)
+            results.append((coins, coins >= quota))
+        return results
+
+    def schedule(self, day):
+        """Actions reaching max_coins(day), as (seconds, description) pairs."""
+        end = self.boundaries[day]
+        target = self.max_coins(day)
+        if target == INFEASIBLE:
+            return []
+        plantings = self._schedules[day][1]
+        # An exact result is replayed from the DP, which must not stop early;
+        # a budgeted one from its recorded plantings
+        self._limit = None
+        actions = []
+        step, index, coins, free, pending = 0, 0, self.start_coins, self.plots, ()
+        while True:
+            viable = self._viable(end, step)
+            if index < len(viable):
+                for n, child_coins, child_free, child_pending in self._children(end, step, index, coins, free, pending):
+                    if plantings is not None:
+                        if n == plantings.get((step, index), 0):
+                            break
+                    elif self._best(end, step, index + 1, child_coins, child_free, child_pending, target - 1) == target:
+                        break
+                if n:
+                    name, cost = viable[index][0], viable[index][1]
+                    actions.append((step * self.resolution,
+                                    f"buy and plant {n} {name} (-{n * cost}, coins {child_coins})"))
+                index, coins, free, pending = index + 1, child_coins, child_free, child_pending
+                continue
+            step = self._next_event(end, step, pending)
+            if step == end:
+                return actions
+            coins, free, pending, harvested = self._harvest(step, coins, free, pending)
+            if harvested:
+                actions.append((step * self.resolution, f"harvest {harvested} (coins {coins})"))
+            index = 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Optimal-play solver for the farm economy")
+    parser.add_argument("--coins", type=int, default=START_COINS, help="starting coins")
+    parser.add_argument("--quotas", default=",".join(map(str, DAILY_QUOTAS)), help="comma-separated daily quotas")
+    parser.add_argument("--day-duration", type=float, default=DAY_DURATION)
+    parser.add_argument("--grid-size", type=int, default=GRID_SIZE)
+    parser.add_argument("--resolution", type=float, default=1, help="time step in seconds")
+    parser.add_argument("--budget", type=int, default=NODE_BUDGET, help="search nodes per day, 0 for no limit")
+    args = parser.parse_args()
+
+    solver = EconomySolver(args.coins, args.grid_size, [int(q) for q in args.quotas.split(",")],
+                           args.day_duration, args.resolution, budget=args.budget or None)
+    results = solver.solve()
+    last_met = -1
+    for day, (result, quota) in enumerate(zip(results, solver.quotas)):
+        if result is None:
+            print(f"day {day + 1}: quota {quota}: unreachable (an earlier quota fails)")
+            continue
+        coins, met = result
+        if day in solver.bounds:
+            print(f"day {day + 1}: quota {quota}: best found {coins}, at most {solver.bounds[day]} "
+                  f"-> {'feasible' if met else 'unknown'} (budget exhausted)")
+        else:
+            print(f"day {day + 1}: quota {quota}: max coins {coins} -> {'feasible' if met else 'INFEASIBLE'}")
+        if met:
+            last_met = day
+    if last_met >= 0:
+        kind = "Best found" if last_met in solver.bounds else "Optimal"
+        print(f"\n{kind} schedule to the end of day {last_met + 1}:")
+        for seconds, action in solver.schedule(last_met):
+            print(f"  t={seconds:g}s: {action}")
+    print(f"\ncache: {solver.cache_hits} hits, {solver.cache_misses} misses, {len(solver._cache)} entries, "
+          f"{solver.dominated} dominated states cut")
@@ -0,0 +1,124 @@
+"""Adaptive frame pacing for the game loop.
+
+While there is input, the loop runs at full rate as it would with
+clock.tick(FPS). Once no event has arrived for LINGER seconds and nothing
+on screen is due to change before the next full-rate frame, `wait()`
+blocks in pygame.event.wait until the first of: an event, the caller's next
+scheduled change, or the idle refresh (IDLE_FPS). The event that woke it is
+handed back by the next `poll()`, ahead of the rest of the queue, so the
+event loop sees every event in order and input is handled at once.
+
+SDL only blocks in the OS on some video drivers; on the others (dummy,
+offscreen, kmsdrm, ...) it emulates the wait with a 1 ms poll or a spin, so
+there the pacer sleeps and polls every POLL_INTERVAL instead.
+
+`fps` and `cpu_ms` hold the achieved frame rate and the process CPU time
+per second of wall time over the last REPORT_INTERVAL; `report()`
+summarises the whole run.
+"""
+import math
+import time
+
+import pygame
+
+FPS = 60
+IDLE_FPS = 4
+# Seconds of full rate after the last event, so hover and drags stay smooth
+LINGER = 0.5
+REPORT_INTERVAL = 1.0
+BLOCKING_WAIT_DRIVERS = {"x11", "wayland", "windows", "cocoa"}
+POLL_INTERVAL = 0.008
+
+
+class FramePacer:
+    """Ends each frame with either a full-rate tick or an idle wait for input."""
+
+    def __init__(self, fps=FPS, idle_fps=IDLE_FPS, linger=LINGER):
+        self.fps_cap = fps
+        self.idle_fps = idle_fps
+        self.frame_time = 1 / fps
+        self.idle_time = 1 / idle_fps
+        self.linger = linger
+        self.clock = pygame.time.Clock()
+        self.blocking_wait = pygame.display.get_init() and pygame.display.get_driver() in BLOCKING_WAIT_DRIVERS
+        self._pending = []
+        now = time.perf_counter()
+        self._last_input = now
+        self._started = now
+        self._cpu_started = time.process_time()
+        self.frames = 0
+        self.idle_frames = 0
+        self.waited = 0.0       # seconds spent blocked in idle waits
+        # Rolling figures, refreshed every REPORT_INTERVAL
+        self.fps = 0.0
+        self.cpu_ms = 0.0
+        self._window_start = now
+        self._window_cpu = self._cpu_started
+        self._window_frames = 0
+
+    def poll(self):
+        """This frame's events: the one that ended an idle wait, then the rest of the queue."""
+        events = self._pending + pygame.event.get()
+        self._pending = []
+        if events:
+            self._last_input = time.perf_counter()
+        return events
+
+    def wait(self, next_change=None, busy=False):
+        """End the frame.
+
+        `next_change` is a function returning the seconds until the screen
+        next changes by itself, or None if nothing is scheduled; it is only
+        called when the loop could go idle. `busy` keeps full rate (e.g. a
+        held pan key).
+        """
+        now = time.perf_counter()
+        delay = None
+        if not busy and now - self._last_input >= self.linger:
+            delay = self.idle_time
+            due = next_change() if next_change else None
+            if due is not None:
+                delay = min(delay, due)
+        if delay is None or delay <= self.frame_time:
+            self.clock.tick(self.fps_cap)
+        else:
+            event = self._wait_for_event(delay)
+            if event is not None:
+                self._pending.append(event)
+                self._last_input = time.perf_counter()
+            # Restart the full-rate clock from here
+            self.clock.tick()
+            self.idle_frames += 1
+            self.waited += time.perf_counter() - now
+        self.frames += 1
+        self._window_frames += 1
+        now = time.perf_counter()
+        if now - self._window_start >= REPORT_INTERVAL:
+            cpu = time.process_time()
+            self.fps = self._window_frames / (now - self._window_start)
+            self.cpu_ms = (cpu - self._window_cpu) * 1000 / (now - self._window_start)
+            self._window_start, self._window_cpu, self._window_frames = now, cpu, 0
+
+    def _wait_for_event(self, timeout):
+        if self.blocking_wait:
+            event = pygame.event.wait(math.ceil(timeout * 1000))
+            return None if event.type == pygame.NOEVENT else event
+        deadline = time.perf_counter() + timeout
+        while True:
+            event = pygame.event.poll()
+            if event.type != pygame.NOEVENT:
+                return event
+            left = deadline - time.perf_counter()
+            if left <= 0:
+                return None
+            time.sleep(min(POLL_INTERVAL, left))
+
+    def report(self):
+        wall = time.perf_counter() - self._started
+        if not self.frames or wall <= 0:
+            return None
+        cpu_ms = (time.process_time() - self._cpu_started) * 1000 / wall
+        return (f"Frame pacing: {self.frames / wall:.1f} fps average ({self.fps_cap} fps active, "
+                f"{self.idle_fps} fps idle), {self.idle_frames / self.frames:.0%} of frames idle, "
+                f"{self.waited / wall:.0%} of the time waiting for input; "
+                f"CPU {cpu_ms:.0f} ms per second ({cpu_ms / 10:.1f}% of a core)")
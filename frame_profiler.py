@@ -0,0 +1,108 @@
+"""Per-phase frame timings for the game loop.
+
+The loop calls `begin_frame()` at the top of every frame and `lap(phase)`
+after each phase (events, logic, HUD, every draw_* call, flip, tick); each
+lap records the perf_counter_ns time since the previous one. The last
+WINDOW samples per phase are kept for p50/p95/p99, which the game shows as
+an overlay and writes to CSV or JSON on exit.
+
+While disabled, `begin_frame` and `lap` are a shared do-nothing function,
+so the hooks can stay in production builds.
+"""
+import csv
+import json
+import time
+from collections import deque
+
+# Frames kept per phase for the rolling percentiles (10 s at 60 FPS)
+WINDOW = 600
+PERCENTILES = (50, 95, 99)
+
+
+def _noop(*args):
+    pass
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0
+    rank = max(1, -(-pct * len(sorted_values) // 100))
+    return sorted_values[rank - 1]
+
+
+class FrameProfiler:
+    """Rolling per-phase timings, switched on and off at runtime."""
+
+    def __init__(self, enabled=False, window=WINDOW):
+        self.window = window
+        self.samples = {}   # phase -> deque of nanoseconds, in first-seen order
+        self.totals = {}    # phase -> (count, total ns, max ns) over the whole run
+        self.frames = 0
+        self._frame_start = None
+        self._last = 0
+        self.set_enabled(enabled)
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        # Instance attributes shadow the methods, so a disabled hook costs one call
+        self.begin_frame = self._begin_frame if enabled else _noop
+        self.lap = self._lap if enabled else _noop
+        self._frame_start = None
+
+    def toggle(self):
+        self.set_enabled(not self.enabled)
+        return self.enabled
+
+    def _record(self, phase, ns):
+        samples = self.samples.get(phase)
+        if samples is None:
+            samples = self.samples[phase] = deque(maxlen=self.window)
+        samples.append(ns)
+        count, total, worst = self.totals.get(phase, (0, 0, 0))
+        self.totals[phase] = (count + 1, total + ns, max(worst, ns))
+
+    def _begin_frame(self):
+        now = time.perf_counter_ns()
+        if self._frame_start is not None:
+            self._record("frame", now - self._frame_start)
+        self._frame_start = self._last = now
+        self.frames += 1
+
+    def _lap(self, phase):
+        if self._frame_start is None:
+            # Switched on mid-frame; start measuring at the next frame
+            return
+        now = time.perf_counter_ns()
+        self._record(phase, now - self._last)
+        self._last = now
+
+    def stats(self):
+        """{phase: {"count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"}}.
+
+        Percentiles cover the rolling window; count, mean and max the whole run.
+        """
+        stats = {}
+        for phase, samples in self.samples.items():
+            ordered = sorted(samples)
+            count, total, worst = self.totals[phase]
+            row = {"count": count, "mean_ms": total / count / 1e6}
+            for pct in PERCENTILES:
+                row[f"p{pct}_ms"] = percentile(ordered, pct) / 1e6
+            row["max_ms"] = worst / 1e6
+            stats[phase] = row
+        return stats
+
+    def dump(self, path):
+        """Write stats to `path`, as JSON if it ends in .json, else CSV."""
+        stats = self.stats()
+        if path.endswith(".json"):
+            with open(path, "w") as f:
+                json.dump({"frames": self.frames, "window": self.window, "phases": stats}, f, indent=2)
+            return
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            columns = ["count", "mean_ms"] + [f"p{pct}_ms" for pct in PERCENTILES] + ["max_ms"]
+            writer.writerow(["phase"] + columns)
+            for phase, row in stats.items():
+                writer.writerow([phase] + [round(row[c], 4) if c != "count" else row[c] for c in columns])
@@ -0,0 +1,93 @@
+"""Pre-rasterised glyphs for the game's numeric text.
+
+Crop timers ("S:12s", "$50") change every second on every growing tile but
+use a tiny alphabet. A GlyphAtlas rasterises each character once per font
+and colour; a string is then laid out as (glyph, position) pairs, so a whole
+field of labels goes to the screen in one Surface.blits call without
+touching the font. Strings with a character outside the atlas fall back to
+font.render.
+
+HUD text is not drawn from here: HudText already keeps one surface per
+value, and assembling a single short string glyph by glyph onto a new
+surface costs more than one font.render.
+
+PillPool hands out the translucent backgrounds drawn behind crop timers:
+one pre-made surface per width, instead of a new surface per tile per frame.
+"""
+import pygame
+
+DIGITS = "0123456789"
+# Everything crop timers are made of
+NUMERIC_CHARS = DIGITS + "$:sSR"
+# Layouts kept per atlas; timers only produce a few hundred strings
+MAX_CACHED_LINES = 4096
+
+
+class GlyphAtlas:
+    """One font and colour's glyphs, and the strings laid out from them."""
+
+    def __init__(self, font, color, chars=NUMERIC_CHARS):
+        self.font = font
+        self.color = color
+        self.glyphs = {ch: font.render(ch, True, color) for ch in chars}
+        # Glyphs are placed by their advance, as font.render spaces them, not their bitmap width
+        self.advances = {ch: self._advance(ch) for ch in self.glyphs}
+        self._lines = {}
+
+    def _advance(self, ch):
+        metrics = self.font.metrics(ch)
+        if metrics and metrics[0]:
+            return metrics[0][4]
+        return self.glyphs[ch].get_width()
+
+    def line(self, text):
+        """(pieces, width) for `text`: glyph surfaces with their x offsets."""
+        cached = self._lines.get(text)
+        if cached is None:
+            if all(ch in self.glyphs for ch in text):
+                pieces = []
+                x = width = 0
+                for ch in text:
+                    glyph = self.glyphs[ch]
+                    pieces.append((glyph, x))
+                    width = max(width, x + glyph.get_width())
+                    x += self.advances[ch]
+                cached = (tuple(pieces), width)
+            else:
+                surface = self.font.render(text, True, self.color)
+                cached = (((surface, 0),), surface.get_width())
+            if len(self._lines) < MAX_CACHED_LINES:
+                self._lines[text] = cached
+        return cached
+
+    def width(self, text):
+        return self.line(text)[1]
+
+    def layout(self, text, x, y, out):
+        """Append (glyph, (x, y)) blits for `text` to `out`; returns its width."""
+        pieces, width = self.line(text)
+        out.extend([(glyph, (x + dx, y)) for glyph, dx in pieces])
+        return width
+
+
+class PillPool:
+    """Translucent label backgrounds, one reusable surface per width."""
+
+    def __init__(self, height, color, alpha, widths=()):
+        self.height = height
+        self.color = color
+        self.alpha = alpha
+        self._pills = {}
+        for width in widths:
+            self.get(width)
+
+    def get(self, width):
+        pill = self._pills.get(width)
+        if pill is None:
+            pill = self._pills[width] = pygame.Surface((width, self.height)).convert()
+            pill.set_alpha(self.alpha)
+            pill.fill(self.color)
+        return pill
+
+    def __len__(self):
+        return len(self._pills)
@@ -0,0 +1,183 @@
+"""Input recording and replay for the game loop.
+
+While recording, the game runs on a fixed-step game clock (frame N is at
+start + N * step), so every input is fully placed in game time by its frame
+number. The log holds a save_game snapshot of the starting state, then one
+fixed-width record per input event, then an END record carrying a checksum
+of the final state:
+
+    header   magic "FLOG", version u16, flags u8 (camera view), step f64,
+             start f64, snapshot length u32, snapshot bytes
+    records  frame u32, kind u8, button (bitmask for drags) u8, x i16, y i16, rel x i16,
+             rel y i16, key i32, unicode code point u32
+
+Replaying feeds the same events back through the same event loop at the
+same game times, without waiting on the frame clock; headless replays also
+skip every frame on which nothing can change.
+"""
+import struct
+import zlib
+
+import pygame
+
+import save_game
+
+MAGIC = b"FLOG"
+VERSION = 1
+HEADER = struct.Struct("<4sHBddI")
+RECORD = struct.Struct("<IBBhhhhiI")
+FLAG_CAMERA = 1
+
+# Recorded event types, by kind code; END closes a finished recording
+KINDS = [pygame.QUIT, pygame.KEYDOWN, pygame.KEYUP, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP,
+         pygame.MOUSEMOTION, pygame.MOUSEWHEEL]
+KIND_CODES = {event_type: code for code, event_type in enumerate(KINDS)}
+END = 255
+PAN_KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN)
+
+
+class LogError(ValueError):
+    """The file is not a readable input log."""
+
+
+def state_digest(sim):
+    return zlib.crc32(save_game.encode(sim))
+
+
+class InputRecorder:
+    """Appends the frame's input events to a log file as they happen."""
+
+    def __init__(self, path, snapshot, start, step, camera=False):
+        self.path = path
+        self.events = 0
+        self._file = open(path, "wb")
+        self._file.write(HEADER.pack(MAGIC, VERSION, FLAG_CAMERA if camera else 0, step, start, len(snapshot)))
+        self._file.write(snapshot)
+
+    def record(self, frame, events, mouse_pos=(0, 0)):
+        """Log `events`; `mouse_pos` is the pointer position for wheel events."""
+        records = []
+        for event in events:
+            code = KIND_CODES.get(event.type)
+            if code is None:
+                continue
+            if event.type == pygame.MOUSEMOTION:
+                # Only drags change anything; hover is redrawn from the pointer
+                if not any(event.buttons):
+                    continue
+                buttons = sum(1 << i for i, held in enumerate(event.buttons) if held)
+                records.append(RECORD.pack(frame, code, buttons, *event.pos, *event.rel, 0, 0))
+            elif event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+                records.append(RECORD.pack(frame, code, event.button, *event.pos, 0, 0, 0, 0))
+            elif event.type == pygame.MOUSEWHEEL:
+                records.append(RECORD.pack(frame, code, 0, *mouse_pos, event.x, event.y, 0, 0))
+            elif event.type in (pygame.KEYDOWN, pygame.KEYUP):
+                char = ord(event.unicode) if len(getattr(event, "unicode", "")) == 1 else 0
+                records.append(RECORD.pack(frame, code, 0, 0, 0, 0, 0, event.key, char))
+            else:
+                records.append(RECORD.pack(frame, code, 0, 0, 0, 0, 0, 0, 0))
+        if records:
+            self._file.write(b"".join(records))
+            # Keep the log usable if the game crashes mid-session
+            self._file.flush()
+            self.events += len(records)
+
+    def close(self, frame, digest):
+        self._file.write(RECORD.pack(frame, END, 0, 0, 0, 0, 0, 0, digest))
+        self._file.close()
+
+
+class InputReplay:
+    """A recorded log, served back one frame at a time."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        if len(data) < HEADER.size:
+            raise LogError("file too short")
+        magic, version, flags, self.step, self.start, snapshot_size = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise LogError("not an input log")
+        if version != VERSION:
+            raise LogError(f"unsupported input log version {version}")
+        self.camera = bool(flags & FLAG_CAMERA)
+        offset = HEADER.size + snapshot_size
+        self.snapshot = save_game.decode(data[HEADER.size:offset])
+        self.frames = {}    # frame -> [record tuple, ...]
+        self.end_frame = 0
+        self.digest = None  # None if the recording never finished
+        self.events = 0
+        # A trailing partial record is a crash mid-write; ignore it
+        usable = offset + (len(data) - offset) // RECORD.size * RECORD.size
+        for record in RECORD.iter_unpack(data[offset:usable]):
+            frame, kind = record[0], record[1]
+            self.end_frame = max(self.end_frame, frame)
+            if kind == END:
+                self.digest = record[8]
+                continue
+            self.frames.setdefault(frame, []).append(record)
+            self.events += 1
+        self._input_frames = sorted(self.frames)
+        self._next_input = 0
+        self.mouse_pos = (0, 0)
+        self.keys_down = set()
+
+    def events_for(self, frame):
+        """pygame events for `frame`, updating the replayed pointer and key state."""
+        while self._next_input < len(self._input_frames) and self._input_frames[self._next_input] <= frame:
+            self._next_input += 1
+        events = []
+        for _, kind, button, x, y, rel_x, rel_y, key, char in self.frames.get(frame, ()):
+            event_type = KINDS[kind]
+            if event_type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+                self.mouse_pos = (x, y)
+                event = pygame.event.Event(event_type, pos=(x, y), button=button)
+            elif event_type == pygame.MOUSEMOTION:
+                self.mouse_pos = (x, y)
+                buttons = tuple(bool(button & 1 << i) for i in range(3))
+                event = pygame.event.Event(event_type, pos=(x, y), rel=(rel_x, rel_y), buttons=buttons)
+            elif event_type == pygame.MOUSEWHEEL:
+                self.mouse_pos = (x, y)
+                event = pygame.event.Event(event_type, x=rel_x, y=rel_y)
+            elif event_type in (pygame.KEYDOWN, pygame.KEYUP):
+                if event_type == pygame.KEYDOWN:
+                    self.keys_down.add(key)
+                else:
+                    self.keys_down.discard(key)
+                event = pygame.event.Event(event_type, key=key, unicode=chr(char) if char else "", mod=0)
+            else:
+                event = pygame.event.Event(event_type)
+            events.append(event)
+        return events
+
+    def pressed(self):
+        """Stand-in for pygame.key.get_pressed() built from replayed key events."""
+        return KeyState(self.keys_down)
+
+    def next_frame(self, frame, wake_time=None):
+        """The next frame on which anything can change.
+
+        That is the next recorded input, the frame the game clock reaches
+        `wake_time` (the next growth or day deadline), or simply the next
+        frame while an arrow key is held and panning the camera.
+        """
+        if self.camera and self.keys_down.intersection(PAN_KEYS):
+            return frame + 1
+        if self._next_input < len(self._input_frames):
+            target = self._input_frames[self._next_input]
+        else:
+            target = self.end_frame
+        if wake_time is not None:
+            target = min(target, int((wake_time - self.start) / self.step))
+        return max(target, frame + 1)
+
+    def finished(self, frame):
+        return frame >= self.end_frame and self._next_input >= len(self._input_frames)
+
+
+class KeyState:
+    def __init__(self, keys_down):
+        self.keys_down = keys_down
+
+    def __getitem__(self, key):
+        return key in self.keys_down
@@ -0,0 +1,255 @@
+"""Game-side client for the leaderboard daemon.
+
+LeaderboardClient has the same add/rank_for/top/close interface as
+ScoreStore, so the game can use either. None of those calls touch the
+network: they answer from a local copy of the top of the board, which a
+background thread keeps fresh over a small pool of kept-alive connections,
+sending queued submissions in batches on the way.
+
+Whenever the daemon can't be reached, submissions are spooled to their own
+file (never the daemon's score file) and replayed once it answers again, even
+from a later run. Clients sharing a spool file claim it with an atomic rename
+before replaying, so each spooled score is sent once. Until the first refresh
+the board comes from reading the daemon's score file.
+"""
+import bisect
+import json
+import os
+import queue
+import socket
+import threading
+import time
+
+from leaderboard_server import DEFAULT_HOST, DEFAULT_PORT, MAX_TOP_K
+from score_store import SCORE_FILE, load_scores
+
+SPOOL_FILE = "scores.spool.txt"
+POOL_SIZE = 2
+REQUEST_TIMEOUT = 0.25
+# After a failure, don't retry the daemon for this long
+RETRY_AFTER = 5.0
+# Re-read the board from the daemon this often when nothing is submitted
+REFRESH_EVERY = 2.0
+BATCH_SIZE = 64
+BATCH_WINDOW = 0.05
+
+
+class LeaderboardClient:
+    """ScoreStore look-alike backed by the daemon.
+
+    The local board holds the daemon's top MAX_TOP_K plus any scores it has
+    not confirmed yet, so rank_for is exact for ranks on the board and says
+    one past its end for anything lower.
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, score_path=SCORE_FILE, spool_path=SPOOL_FILE,
+                 pool_size=POOL_SIZE, timeout=REQUEST_TIMEOUT):
+        self.address = (host, port)
+        self.spool_path = spool_path
+        self.timeout = timeout
+        self._idle = queue.Queue(maxsize=pool_size)
+        self._down_until = 0.0
+        # Scores added here that the daemon hasn't confirmed, oldest first;
+        # the spooled ones are a subset, shown until some client replays them
+        self._spooled = load_scores(spool_path)
+        self._unconfirmed = list(self._spooled)
+        # Scores that couldn't be written to the spool file
+        self._unsent = []
+        self._board_lock = threading.Lock()
+        self._set_board(load_scores(score_path))
+        self._submits = queue.Queue()
+        self._syncer = threading.Thread(target=self._sync_loop, name="leaderboard-sync", daemon=True)
+        self._syncer.start()
+
+    @classmethod
+    def from_address(cls, address, **kwargs):
+        host, _, port = address.rpartition(":")
+        return cls(host or DEFAULT_HOST, int(port), **kwargs)
+
+    # Connection pool
+
+    def _connect(self):
+        sock = socket.create_connection(self.address, timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock, sock.makefile("rb")
+
+    def _request(self, payload):
+        if time.monotonic() < self._down_until:
+            raise ConnectionError("leaderboard daemon marked down")
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = None
+        try:
+            if conn is None:
+                conn = self._connect()
+            sock, reader = conn
+            sock.sendall(json.dumps(payload).encode() + b"\n")
+            line = reader.readline()
+            if not line:
+                raise ConnectionError("leaderboard daemon closed the connection")
+            response = json.loads(line)
+        except (OSError, ValueError) as e:
+            if conn is not None:
+                conn[0].close()
+            self._down_until = time.monotonic() + RETRY_AFTER
+            raise ConnectionError(str(e)) from e
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn[0].close()
+        if "error" in response:
+            raise ValueError(response["error"])
+        return response
+
+    # Local board
+
+    def _set_board(self, scores):
+        """Replace the board with `scores` plus every unconfirmed local score."""
+        # Stable sort keeps the given order between equal scores, as ScoreStore does
+        board = sorted((tuple(entry) for entry in scores), key=lambda s: s[1], reverse=True)[:MAX_TOP_K]
+        keys = [-score for _, score in board]
+        with self._board_lock:
+            for name, score in self._unconfirmed:
+                pos = bisect.bisect_right(keys, -score)
+                keys.insert(pos, -score)
+                board.insert(pos, (name, score))
+            self._keys, self._board = keys, board
+
+    # ScoreStore interface
+
+    def rank_for(self, score):
+        with self._board_lock:
+            return bisect.bisect_right(self._keys, -score) + 1
+
+    def top(self, k=5):
+        with self._board_lock:
+            return self._board[:k]
+
+    def add(self, name, score):
+        """Put a score on the local board and queue it for the daemon; returns its rank."""
+        with self._board_lock:
+            pos = bisect.bisect_right(self._keys, -score)
+            self._keys.insert(pos, -score)
+            self._board.insert(pos, (name, score))
+            self._unconfirmed.append((name, score))
+        self._submits.put((name, score))
+        return pos + 1
+
+    def flush(self):
+        """Block until every queued score has been sent or spooled."""
+        self._submits.join()
+
+    def close(self):
+        self._submits.put(None)
+        self._syncer.join()
+        while not self._idle.empty():
+            self._idle.get_nowait()[0].close()
+
+    # Background sync
+
+    def _confirm(self, batch):
+        with self._board_lock:
+            for entry in batch:
+                self._unconfirmed.remove(entry)
+
+    def _spool(self, batch):
+        self._spooled.extend(batch)
+        self._write_spool(batch)
+
+    def _write_spool(self, scores):
+        try:
+            with open(self.spool_path, "a") as f:
+                f.writelines(f"{name},{score}\n" for name, score in scores)
+        except OSError as e:
+            print(f"Scores not spooled: {e}")
+            # Kept in memory and sent with the next replay
+            self._unsent.extend(scores)
+
+    def _claim_spool(self):
+        """Take the spool file so no other client replays it; returns its scores."""
+        claimed = f"{self.spool_path}.{os.getpid()}-{id(self):x}"
+        try:
+            os.replace(self.spool_path, claimed)
+        except FileNotFoundError:
+            return []
+        scores = load_scores(claimed)
+        os.remove(claimed)
+        return scores
+
+    def _replay_spool(self):
+        """Send spooled scores, this run's or earlier ones; puts them back if the daemon is still down."""
+        if time.monotonic() < self._down_until:
+            return
+        scores = self._claim_spool() + self._unsent
+        self._unsent = []
+        if scores:
+            try:
+                self._request({"op": "submit", "scores": scores})
+            except ConnectionError:
+                self._write_spool(scores)
+                return
+            except ValueError:
+                # Rejected by the daemon; nothing sensible to retry
+                pass
+        # Ours are off the spool now: either just sent, or claimed by another client
+        self._confirm(self._spooled)
+        self._spooled = []
+
+    def _refresh(self):
+        try:
+            scores = self._request({"op": "top", "k": MAX_TOP_K})["top"]
+        except (ConnectionError, ValueError):
+            return
+        self._set_board(scores)
+
+    def _next_batch(self):
+        """Up to BATCH_SIZE queued scores and whether close() was called."""
+        try:
+            item = self._submits.get(timeout=REFRESH_EVERY)
+        except queue.Empty:
+            return [], False
+        if item is None:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + BATCH_WINDOW
+        while len(batch) < BATCH_SIZE:
+            try:
+                item = self._submits.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _send(self, batch):
+        try:
+            self._request({"op": "submit", "scores": batch})
+            self._confirm(batch)
+        except ConnectionError:
+            self._spool(batch)
+        except ValueError:
+            # Rejected by the daemon; nothing sensible to retry
+            self._confirm(batch)
+
+    def _sync_loop(self):
+        while True:
+            # Anything unexpected is reported and retried next round; the
+            # thread must outlive it or flush() and close() would hang
+            try:
+                self._replay_spool()
+                self._refresh()
+            except Exception as e:
+                print(f"Leaderboard sync failed: {e}")
+            batch, stop = self._next_batch()
+            try:
+                if batch:
+                    self._send(batch)
+            except Exception as e:
+                print(f"Leaderboard sync failed: {e}")
+            finally:
+                for _ in range(len(batch) + stop):
+                    self._submits.task_done()
+            if stop:
+                return
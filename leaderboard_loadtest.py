@@ -0,0 +1,122 @@
+"""Load test for the leaderboard daemon: many concurrent clients, mixed traffic.
+
+Each simulated client keeps one connection open and issues a mix of batched
+submits, top-5 reads and rank queries, measuring every round trip.
+
+    python leaderboard_loadtest.py --clients 200 --requests 200
+    python leaderboard_loadtest.py --spawn     # start a throwaway daemon first
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from leaderboard_server import DEFAULT_HOST, DEFAULT_PORT
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+async def run_client(host, port, requests, batch, submit_share, rng, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(requests):
+            roll = rng.random()
+            if roll < submit_share:
+                payload = {"op": "submit", "scores": [[f"bot{rng.randrange(10**6)}", rng.randint(0, 1000)]
+                                                      for _ in range(batch)]}
+            elif roll < submit_share + (1 - submit_share) / 2:
+                payload = {"op": "top", "k": 5}
+            else:
+                payload = {"op": "rank", "score": rng.randint(0, 1000)}
+            start = time.perf_counter()
+            writer.write(json.dumps(payload).encode() + b"\n")
+            await writer.drain()
+            line = await reader.readline()
+            latencies.append(time.perf_counter() - start)
+            if not line:
+                raise ConnectionError("daemon closed the connection")
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, clients, requests, batch, submit_share, seed):
+    latencies = []
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        run_client(host, port, requests, batch, submit_share, random.Random(rng.random()), latencies)
+        for _ in range(clients)
+    ))
+    return time.perf_counter() - start, latencies
+
+
+def wait_for_daemon(host, port, timeout=10.0):
+    async def ping():
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(b'{"op": "ping"}\n')
+        await reader.readline()
+        writer.close()
+
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            asyncio.run(ping())
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Leaderboard daemon load test")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=100, help="requests per client")
+    parser.add_argument("--batch", type=int, default=8, help="scores per submit request")
+    parser.add_argument("--submit-share", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--spawn", action="store_true", help="run a daemon on a temporary score file")
+    args = parser.parse_args()
+
+    daemon = None
+    tmp_dir = None
+    if args.spawn:
+        tmp_dir = tempfile.TemporaryDirectory()
+        scores = os.path.join(tmp_dir.name, "scores.txt")
+        daemon = subprocess.Popen([
+            sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "leaderboard_server.py"),
+            "--host", args.host, "--port", str(args.port), "--scores", scores,
+        ], stdout=subprocess.DEVNULL)
+    try:
+        wait_for_daemon(args.host, args.port)
+        elapsed, latencies = asyncio.run(run_load(
+            args.host, args.port, args.clients, args.requests, args.batch, args.submit_share, args.seed
+        ))
+    finally:
+        if daemon is not None:
+            daemon.terminate()
+            daemon.wait()
+            tmp_dir.cleanup()
+
+    latencies.sort()
+    total = len(latencies)
+    print(f"{args.clients} clients x {args.requests} requests = {total} requests in {elapsed:.2f}s")
+    print(f"throughput: {total / elapsed:,.0f} req/s")
+    print(f"latency: p50 {percentile(latencies, 0.50) * 1000:.2f} ms, "
+          f"p99 {percentile(latencies, 0.99) * 1000:.2f} ms, max {latencies[-1] * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
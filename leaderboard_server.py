@@ -0,0 +1,105 @@
+"""Leaderboard daemon shared by every game instance on the host.
+
+One process owns scores.txt (through ScoreStore) and answers top-k and rank
+queries from memory, so cabinets no longer overwrite each other's file.
+Protocol: one JSON object per line each way, answered in order.
+
+    {"op": "submit", "scores": [["name", 120], ...]}  -> {"ranks": [3, ...]}
+    {"op": "top", "k": 5}                              -> {"top": [["name", 120], ...]}
+    {"op": "rank", "score": 120}                       -> {"rank": 4}
+    {"op": "ping"}                                     -> {"ok": true}
+
+Run: python leaderboard_server.py [--host 127.0.0.1] [--port 47474] [--scores scores.txt]
+"""
+import argparse
+import asyncio
+import json
+import math
+
+from score_store import SCORE_FILE, ScoreStore
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 47474
+MAX_TOP_K = 100
+
+
+def clean_name(name):
+    """A player name as stored: commas and line breaks would corrupt the score file."""
+    return "".join(ch for ch in str(name) if ch not in ",\r\n")
+
+
+def _int(value, what):
+    """A finite number as an int; JSON also carries 1e999 (inf) and NaN."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f"{what} must be a finite number, got {value!r}")
+    return int(value)
+
+
+class LeaderboardServer:
+    def __init__(self, store):
+        self.store = store
+        self.requests = 0
+
+    def dispatch(self, request):
+        if not isinstance(request, dict):
+            raise ValueError("request must be a JSON object")
+        op = request.get("op")
+        if op == "submit":
+            scores = [(clean_name(name), _int(score, "score")) for name, score in request["scores"]]
+            return {"ranks": [self.store.add(name, score) for name, score in scores]}
+        if op == "top":
+            return {"top": self.store.top(min(_int(request.get("k", 5), "k"), MAX_TOP_K))}
+        if op == "rank":
+            return {"rank": self.store.rank_for(_int(request["score"], "score"))}
+        if op == "ping":
+            return {"ok": True}
+        return {"error": f"unknown op {op!r}"}
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self.requests += 1
+                try:
+                    response = self.dispatch(json.loads(line))
+                except Exception as e:
+                    # A bad request gets an error; it must never drop the connection
+                    response = {"error": str(e) or type(e).__name__}
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT, started=None):
+        # Don't answer anything until the score file is in memory
+        await asyncio.get_running_loop().run_in_executor(None, self.store.wait_loaded)
+        server = await asyncio.start_server(self.handle, host, port)
+        if started is not None:
+            started.set()
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Farm game leaderboard daemon")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--scores", default=SCORE_FILE)
+    args = parser.parse_args()
+
+    store = ScoreStore(args.scores)
+    print(f"Leaderboard on {args.host}:{args.port} ({args.scores})")
+    try:
+        asyncio.run(LeaderboardServer(store).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""Binary save-game snapshots of a FarmSimulation.
+
+Layout (little-endian), version 2:
+
+    header   magic "FARM", version u16, grid size u16, seed types u16,
+             crop pack signature u32, quota count u16, coins i32, day start coins i32,
+             current day u16, flags u8 (game over, game won), day elapsed f64,
+             day duration f64
+    quotas   i32 per day
+    seeds    u32 per seed type, in crop ID order
+    tiles    crop ID u8 per tile, state code u8 per tile, age f64 per tile
+             (IDs and states as in farm_sim's registry; 0 = empty)
+    crc32    u32 over everything above
+
+Times are stored relative to the game clock (seconds into the day, age of
+each crop), so a restored game resumes its day timer and growth timers
+where they were, whenever it is loaded. Files are read back through mmap
+and written by an Autosaver thread with fsync and an atomic rename, so the
+game loop only pays for `encode()`.
+"""
+import array
+import mmap
+import os
+import struct
+import threading
+import zlib
+
+from farm_sim import CROP_NAMES, SEED, SPROUT, Crop
+
+SAVE_FILE = "savegame.bin"
+MAGIC = b"FARM"
+VERSION = 2
+HEADER = struct.Struct("<4sHHHIHiiHBdd")
+CRC = struct.Struct("<I")
+
+
+class SaveError(ValueError):
+    """The file is not a readable save of this format."""
+
+
+def crop_signature():
+    """Checksum of the installed crop names in ID order; saved crop IDs are only valid under the same one."""
+    return zlib.crc32("\n".join(CROP_NAMES[1:]).encode())
+
+
+def encode(sim, now=None):
+    """Snapshot the simulation into bytes; cheap enough for the game loop."""
+    if now is None:
+        now = sim.clock()
+    tiles = sim.grid_size * sim.grid_size
+    if sim.backend == "numpy":
+        # NumPy backend: the grid is already three flat arrays
+        import numpy as np
+        codes = sim.crop_codes.tobytes()
+        states = sim.crop_states.tobytes()
+        ages = np.where(sim.crop_codes > 0, now - sim.plant_time, 0.0).astype("<f8").tobytes()
+    else:
+        # Crop IDs and states are kept as flat bytes; only ages are worked
+        # out here, a row at a time, skipping rows with nothing planted
+        size = sim.grid_size
+        codes, states = bytes(sim.tile_codes), bytes(sim.tile_states)
+        ages = array.array("d", bytes(8 * tiles))
+        for row, times in enumerate(sim.plant_time):
+            start = row * size
+            line = codes[start:start + size]
+            if line.count(0) != size:
+                ages[start:start + size] = array.array("d", [now - t if code else 0.0 for code, t in zip(line, times)])
+        ages = ages.tobytes()
+    flags = int(sim.game_over) | int(sim.game_won) << 1
+    parts = [
+        HEADER.pack(MAGIC, VERSION, sim.grid_size, len(sim.seeds) - 1, crop_signature(), len(sim.daily_quotas),
+                    sim.coins, sim.daily_start_coins, sim.current_day, flags, now - sim.day_start_time,
+                    sim.day_duration),
+        struct.pack(f"<{len(sim.daily_quotas)}i", *sim.daily_quotas),
+        struct.pack(f"<{len(sim.seeds) - 1}I", *sim.seeds[1:]),
+        codes, states, ages,
+    ]
+    body = b"".join(parts)
+    return body + CRC.pack(zlib.crc32(body))
+
+
+def decode(buffer):
+    """Parse a snapshot (bytes, mmap or memoryview) into a plain dict."""
+    view = memoryview(buffer)
+    try:
+        if len(view) < HEADER.size + CRC.size:
+            raise SaveError("file too short")
+        (magic, version, grid_size, seed_types, signature, quota_count, coins, daily_start_coins, current_day,
+         flags, day_elapsed, day_duration) = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise SaveError("not a save file")
+        if version != VERSION:
+            raise SaveError(f"unsupported save version {version}")
+        tiles = grid_size * grid_size
+        size = HEADER.size + 4 * quota_count + 4 * seed_types + 10 * tiles
+        if len(view) != size + CRC.size:
+            raise SaveError("truncated save file")
+        if CRC.unpack_from(view, size)[0] != zlib.crc32(view[:size]):
+            raise SaveError("checksum mismatch")
+        offset = HEADER.size
+        quotas = list(struct.unpack_from(f"<{quota_count}i", view, offset))
+        offset += 4 * quota_count
+        seeds = struct.unpack_from(f"<{seed_types}I", view, offset)
+        offset += 4 * seed_types
+        codes = view[offset:offset + tiles].tolist()
+        states = view[offset + tiles:offset + 2 * tiles].tolist()
+        ages = view[offset + 2 * tiles:offset + 10 * tiles].cast("d").tolist()
+    finally:
+        view.release()
+    return {
+        "grid_size": grid_size,
+        "crop_signature": signature,
+        "coins": coins,
+        "daily_start_coins": daily_start_coins,
+        "current_day": current_day,
+        "game_over": bool(flags & 1),
+        "game_won": bool(flags & 2),
+        "day_elapsed": day_elapsed,
+        "day_duration": day_duration,
+        "daily_quotas": quotas,
+        "seeds": [0] + list(seeds),
+        "tiles": [(code, state, age) if code else None for code, state, age in zip(codes, states, ages)],
+    }
+
+
+def load(path=SAVE_FILE):
+    """Read a save through a memory map; None if there is no usable save."""
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return decode(mapped)
+    except (OSError, ValueError):
+        # Missing or empty file, or a SaveError
+        return None
+
+
+def restore(sim, state, now=None):
+    """Load a decoded snapshot into `sim`, re-basing times on its clock."""
+    if state["grid_size"] != sim.grid_size:
+        raise SaveError(f"save is for a {state['grid_size']}x{state['grid_size']} farm")
+    if state["crop_signature"] != crop_signature():
+        raise SaveError("save was made with a different crop pack")
+    if now is None:
+        now = sim.clock()
+    sim.reset(state["coins"])
+    sim.daily_start_coins = state["daily_start_coins"]
+    sim.daily_quotas = list(state["daily_quotas"])
+    sim.day_duration = state["day_duration"]
+    sim.current_day = state["current_day"]
+    sim.day_start_time = now - state["day_elapsed"]
+    sim.game_over = state["game_over"]
+    sim.game_won = state["game_won"]
+    sim.seeds[:] = array.array("l", state["seeds"])
+    for i, tile in enumerate(state["tiles"]):
+        if tile is None:
+            continue
+        row, col = divmod(i, sim.grid_size)
+        crop_id, crop_state, age = tile
+        if sim.backend == "numpy":
+            sim.crop_codes[row, col] = crop_id
+            sim.crop_states[row, col] = crop_state
+            sim.plant_time[row, col] = now - age
+            continue
+        crop = sim.crops[row][col] = Crop(crop_id, crop_state)
+        sim.plant_time[row][col] = now - age
+        # Rebuild the growth queue entry for crops still growing
+        if crop_state in (SEED, SPROUT):
+            sim._schedule(row, col, crop)
+    sim.reindex()
+
+
+def write_atomic(path, payload):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def delete(path=SAVE_FILE):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class Autosaver:
+    """Writes snapshots on a worker thread; only the newest pending one is kept.
+
+    A failed write (disk full, permissions) is reported and counted, and the
+    worker carries on with the next snapshot.
+    """
+
+    def __init__(self, path=SAVE_FILE):
+        self.path = path
+        self.saves = 0
+        self.superseded = 0
+        self.failures = 0
+        self._pending = None
+        self._closing = False
+        self._cond = threading.Condition()
+        self._worker = threading.Thread(target=self._write_loop, name="autosave", daemon=True)
+        self._worker.start()
+
+    def submit(self, payload):
+        with self._cond:
+            if self._pending is not None:
+                self.superseded += 1
+            self._pending = payload
+            self._cond.notify()
+
+    def discard(self):
+        """Drop any pending snapshot and remove the save (the run is over)."""
+        with self._cond:
+            self._pending = b""
+            self._cond.notify()
+
+    def close(self):
+        """Finish the pending write, if any, and stop the worker."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        self._worker.join()
+
+    def _write_loop(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closing:
+                    self._cond.wait()
+                payload, self._pending = self._pending, None
+            if payload is None:
+                return
+            try:
+                if payload:
+                    write_atomic(self.path, payload)
+                    self.saves += 1
+                else:
+                    delete(self.path)
+            except OSError as e:
+                self.failures += 1
+                print(f"Autosave failed: {e}")
@@ -0,0 +1,188 @@
+"""Scoreboard storage: append-only log file plus an in-memory ranked index.
+
+The file keeps the original "name,score" line format, so old score files load
+as-is. New scores are appended by a background writer thread, and the log is
+periodically rewritten in rank order through an atomic rename.
+
+A score file that can't be read, or an append that fails, is reported and
+otherwise ignored: the store keeps working in memory, and a file it couldn't
+read is never rewritten by compaction.
+"""
+import bisect
+import os
+import queue
+import threading
+
+SCORE_FILE = "scores.txt"
+# Rewrite the log in rank order after this many appends
+COMPACT_EVERY = 1000
+
+
+def load_scores(path=SCORE_FILE):
+    scores = []
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                parts = line.split(",")
+                if len(parts) != 2:
+                    continue
+                name, score_str = parts
+                try:
+                    score = int(score_str)
+                except ValueError:
+                    continue
+                scores.append((name, score))
+    except FileNotFoundError:
+        pass
+    return scores
+
+
+class ScoreStore:
+    """Ranked scores with O(log n) rank queries and O(k) top-k reads.
+
+    Entries are kept best-first; equal scores keep arrival order, so a new
+    score ranks below existing ties, like the old sort-and-rewrite did.
+    Loading happens on a background thread; queries wait for it.
+    """
+
+    def __init__(self, path=SCORE_FILE, compact_every=COMPACT_EVERY):
+        self.path = path
+        self.compact_every = compact_every
+        self._keys = []      # -score, ascending, parallel to _entries
+        self._entries = []   # (name, score), best first
+        self._lock = threading.Lock()
+        self._loaded = threading.Event()
+        self._writes = queue.Queue()
+        self._appends_since_compact = 0
+        # Sequence numbers of added scores, to skip appends a compaction already wrote
+        self._added = 0
+        self._compacted_upto = 0
+        # Compaction rewrites the file from memory, so only once it has been read
+        self._readable = False
+        self.failures = 0
+        self._writer = threading.Thread(target=self._write_loop, name="score-writer", daemon=True)
+        self._writer.start()
+
+    def _load(self):
+        try:
+            scores = load_scores(self.path)
+        except (OSError, ValueError) as e:
+            # ValueError covers undecodable bytes
+            print(f"Scores not loaded: {e}")
+            return
+        else:
+            # Stable sort keeps file order between equal scores
+            scores.sort(key=lambda s: s[1], reverse=True)
+            with self._lock:
+                self._entries = scores
+                self._keys = [-score for _, score in scores]
+            self._readable = True
+        finally:
+            # Queries wait on this, so set it even when loading failed
+            self._loaded.set()
+
+    def wait_loaded(self, timeout=None):
+        return self._loaded.wait(timeout)
+
+    def __len__(self):
+        self._loaded.wait()
+        return len(self._entries)
+
+    def rank_for(self, score):
+        """Rank a new score would get if it were added now."""
+        self._loaded.wait()
+        with self._lock:
+            return bisect.bisect_right(self._keys, -score) + 1
+
+    def top(self, k=5):
+        self._loaded.wait()
+        with self._lock:
+            return self._entries[:k]
+
+    def add(self, name, score):
+        """Insert a score and queue its log append; returns its rank."""
+        self._loaded.wait()
+        with self._lock:
+            pos = bisect.bisect_right(self._keys, -score)
+            self._keys.insert(pos, -score)
+            self._entries.insert(pos, (name, score))
+            self._added += 1
+            self._writes.put(("append", self._added, f"{name},{score}\n"))
+        return pos + 1
+
+    def compact(self):
+        """Queue a rewrite of the log in rank order."""
+        self._writes.put(("compact", None, None))
+
+    def flush(self):
+        """Block until every queued write has reached the file."""
+        self._writes.join()
+
+    def close(self):
+        self._writes.put(("stop", None, None))
+        self._writer.join()
+
+    def _write_loop(self):
+        self._load()
+        pending = None
+        while True:
+            job = pending or self._writes.get()
+            pending = None
+            if job[0] == "stop":
+                self._writes.task_done()
+                return
+            if job[0] == "compact":
+                self._write(self._compact)
+                self._writes.task_done()
+                continue
+            # Batch consecutive appends into one write
+            batch = [job]
+            while True:
+                try:
+                    job = self._writes.get_nowait()
+                except queue.Empty:
+                    break
+                if job[0] != "append":
+                    pending = job
+                    break
+                batch.append(job)
+            # Already on disk if a compaction snapshot included it
+            lines = [line for _, seq, line in batch if seq > self._compacted_upto]
+            self._write(self._append, lines)
+            # Only now, so flush() doesn't return before the lines are on disk
+            for _ in batch:
+                self._writes.task_done()
+
+    def _write(self, func, *args):
+        """Run a file write, reporting failures instead of stopping the writer."""
+        try:
+            func(*args)
+        except OSError as e:
+            self.failures += 1
+            print(f"Scores not saved: {e}")
+
+    def _append(self, lines):
+        if lines:
+            with open(self.path, "a") as f:
+                f.writelines(lines)
+            self._appends_since_compact += len(lines)
+        if self._appends_since_compact >= self.compact_every:
+            self._compact()
+
+    def _compact(self):
+        if not self._readable:
+            return
+        with self._lock:
+            snapshot = list(self._entries)
+            upto = self._added
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.writelines(f"{n},{sc}\n" for n, sc in snapshot)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._compacted_upto = upto
+        self._appends_since_compact = 0
@@ -0,0 +1,147 @@
+"""Sound effects on a fixed pool of reserved mixer channels.
+
+Every clip is decoded (or synthesised) once into a pygame.mixer.Sound when
+the mixer comes up, so `play()` in the event loop only picks a channel and
+starts it: no decoding, file access or allocation of audio buffers. A clip
+retriggered faster than MIN_INTERVAL is dropped, and when every pooled
+channel is busy the oldest voice is stolen.
+
+Clips are short synthesised tones; dropping a WAV/OGG file named after a
+clip into SFX_DIR (e.g. sfx/harvest.wav) replaces it.
+"""
+import array
+import math
+import os
+import threading
+import time
+from collections import deque
+
+import pygame
+
+SFX_DIR = "sfx"
+POOL_CHANNELS = 4
+# Seconds before the same clip may start again
+MIN_INTERVAL = 0.05
+
+# Clip name -> ((start Hz, end Hz, seconds), ...) tone sweeps played back to back
+CLIP_TONES = {
+    "buy": ((880, 880, 0.05),),
+    "plant": ((240, 160, 0.08),),
+    "harvest": ((660, 990, 0.09),),
+    "day": ((523, 523, 0.09), (784, 784, 0.14)),
+    "game_over": ((440, 220, 0.45),),
+    "win": ((523, 523, 0.1), (659, 659, 0.1), (784, 784, 0.1), (1047, 1047, 0.25)),
+}
+CLIP_GAIN = 0.35
+
+
+def synth_clip(tones, frequency, channels, gain=CLIP_GAIN):
+    """Signed 16-bit samples for a sequence of sine sweeps with short fades."""
+    samples = array.array("h")
+    for start_hz, end_hz, seconds in tones:
+        count = int(frequency * seconds)
+        fade = max(1, min(count // 4, int(frequency * 0.01)))
+        phase = 0.0
+        for i in range(count):
+            hz = start_hz + (end_hz - start_hz) * i / count
+            phase += 2 * math.pi * hz / frequency
+            envelope = min(1.0, i / fade, (count - i) / fade)
+            value = int(32767 * gain * envelope * math.sin(phase))
+            samples.extend([value] * channels)
+    return samples
+
+
+class SoundEffects:
+    """Pooled, rate-limited one-shot sounds.
+
+    `load()` runs on the audio thread once the mixer is initialised; until
+    then, and whenever muted, `play()` does nothing.
+    """
+
+    def __init__(self, pool_channels=POOL_CHANNELS, min_interval=MIN_INTERVAL):
+        self.pool_channels = pool_channels
+        self.min_interval = min_interval
+        self.sounds = {}
+        self.channels = []
+        self.started = []       # perf_counter when each pooled channel last started
+        self.last_played = {}
+        self.volume = 1.0
+        self.muted = False
+        self.ready = False
+        self.played = 0
+        self.dropped = 0
+        self.stolen = 0
+        # Seconds from the frame's input poll to the channel starting
+        self.latencies = deque(maxlen=1000)
+        self.buffer_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def load(self):
+        frequency, _, channels = pygame.mixer.get_init()
+        for name, tones in CLIP_TONES.items():
+            path = None
+            for ext in (".wav", ".ogg"):
+                if os.path.exists(os.path.join(SFX_DIR, name + ext)):
+                    path = os.path.join(SFX_DIR, name + ext)
+                    break
+            if path:
+                sound = pygame.mixer.Sound(path)
+            else:
+                sound = pygame.mixer.Sound(buffer=synth_clip(tones, frequency, channels).tobytes())
+            self.sounds[name] = sound
+        # Channels 0..pool-1 are kept away from any automatic Sound.play()
+        pygame.mixer.set_num_channels(max(pygame.mixer.get_num_channels(), self.pool_channels))
+        pygame.mixer.set_reserved(self.pool_channels)
+        self.channels = [pygame.mixer.Channel(i) for i in range(self.pool_channels)]
+        self.started = [0.0] * self.pool_channels
+        with self._lock:
+            self.ready = True
+            self._apply_volume()
+
+    def set_volume(self, volume, muted=False):
+        with self._lock:
+            self.volume = volume
+            self.muted = muted
+            if self.ready:
+                self._apply_volume()
+
+    def _apply_volume(self):
+        for channel in self.channels:
+            channel.set_volume(0.0 if self.muted else self.volume)
+
+    def play(self, name, input_time=None):
+        """Start a clip; `input_time` is the perf_counter of the input that caused it."""
+        if not self.ready or self.muted:
+            return False
+        now = time.perf_counter()
+        if now - self.last_played.get(name, -1.0) < self.min_interval:
+            self.dropped += 1
+            return False
+        self.last_played[name] = now
+        slot = None
+        for i, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                slot = i
+                break
+        if slot is None:
+            # Steal the voice that has been playing longest
+            slot = min(range(len(self.channels)), key=self.started.__getitem__)
+            self.stolen += 1
+        self.channels[slot].play(self.sounds[name])
+        self.started[slot] = now
+        self.played += 1
+        if input_time is not None:
+            self.latencies.append(time.perf_counter() - input_time)
+        return True
+
+    def latency_report(self):
+        """Click-to-sound latency: input poll to channel start, plus one mixer buffer."""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        p50 = ordered[len(ordered) // 2]
+        p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+        buffer_ms = self.buffer_seconds * 1000
+        return (f"SFX click-to-sound latency: p50 {p50 * 1000 + buffer_ms:.1f} ms, "
+                f"p99 {p99 * 1000 + buffer_ms:.1f} ms (incl. {buffer_ms:.1f} ms mixer buffer); "
+                f"{self.played} played, {self.dropped} rate-limited, {self.stolen} stolen")